@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Benchmark evaluator throughput and latency, with regression checks against a baseline."""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Benchmark the evaluation work itself, never the cache or the database
+os.environ['EVAL_CACHE_ENABLED'] = 'false'
+os.environ.setdefault('AUTO_INIT_DB', 'false')
+
+DOCBENCH_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DOCBENCH_DIR))
+
+from backend.services.evaluator import EvaluatorService  # noqa: E402
+from backend.utils.syntax import SyntaxChecker, patch_missing_braces  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'evaluator_baseline.json'
+SYNTHETIC_SIZES = [1_000, 8_000, 32_000, 200_000]
+FUNCTIONS = ['evaluate_code', 'validate_element_strict', 'check_syntax', 'patch_missing_braces', 'jac_check']
+
+# Building blocks for synthetic responses; a few deliberately carry lint issues
+SYNTHETIC_UNITS = [
+    'node Person{i} {{\n    has name: str;\n    has age: int = {i};\n}}\n',
+    'edge Knows{i} {{\n    has since: int = 20{i};\n}}\n',
+    'walker Visitor{i} {{\n    has count: int = 0;\n\n    can visit with `root entry {{\n'
+    '        visit [-->];\n    }}\n\n    can greet with Person{i} entry {{\n'
+    '        self.count += 1;\n        print(f"Hello {{here.name}}");\n    }}\n}}\n',
+    'obj Config{i} {{\n    has items: list[str] = [];\n\n    def add(item: str) -> None {{\n'
+    '        self.items.append(item);\n    }}\n}}\n',
+    'def compute{i}(values: list[int]) -> int {{\n    total = 0;\n    for v in values {{\n'
+    '        if v > {i} {{\n            total += v;\n        }} elif v < 0 {{\n'
+    '            total -= v\n        }}\n    }}\n    return total;\n}}\n',
+    'with entry {{\n    root ++> Person{i}(name="p{i}", age={i});\n    root spawn Visitor{i}();\n'
+    '    result = compute{i}([1, 2, 3])\n}}\n',
+    'enum Color{i} {{ RED, GREEN, BLUE }}\n',
+    'glob counter{i}: int = 0;\n\nimport from datetime {{ datetime }}\n',
+]
+
+
+def synthetic_response(size: int, rng: random.Random) -> str:
+    """Build a plausible Jac program of roughly `size` bytes."""
+    parts = []
+    length = 0
+    i = 0
+    while length < size:
+        unit = rng.choice(SYNTHETIC_UNITS).format(i=i)
+        parts.append(unit)
+        length += len(unit) + 1
+        i += 1
+    return '\n'.join(parts)
+
+
+def load_response_files(paths):
+    """Load responses from benchmark output files ({metadata, responses} or a plain mapping)."""
+    responses = []
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        if 'responses' in data and isinstance(data['responses'], dict):
+            data = data['responses']
+        responses.extend(data.items())
+    return responses
+
+
+def load_db_responses(limit: int):
+    """Load stored responses from the most recent benchmark runs."""
+    from database import BenchmarkResultService
+    responses = []
+    for run in BenchmarkResultService.get_recent(limit):
+        responses.extend((run.get('responses') or {}).items())
+    return responses
+
+
+def build_corpus(evaluator, stored, synthetic_per_size: int, seed: int):
+    """Pair every response with its test case; synthetic ones go to random test cases."""
+    tests_by_id = {t['id']: t for t in evaluator.tests}
+    corpus = [(code, tests_by_id[test_id]) for test_id, code in stored if test_id in tests_by_id and code]
+
+    rng = random.Random(seed)
+    for size in SYNTHETIC_SIZES:
+        for _ in range(synthetic_per_size):
+            corpus.append((synthetic_response(size, rng), rng.choice(evaluator.tests)))
+    return corpus
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn, items, min_time: float, min_rounds: int):
+    """Call fn over all items repeatedly; return ops/sec and latency percentiles in ms."""
+    latencies = []
+    rounds = 0
+    start = time.perf_counter()
+    while rounds < min_rounds or time.perf_counter() - start < min_time:
+        for item in items:
+            t0 = time.perf_counter_ns()
+            fn(item)
+            latencies.append(time.perf_counter_ns() - t0)
+        rounds += 1
+    total_s = sum(latencies) / 1e9
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': round(len(latencies) / total_s, 2) if total_s else 0.0,
+        'p50_ms': round(percentile(latencies, 50) / 1e6, 4),
+        'p99_ms': round(percentile(latencies, 99) / 1e6, 4),
+    }
+
+
+def run_benchmarks(evaluator, corpus, functions, min_time: float, min_rounds: int):
+    element_items = [
+        (code, element)
+        for code, test_case in corpus
+        for element in test_case['required_elements'] + test_case.get('forbidden_elements', [])
+    ]
+    benches = {
+        'evaluate_code': (lambda item: evaluator.evaluate_code(item[0], item[1], use_cache=False), corpus),
+        'validate_element_strict': (lambda item: SyntaxChecker.validate_element_strict(item[0], item[1]), element_items),
+        'check_syntax': (lambda item: SyntaxChecker.check_syntax(item[0]), corpus),
+        'patch_missing_braces': (lambda item: patch_missing_braces(item[0]), corpus),
+        'jac_check': (lambda item: evaluator.jac_check(item[0]), corpus),
+    }
+    results = {}
+    for name in functions:
+        fn, items = benches[name]
+        # One untimed pass warms regex caches, matcher plans and checker workers
+        for item in items[:min(len(items), 20)]:
+            fn(item)
+        results[name] = measure(fn, items, min_time, min_rounds)
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name: str, result: dict):
+    print(f"{name:<26} {result['ops_per_sec']:>12,.1f} ops/s   "
+          f"p50 {result['p50_ms']:>9.3f} ms   p99 {result['p99_ms']:>9.3f} ms   ({result['calls']} calls)")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return regressions where throughput dropped or p99 grew by more than threshold percent."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        if base['ops_per_sec'] > 0:
+            drop = (base['ops_per_sec'] - current['ops_per_sec']) / base['ops_per_sec'] * 100
+            if drop > threshold:
+                regressions.append(f"{name}: throughput {drop:.1f}% below baseline "
+                                   f"({current['ops_per_sec']:,.1f} vs {base['ops_per_sec']:,.1f} ops/s)")
+        if base['p99_ms'] > 0:
+            growth = (current['p99_ms'] - base['p99_ms']) / base['p99_ms'] * 100
+            if growth > threshold:
+                regressions.append(f"{name}: p99 latency {growth:.1f}% above baseline "
+                                   f"({current['p99_ms']:.3f} vs {base['p99_ms']:.3f} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark evaluator throughput and latency')
+    parser.add_argument('-r', '--responses', nargs='*', default=[], help='Benchmark response JSON files to include')
+    parser.add_argument('--db-runs', type=int, default=0, help='Include responses from the N most recent stored runs')
+    parser.add_argument('--synthetic', type=int, default=5, help='Synthetic responses per size (1KB-200KB)')
+    parser.add_argument('-f', '--functions', nargs='*', choices=FUNCTIONS, default=FUNCTIONS, help='Functions to benchmark')
+    parser.add_argument('--min-time', type=float, default=2.0, help='Minimum seconds per function')
+    parser.add_argument('--min-rounds', type=int, default=1, help='Minimum passes over the corpus per function')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic responses')
+    parser.add_argument('-b', '--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('-t', '--threshold', type=float,
+                        default=float(os.getenv('EVAL_BENCH_THRESHOLD', '10')),
+                        help='Allowed regression in percent before failing')
+    parser.add_argument('-o', '--output', help='Write results JSON to this file')
+    parser.add_argument('--tests', default=str(DOCBENCH_DIR / 'tests.json'), help='Path to tests.json')
+
+    args = parser.parse_args()
+
+    evaluator = EvaluatorService(args.tests)
+    stored = load_response_files(args.responses)
+    if args.db_runs:
+        stored.extend(load_db_responses(args.db_runs))
+    corpus = build_corpus(evaluator, stored, args.synthetic, args.seed)
+    if not corpus:
+        print("Error: empty corpus; pass --responses, --db-runs or --synthetic", file=sys.stderr)
+        sys.exit(1)
+
+    synthetic = args.synthetic * len(SYNTHETIC_SIZES)
+    print(f"Corpus: {len(corpus)} responses ({len(corpus) - synthetic} stored, {synthetic} synthetic)")
+    results = run_benchmarks(evaluator, corpus, args.functions, args.min_time, args.min_rounds)
+    report = {
+        'corpus': {'responses': len(corpus), 'synthetic_per_size': args.synthetic, 'seed': args.seed},
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not Path(args.baseline).exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0f}%:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0f}% against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
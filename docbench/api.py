@@ -1,12 +1,20 @@
 #!/usr/bin/env python3
 """API Server Entry Point"""
+import os
 from backend.app import create_app, create_socketio, running_benchmarks
 from backend.routes import register_all_routes
+from backend.services import resume_reevaluation_jobs, get_model_catalog
+from database import SweepService
 
 app = create_app()
 socketio = create_socketio(app)
 register_all_routes(app, socketio, running_benchmarks)
 
 if __name__ == '__main__':
+    # The debug reloader runs this block in a watcher and a serving process; resume jobs only in the latter
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_reevaluation_jobs(socketio)
+        SweepService.interrupt_unfinished()
+        get_model_catalog().warm()
     print("Starting API server on http://localhost:5050")
     socketio.run(app, debug=True, port=5050, host='0.0.0.0', allow_unsafe_werkzeug=True)
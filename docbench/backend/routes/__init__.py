@@ -8,6 +8,7 @@ from . import files
 from . import results
 from . import health
 from . import graphs
+from . import sweeps
 
 
 def register_all_routes(app, socketio, running_benchmarks):
@@ -18,6 +19,7 @@ def register_all_routes(app, socketio, running_benchmarks):
     results.register_routes(app, socketio, running_benchmarks)
     health.register_routes(app, socketio, running_benchmarks)
     graphs.register_routes(app, socketio, running_benchmarks)
+    sweeps.register_routes(app, socketio, running_benchmarks)
 
 
 __all__ = ['register_all_routes']
@@ -1,11 +1,16 @@
 """Benchmark route handlers"""
 from flask import jsonify, request
+import os
 import threading
 import traceback
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from backend.services import LLMService, EvaluatorService
-from database import BenchmarkRunService, BenchmarkResultService
+from backend.services import (
+    LLMService, EvaluatorService, get_test_suite,
+    evaluation_record, category_breakdown_with_tests, tests_completed
+)
+from database import BenchmarkRunService, BenchmarkResultService, TestCaseEvaluationService
 
 
 def register_routes(app, socketio, running_benchmarks):
@@ -19,7 +24,9 @@ def register_routes(app, socketio, running_benchmarks):
         variant = data.get('variant')
         temperature = data.get('temperature', 0.1)
         max_tokens = data.get('max_tokens', 16000)
-        batch_size = data.get('batch_size', 45)
+        batch_size = data.get('batch_size')  # upper bound; the service fits batches to the model
+        pipelined = data.get('pipelined', os.getenv('PIPELINED_EVALUATION', 'true').lower() == 'true')
+        streaming = data.get('streaming', os.getenv('LLM_STREAMING', 'false').lower() == 'true')
 
         if not model or not variant:
             return jsonify({'error': 'model and variant are required'}), 400
@@ -27,6 +34,13 @@ def register_routes(app, socketio, running_benchmarks):
         run_id = f"{model}_{variant}_{uuid.uuid4().hex[:8]}"
 
         def run_in_background():
+            # Pipelined mode grades each batch on this executor while later batches are still generating
+            eval_executor = ThreadPoolExecutor(max_workers=1) if pipelined else None
+            evaluator = None
+            graded_batches = []
+            graded_results = {}  # test id -> latest grade; a regraded test replaces its earlier result
+            streamed_answers = {}
+            streamed_lock = threading.Lock()
             try:
                 running_benchmarks[run_id] = {'status': 'running', 'progress': 'Initializing...'}
                 socketio.emit('benchmark_update', {'run_id': run_id, 'status': 'running', 'progress': 'Initializing...'})
@@ -59,9 +73,41 @@ def register_routes(app, socketio, running_benchmarks):
                         update_data['batch_statuses'] = batch_statuses
                     socketio.emit('benchmark_update', update_data)
 
+                def grade_batch(batch_num, batch_responses):
+                    results = evaluator.evaluate_batch(batch_responses)
+                    graded_results.update((r["test_id"], r) for r in results)
+                    partial = evaluator.partial_summary(list(graded_results.values()))
+                    running_benchmarks[run_id]['partial_evaluation'] = partial
+                    socketio.emit('benchmark_update', {
+                        'run_id': run_id, 'status': 'running',
+                        'progress': running_benchmarks[run_id].get('progress'),
+                        'batch_evaluated': batch_num, 'partial_evaluation': partial
+                    })
+                    return results
+
+                def batch_callback(batch_num, batch_responses):
+                    graded_batches.append(eval_executor.submit(grade_batch, batch_num, batch_responses))
+
+                def grade_streamed(batch_num):
+                    # Answers that streamed in while the previous grade ran are graded together
+                    with streamed_lock:
+                        answers = dict(streamed_answers)
+                        streamed_answers.clear()
+                    return grade_batch(batch_num, answers) if answers else []
+
+                def test_callback(batch_num, test_id, code):
+                    with streamed_lock:
+                        streamed_answers[test_id] = code
+                    graded_batches.append(eval_executor.submit(grade_streamed, batch_num))
+
+                if pipelined:
+                    evaluator = EvaluatorService()
+
                 result = llm_service.run_benchmark_concurrent(
                     model, variant, temperature, max_tokens,
-                    batch_size=batch_size, progress_callback=progress_callback
+                    batch_size=batch_size, progress_callback=progress_callback,
+                    batch_callback=batch_callback if pipelined else None,
+                    streaming=streaming, test_callback=test_callback if pipelined else None
                 )
 
                 # Trigger evaluation immediately
@@ -69,29 +115,30 @@ def register_routes(app, socketio, running_benchmarks):
                 print(f"[EVAL] Starting evaluation for {actual_run_id}", flush=True)
                 socketio.emit('benchmark_update', {'run_id': run_id, 'status': 'evaluating', 'progress': 'Evaluating responses...'})
 
-                from database import BenchmarkResultService, TestCaseEvaluationService
-                result_data = BenchmarkResultService.get_by_run_id(actual_run_id)
+                # Pipelined runs already hold every response; only the batch path re-reads them
+                result_data = result if pipelined else BenchmarkResultService.get_by_run_id(actual_run_id)
 
                 if result_data:
                     try:
                         print(f"[EVAL] Setting evaluation status to 'evaluating' for {actual_run_id}", flush=True)
                         BenchmarkResultService.set_evaluation_status(actual_run_id, 'evaluating')
 
-                        print(f"[EVAL] Creating evaluator and evaluating responses...", flush=True)
-                        evaluator = EvaluatorService()
-                        eval_result = evaluator.evaluate_responses(result_data['responses'])
+                        if pipelined:
+                            print(f"[EVAL] Merging {len(graded_batches)} graded batches...", flush=True)
+                            eval_result = evaluator.merge_batches(
+                                [f.result() for f in graded_batches], result_data['responses']
+                            )
+                        else:
+                            print("[EVAL] Creating evaluator and evaluating responses...", flush=True)
+                            evaluator = EvaluatorService()
+                            eval_result = evaluator.evaluate_responses(result_data['responses'])
 
                         print(f"[EVAL] Updating evaluation results: {eval_result['percentage']:.2f}%", flush=True)
                         # Update evaluation
                         BenchmarkResultService.update_evaluation(
                             run_id=actual_run_id,
-                            evaluation_results={
-                                'category_breakdown': eval_result['evaluation_results'],
-                                'level_breakdown': eval_result.get('level_breakdown', {})
-                            },
-                            total_score=eval_result['total_score'],
-                            max_score=eval_result['max_score'],
-                            percentage=eval_result['percentage']
+                            **evaluation_record(eval_result, evaluator.suite),
+                            **evaluator.evaluation_stamp(eval_result)
                         )
 
                         print(f"[EVAL] ✓ Evaluation completed successfully for {actual_run_id}", flush=True)
@@ -103,7 +150,10 @@ def register_routes(app, socketio, running_benchmarks):
                     print(f"[EVAL] Could not find result data for {actual_run_id}", flush=True)
 
                 running_benchmarks[run_id] = {'status': 'completed', 'result': result, 'progress': 'Done'}
-                BenchmarkRunService.complete(run_id=actual_run_id, result_id=None)
+                # The run is tracked under the id it was created with, not the stored result's id
+                BenchmarkRunService.complete(run_id=run_id, result_id=None, metadata={
+                    'result_run_id': actual_run_id, 'telemetry': result.get('telemetry')
+                })
                 socketio.emit('benchmark_update', {'run_id': run_id, 'status': 'completed', 'result': result})
 
             except Exception as e:
@@ -112,6 +162,9 @@ def register_routes(app, socketio, running_benchmarks):
                 running_benchmarks[run_id] = {'status': 'failed', 'error': str(e), 'progress': 'Failed'}
                 BenchmarkRunService.fail(run_id=run_id, error_message=str(e))
                 socketio.emit('benchmark_update', {'run_id': run_id, 'status': 'failed', 'error': str(e)})
+            finally:
+                if eval_executor is not None:
+                    eval_executor.shutdown(wait=False, cancel_futures=True)
 
         threading.Thread(target=run_in_background).start()
         return jsonify({'run_id': run_id, 'status': 'started'})
@@ -160,13 +213,8 @@ def register_routes(app, socketio, running_benchmarks):
 
             BenchmarkResultService.update_evaluation(
                 run_id=run_id,
-                evaluation_results={
-                    'category_breakdown': eval_result['evaluation_results'],
-                    'level_breakdown': eval_result.get('level_breakdown', {})
-                },
-                total_score=eval_result['total_score'],
-                max_score=eval_result['max_score'],
-                percentage=eval_result['percentage']
+                **evaluation_record(eval_result, evaluator.suite),
+                **evaluator.evaluation_stamp(eval_result)
             )
 
             return jsonify({
@@ -192,8 +240,12 @@ def register_routes(app, socketio, running_benchmarks):
                 'status': result.get('status')
             })
 
-        category_breakdown = eval_results.get('category_breakdown', {})
-        tests_completed = sum(len(c.get('tests', [])) for c in category_breakdown.values())
+        category_breakdown = category_breakdown_with_tests(
+            eval_results,
+            TestCaseEvaluationService.get_by_benchmark_result(result['id']),
+            result.get('responses'),
+            get_test_suite()
+        )
 
         return jsonify({
             'summary': {
@@ -202,7 +254,7 @@ def register_routes(app, socketio, running_benchmarks):
                 'overall_percentage': result['percentage'],
                 'category_breakdown': category_breakdown,
                 'level_breakdown': eval_results.get('level_breakdown', {}),
-                'tests_completed': tests_completed
+                'tests_completed': tests_completed(eval_results)
             },
             'run_id': result.get('run_id'),
             'model': result.get('model'),
@@ -260,21 +312,52 @@ def register_routes(app, socketio, running_benchmarks):
                     batch_num=batch_num, batch_size=batch_size
                 )
 
-                current_responses = result.get('responses', {})
+                # Re-read so responses merged by a concurrent rerun are kept
+                current = BenchmarkResultService.get_by_run_id(run_id) or result
+                current_responses = current.get('responses') or {}
                 current_responses.update(batch_responses)
-                BenchmarkResultService.update_responses(run_id, current_responses)
+
+                # Re-grade only this batch when the stored evaluation is current
+                evaluator = EvaluatorService()
+                stamp = evaluator.evaluation_stamp()
+                rows = TestCaseEvaluationService.get_by_benchmark_result(current['id'])
+                incremental = (
+                    bool(rows)
+                    and current.get('evaluation_status') == 'completed'
+                    and current.get('evaluator_version') == stamp['evaluator_version']
+                    and current.get('test_suite_hash') == stamp['test_suite_hash']
+                )
+                evaluation = None
+                if incremental:
+                    record = evaluator.reevaluate_tests(rows, batch_responses)
+                    BenchmarkResultService.splice_evaluation(
+                        run_id=run_id,
+                        responses=current_responses,
+                        test_suite_hash=stamp['test_suite_hash'],
+                        **record
+                    )
+                    evaluation = {
+                        'total_score': record['total_score'],
+                        'max_score': record['max_score'],
+                        'percentage': record['percentage'],
+                        'tests_regraded': len(record['test_rows'])
+                    }
+                else:
+                    BenchmarkResultService.update_responses(run_id, current_responses)
 
                 running_benchmarks[rerun_id] = {
                     'status': 'completed',
                     'progress': f'Batch {batch_num} completed',
-                    'responses': batch_responses
+                    'responses': batch_responses,
+                    'evaluation': evaluation
                 }
                 socketio.emit('batch_rerun_update', {
                     'rerun_id': rerun_id,
                     'run_id': run_id,
                     'batch_num': batch_num,
                     'status': 'completed',
-                    'num_responses': len(batch_responses)
+                    'num_responses': len(batch_responses),
+                    'evaluation': evaluation
                 })
 
             except Exception as e:
@@ -303,6 +386,7 @@ def register_routes(app, socketio, running_benchmarks):
         if not results:
             return jsonify({'error': 'Collection not found or empty'}), 404
 
+        evaluator = EvaluatorService()
         evaluated = {}
         for result in results:
             run_id = result['run_id']
@@ -310,17 +394,11 @@ def register_routes(app, socketio, running_benchmarks):
             needs_eval = not eval_results or 'category_breakdown' not in eval_results
 
             if needs_eval:
-                evaluator = EvaluatorService()
                 eval_result = evaluator.evaluate_responses(result['responses'])
                 BenchmarkResultService.update_evaluation(
                     run_id=run_id,
-                    evaluation_results={
-                        'category_breakdown': eval_result['evaluation_results'],
-                        'level_breakdown': eval_result.get('level_breakdown', {})
-                    },
-                    total_score=eval_result['total_score'],
-                    max_score=eval_result['max_score'],
-                    percentage=eval_result['percentage']
+                    **evaluation_record(eval_result, evaluator.suite),
+                    **evaluator.evaluation_stamp(eval_result)
                 )
                 evaluated[run_id] = {
                     'summary': {
@@ -332,14 +410,18 @@ def register_routes(app, socketio, running_benchmarks):
                     }
                 }
             else:
-                category_breakdown = eval_results.get('category_breakdown', {})
-                tests_completed = sum(len(c.get('tests', [])) for c in category_breakdown.values())
+                category_breakdown = category_breakdown_with_tests(
+                    eval_results,
+                    TestCaseEvaluationService.get_by_benchmark_result(result['id']),
+                    result.get('responses'),
+                    evaluator.suite
+                )
                 evaluated[run_id] = {
                     'summary': {
                         'overall_percentage': result.get('percentage', 0),
                         'total_score': result.get('total_score', 0),
                         'total_max': result.get('max_score', 0),
-                        'tests_completed': tests_completed,
+                        'tests_completed': tests_completed(eval_results),
                         'category_breakdown': category_breakdown
                     }
                 }
@@ -2,7 +2,7 @@
 from flask import jsonify
 import os
 from database import get_db
-from database.models import BenchmarkResult, BenchmarkRun, Collection
+from database.models import BenchmarkResult, BenchmarkRun, Collection, TestCaseEvaluation
 
 
 def register_routes(app, socketio=None, running_benchmarks=None):
@@ -21,6 +21,8 @@ def register_routes(app, socketio=None, running_benchmarks=None):
     @app.route('/api/clear-db', methods=['POST'])
     def clear_database():
         with get_db() as session:
+            # Bulk deletes bypass the ORM cascade, so remove per-test rows first
+            session.query(TestCaseEvaluation).delete()
             deleted_results = session.query(BenchmarkResult).delete()
             deleted_runs = session.query(BenchmarkRun).delete()
             deleted_collections = session.query(Collection).delete()
@@ -1,6 +1,6 @@
 """Model and variant route handlers"""
 from flask import jsonify, request
-from backend.services import LLMService
+from backend.services import get_model_catalog
 from database import DocumentationService
 
 
@@ -8,20 +8,10 @@ def register_routes(app, socketio=None, running_benchmarks=None):
 
     @app.route('/api/models', methods=['GET'])
     def get_models():
-        llm_service = LLMService()
-        models = llm_service.fetch_available_models()
-        formatted = [
-            {
-                'id': m.get('id'),
-                'name': m.get('name'),
-                'context_length': m.get('context_length'),
-                'pricing': m.get('pricing'),
-                'architecture': m.get('architecture'),
-                'top_provider': m.get('top_provider')
-            }
-            for m in models
-        ]
-        return jsonify({'models': formatted})
+        catalog = get_model_catalog()
+        if request.args.get('refresh', '').lower() in ('1', 'true'):
+            catalog.refresh()
+        return jsonify({'models': catalog.get_summaries(), 'catalog': catalog.get_status()})
 
     @app.route('/api/variants', methods=['GET'])
     def get_variants():
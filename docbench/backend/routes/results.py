@@ -2,9 +2,13 @@
 Results-related route handlers
 """
 from flask import jsonify, request
+import time
 import traceback
-from backend.services import EvaluatorService
-from database import BenchmarkResultService
+from backend.services import (
+    EvaluatorService, get_test_suite, start_reevaluation, cancel_reevaluation, rescore, DEFAULT_WEIGHTS,
+    get_llm_engine, latency_report
+)
+from database import BenchmarkResultService, EvaluationCacheService, LLMReplayService, ReevaluationJobService
 
 
 def register_routes(app, socketio=None, running_benchmarks=None):
@@ -15,36 +19,7 @@ def register_routes(app, socketio=None, running_benchmarks=None):
     def get_stats():
         """Get benchmark statistics"""
         try:
-            from backend.services import EvaluatorService
-
-            evaluator = EvaluatorService()
-            tests = evaluator.tests
-
-            total_tests = len(tests)
-            total_points = sum(t['points'] for t in tests)
-
-            level_stats = {}
-            for level in range(1, 11):
-                level_tests = [t for t in tests if t['level'] == level]
-                level_stats[f'level_{level}'] = {
-                    'count': len(level_tests),
-                    'points': sum(t['points'] for t in level_tests)
-                }
-
-            category_stats = {}
-            for test in tests:
-                cat = test['category']
-                if cat not in category_stats:
-                    category_stats[cat] = {'count': 0, 'points': 0}
-                category_stats[cat]['count'] += 1
-                category_stats[cat]['points'] += test['points']
-
-            return jsonify({
-                'total_tests': total_tests,
-                'total_points': total_points,
-                'levels': level_stats,
-                'categories': category_stats
-            })
+            return jsonify(get_test_suite().api_stats)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -125,4 +100,117 @@ def register_routes(app, socketio=None, running_benchmarks=None):
             app.logger.error(traceback.format_exc())
             return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
 
+    @app.route('/api/evaluation-cache', methods=['GET'])
+    def get_evaluation_cache_stats():
+        """Get evaluation cache hit/miss counters and size"""
+        try:
+            return jsonify(EvaluationCacheService.get_stats())
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/evaluation-cache', methods=['DELETE'])
+    def clear_evaluation_cache():
+        """Drop all cached evaluations"""
+        try:
+            deleted = EvaluationCacheService.clear()
+            return jsonify({'status': 'success', 'deleted': deleted})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/llm-replay', methods=['GET'])
+    def get_llm_replay_stats():
+        """Get the number of recorded LLM completions and their replays per model"""
+        try:
+            return jsonify(LLMReplayService.get_stats())
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/llm-replay', methods=['DELETE'])
+    def clear_llm_replay():
+        """Drop recorded LLM completions, optionally for one model (?model=...)"""
+        try:
+            deleted = LLMReplayService.clear(request.args.get('model'))
+            return jsonify({'status': 'success', 'deleted': deleted})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/telemetry', methods=['GET'])
+    def get_telemetry():
+        """
+        p50/p95/p99 request latency, queue wait, time to first token and
+        tokens/sec per model over runs from the last ?hours= (default 24),
+        optionally for ?model=... only, plus the live engine counters
+        """
+        try:
+            hours = request.args.get('hours', 24, type=float)
+            if hours is None or hours <= 0:
+                return jsonify({'error': 'hours must be a positive number'}), 400
+            report = latency_report(hours, request.args.getlist('model') or None)
+            report['engine'] = get_llm_engine().get_stats()
+            return jsonify(report)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/reevaluate', methods=['POST'])
+    def start_reevaluation_job():
+        """Re-grade every stored result evaluated with an older evaluator or tests.json"""
+        try:
+            data = request.json or {}
+            job = start_reevaluation(
+                socketio,
+                chunk_size=data.get('chunk_size'),
+                workers=data.get('workers')
+            )
+            return jsonify(job), 202
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/reevaluate', methods=['GET'])
+    def list_reevaluation_jobs():
+        """List recent re-evaluation jobs and how many results are currently stale"""
+        try:
+            stamp = EvaluatorService().evaluation_stamp()
+            return jsonify({
+                'jobs': ReevaluationJobService.get_recent(),
+                'stale_results': ReevaluationJobService.count_stale(**stamp),
+                **stamp
+            })
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/reevaluate/<job_id>', methods=['GET'])
+    def get_reevaluation_job(job_id):
+        job = ReevaluationJobService.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+
+    @app.route('/api/reevaluate/<job_id>/cancel', methods=['POST'])
+    def cancel_reevaluation_job(job_id):
+        job = cancel_reevaluation(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job)
+
+    @app.route('/api/rescore', methods=['GET'])
+    def get_default_weights():
+        """The weight profile stored scores are graded with"""
+        return jsonify({'weights': DEFAULT_WEIGHTS._asdict()})
+
+    @app.route('/api/rescore', methods=['POST'])
+    def rescore_results():
+        """Recompute stored scores under a weight profile, without re-running any checks"""
+        try:
+            data = request.json or {}
+            collections = data.get('collections') or ([data['collection']] if data.get('collection') else None)
+            run_ids = data.get('run_ids')
+            start = time.perf_counter()
+            result = rescore(data.get('weights'), collections=collections, run_ids=run_ids)
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            app.logger.error(f'Error rescoring results: {str(e)}')
+            app.logger.error(traceback.format_exc())
+            return jsonify({'error': str(e)}), 500
@@ -0,0 +1,45 @@
+"""Sweep route handlers"""
+from flask import jsonify, request
+from backend.services import start_sweep, get_sweep, cancel_sweep
+from database import SweepService
+
+
+def register_routes(app, socketio, running_benchmarks):
+    """Register sweep routes"""
+
+    @app.route('/api/sweeps', methods=['POST'])
+    def create_sweep():
+        """
+        Start a sweep from a matrix spec: models, variants, optional
+        batch_sizes, repeats, temperature, max_tokens, priority,
+        model_priorities and the collection finished runs are added to.
+        """
+        try:
+            sweep = start_sweep(request.json or {}, socketio)
+            return jsonify(sweep), 202
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/sweeps', methods=['GET'])
+    def list_sweeps():
+        try:
+            return jsonify({'sweeps': SweepService.get_recent(request.args.get('limit', 20, type=int))})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/sweeps/<sweep_id>', methods=['GET'])
+    def get_sweep_status(sweep_id):
+        """A sweep's run counts, plus aggregate and per-run progress while it is running"""
+        sweep = get_sweep(sweep_id)
+        if not sweep:
+            return jsonify({'error': 'Sweep not found'}), 404
+        return jsonify(sweep)
+
+    @app.route('/api/sweeps/<sweep_id>/cancel', methods=['POST'])
+    def cancel_sweep_run(sweep_id):
+        sweep = cancel_sweep(sweep_id)
+        if not sweep:
+            return jsonify({'error': 'Sweep not found'}), 404
+        return jsonify(sweep)
@@ -2,6 +2,18 @@
 
 from .evaluator import EvaluatorService
 from .llm_service import LLMService
+from .llm_engine import LLMEngine, get_llm_engine
+from .model_catalog import ModelCatalog, get_model_catalog
 from .graph_service import GraphService
+from .test_suite import TestSuite, get_test_suite
+from .evaluation_store import evaluation_record, category_breakdown_with_tests, tests_completed
+from .scoring import ScoringWeights, DEFAULT_WEIGHTS, rescore
+from .reevaluation import start_reevaluation, resume_reevaluation_jobs, cancel_reevaluation
+from .sweeps import start_sweep, get_sweep, cancel_sweep, expand_matrix
+from .telemetry import latency_report
 
-__all__ = ['EvaluatorService', 'LLMService', 'GraphService']
+__all__ = ['EvaluatorService', 'LLMService', 'LLMEngine', 'get_llm_engine', 'ModelCatalog', 'get_model_catalog', 'GraphService', 'TestSuite', 'get_test_suite',
+           'evaluation_record', 'category_breakdown_with_tests', 'tests_completed',
+           'ScoringWeights', 'DEFAULT_WEIGHTS', 'rescore',
+           'start_reevaluation', 'resume_reevaluation_jobs', 'cancel_reevaluation',
+           'start_sweep', 'get_sweep', 'cancel_sweep', 'expand_matrix', 'latency_report']
@@ -0,0 +1,234 @@
+"""Compact storage of evaluation results as TestCaseEvaluation rows"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.syntax import SyntaxDiagnostic, patch_missing_braces
+from .test_suite import TestSuite
+
+# TestCaseEvaluation.flags bits
+JAC_CHECKED = 1 << 0
+JAC_VALID = 1 << 1
+FUNCTIONAL_PASSED = 1 << 2
+FUNCTIONAL_FAILED = 1 << 3
+FUNCTIONAL_SKIPPED = 1 << 4
+TIMED_OUT = 1 << 5
+
+JAC_PASSED_CHECK = "[PASS] jac check passed"
+JAC_FAILED_PREFIX = "[FAIL] jac check failed:"
+FUNCTIONAL_PASSED_CHECK = "[PASS] Functional tests passed"
+FUNCTIONAL_FAILED_PREFIX = "[FAIL] Functional tests failed:\n"
+FUNCTIONAL_SKIPPED_CHECK = "[FAIL] Functional tests skipped due to compilation error"
+TIMED_OUT_PREFIX = "[FAIL] Evaluation timed out after "
+
+PENALTY_KEYS = ("required", "forbidden", "syntax", "jac_check", "functional")
+
+
+def _flags(result: Dict) -> Tuple[int, Dict[str, Any]]:
+    """Derive outcome flags, plus details that have no compact form, from a result's checks"""
+    flags = 0
+    details = {}
+    for check in result["passed_checks"]:
+        if check == JAC_PASSED_CHECK:
+            flags |= JAC_CHECKED
+        elif check == FUNCTIONAL_PASSED_CHECK:
+            flags |= FUNCTIONAL_PASSED
+    for check in result["failed_checks"]:
+        if check.startswith(JAC_FAILED_PREFIX):
+            flags |= JAC_CHECKED
+        elif check.startswith(FUNCTIONAL_FAILED_PREFIX):
+            flags |= FUNCTIONAL_FAILED
+            details["functional_output"] = check[len(FUNCTIONAL_FAILED_PREFIX):-3]
+        elif check == FUNCTIONAL_SKIPPED_CHECK:
+            flags |= FUNCTIONAL_SKIPPED
+        elif check.startswith(TIMED_OUT_PREFIX):
+            flags |= TIMED_OUT
+            details["timeout"] = check[len(TIMED_OUT_PREFIX):-1]
+    if result["jac_valid"]:
+        flags |= JAC_VALID
+    return flags, details
+
+
+def encode_result(result: Dict, test_case: Optional[Dict]) -> Dict[str, Any]:
+    """Turn one evaluator result into a compact TestCaseEvaluation row"""
+    required = test_case["required_elements"] if test_case else []
+    forbidden = test_case.get("forbidden_elements", []) if test_case else []
+    passed = set(result["passed_checks"])
+    failed = set(result["failed_checks"])
+
+    required_mask = 0
+    for i, element in enumerate(required):
+        if f"[PASS] Found required element: '{element}'" in passed:
+            required_mask |= 1 << i
+    forbidden_mask = 0
+    for i, element in enumerate(forbidden):
+        if f"[FAIL] Contains forbidden element: '{element}'" in failed:
+            forbidden_mask |= 1 << i
+
+    flags, details = _flags(result)
+    if flags & TIMED_OUT:
+        required_mask = forbidden_mask = 0
+    for key in ("jac_errors", "jac_warnings", "functional_timing"):
+        if result.get(key):
+            details[key] = result[key]
+
+    breakdown = result["score_breakdown"]
+    return {
+        'test_id': result["test_id"],
+        'test_category': result["category"],
+        'test_level': str(result["level"]),
+        'passed': result["score"] >= result["max_score"],
+        'score': result["score"],
+        'max_score': result["max_score"],
+        'percentage': result["percentage"],
+        'required_mask': required_mask,
+        'required_total': len(required),
+        'forbidden_mask': forbidden_mask,
+        'forbidden_total': len(forbidden),
+        'flags': flags,
+        'penalty_required': breakdown["required"],
+        'penalty_forbidden': breakdown["forbidden"],
+        'penalty_syntax': breakdown["syntax"],
+        'penalty_jac_check': breakdown["jac_check"],
+        'penalty_functional': breakdown["functional"],
+        'syntax_errors': result["syntax_errors"],
+        'lint_codes': result.get("syntax_codes", []),
+        'evaluation_details': details or None
+    }
+
+
+def decode_row(row: Dict[str, Any], test_case: Optional[Dict], code: Optional[str]) -> Dict:
+    """Rebuild the evaluator result shape (including check prose) from a compact row"""
+    flags = row['flags'] or 0
+    details = row['evaluation_details'] or {}
+    required = test_case["required_elements"] if test_case else []
+    forbidden = test_case.get("forbidden_elements", []) if test_case else []
+    # Element names are only meaningful if the test still has the elements it was graded with
+    if len(required) != row['required_total']:
+        required = [f"#{i + 1}" for i in range(row['required_total'])]
+    if len(forbidden) != row['forbidden_total']:
+        forbidden = [f"#{i + 1}" for i in range(row['forbidden_total'])]
+
+    passed_checks = []
+    failed_checks = []
+    required_found = 0
+    forbidden_found = 0
+    if flags & TIMED_OUT:
+        failed_checks.append(f"{TIMED_OUT_PREFIX}{details.get('timeout', '')}s")
+    else:
+        for i, element in enumerate(required):
+            if row['required_mask'] >> i & 1:
+                required_found += 1
+                passed_checks.append(f"[PASS] Found required element: '{element}'")
+            else:
+                failed_checks.append(f"[FAIL] Missing required element: '{element}'")
+        for i, element in enumerate(forbidden):
+            if row['forbidden_mask'] >> i & 1:
+                forbidden_found += 1
+                failed_checks.append(f"[FAIL] Contains forbidden element: '{element}'")
+            else:
+                passed_checks.append(f"[PASS] Correctly avoided: '{element}'")
+
+        if flags & JAC_CHECKED:
+            if flags & JAC_VALID:
+                passed_checks.append(JAC_PASSED_CHECK)
+            else:
+                failed_checks.append(f"{JAC_FAILED_PREFIX} {len(details.get('jac_errors', []))} errors")
+        if flags & FUNCTIONAL_PASSED:
+            passed_checks.append(FUNCTIONAL_PASSED_CHECK)
+        elif flags & FUNCTIONAL_FAILED:
+            failed_checks.append(f"{FUNCTIONAL_FAILED_PREFIX}{details.get('functional_output', '')}...")
+        elif flags & FUNCTIONAL_SKIPPED:
+            failed_checks.append(FUNCTIONAL_SKIPPED_CHECK)
+
+    lint_codes = row['lint_codes'] or []
+    result = {
+        "test_id": row['test_id'],
+        "category": row['test_category'],
+        "level": test_case["level"] if test_case else int(row['test_level']),
+        "score": row['score'],
+        "max_score": row['max_score'],
+        "score_breakdown": {key: row[f'penalty_{key}'] for key in PENALTY_KEYS},
+        "percentage": row['percentage'],
+        "required_found": f"{required_found}/{row['required_total']}",
+        "forbidden_found": forbidden_found,
+        "passed_checks": passed_checks,
+        "failed_checks": failed_checks,
+        "syntax_feedback": [SyntaxDiagnostic(c, line, tuple(args)).message for c, line, args in lint_codes],
+        "syntax_codes": lint_codes,
+        "syntax_errors": row['syntax_errors'],
+        "jac_valid": bool(flags & JAC_VALID),
+        "jac_errors": details.get('jac_errors', []),
+        "jac_warnings": details.get('jac_warnings', []),
+        "code": code
+    }
+    if 'functional_timing' in details:
+        result["functional_timing"] = details['functional_timing']
+    return result
+
+
+def aggregate_view(row: Dict[str, Any], suite: TestSuite) -> Dict[str, Any]:
+    """The fields EvaluatorService aggregates over, read straight from a compact row"""
+    test_case = suite.get(row['test_id'])
+    return {
+        "test_id": row['test_id'],
+        "category": row['test_category'],
+        "level": test_case["level"] if test_case else int(row['test_level']),
+        "score": row['score'],
+        "max_score": row['max_score'],
+        "score_breakdown": {key: row[f'penalty_{key}'] for key in PENALTY_KEYS}
+    }
+
+
+def evaluation_record(eval_result: Dict[str, Any], suite: TestSuite) -> Dict[str, Any]:
+    """
+    Split an evaluate_responses() result into the BenchmarkResultService.update_evaluation
+    fields: a small summary JSON (no per-test data) and compact per-test rows.
+    """
+    rows = []
+    category_breakdown = {}
+    for category, scores in eval_result["evaluation_results"].items():
+        category_breakdown[category] = {k: v for k, v in scores.items() if k != "tests"}
+        rows.extend(encode_result(r, suite.get(r["test_id"])) for r in scores.get("tests", []))
+    return {
+        'evaluation_results': {
+            'category_breakdown': category_breakdown,
+            'level_breakdown': eval_result.get("level_breakdown", {}),
+            'tests_completed': eval_result.get("tests_completed", len(rows))
+        },
+        'total_score': eval_result["total_score"],
+        'max_score': eval_result["max_score"],
+        'percentage': eval_result["percentage"],
+        'test_rows': rows
+    }
+
+
+def category_breakdown_with_tests(evaluation_results: Dict[str, Any], rows: List[Dict[str, Any]],
+                                  responses: Dict[str, str], suite: TestSuite) -> Dict[str, Any]:
+    """
+    Serve the stored summary in the API shape, with each category's 'tests'
+    rebuilt from compact rows. Legacy summaries that embed tests are returned as is.
+    """
+    breakdown = evaluation_results.get('category_breakdown', {})
+    if not rows:
+        return breakdown
+
+    order = suite.order
+    rows = sorted(rows, key=lambda r: order.get(r['test_id'], len(order)))
+    tests_by_category: Dict[str, List[Dict]] = {}
+    for row in rows:
+        raw = (responses or {}).get(row['test_id'])
+        code = patch_missing_braces(raw)[0] if raw is not None else None
+        tests_by_category.setdefault(row['test_category'], []).append(
+            decode_row(row, suite.get(row['test_id']), code)
+        )
+    return {
+        category: {**scores, 'tests': tests_by_category.get(category, [])}
+        for category, scores in breakdown.items()
+    }
+
+
+def tests_completed(evaluation_results: Dict[str, Any]) -> int:
+    """Number of graded tests recorded in a stored summary (compact or legacy)"""
+    if 'tests_completed' in evaluation_results:
+        return evaluation_results['tests_completed']
+    return sum(len(c.get('tests', [])) for c in evaluation_results.get('category_breakdown', {}).values())
@@ -1,13 +1,49 @@
 """Code evaluation service for Jac benchmarks"""
 
+import hashlib
 import json
+import math
 import os
 import subprocess
 import tempfile
-from pathlib import Path
-from typing import Dict, List, Any, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Any, Optional, Tuple
 
-from ..utils.syntax import SyntaxChecker, patch_missing_braces
+from ..utils.syntax import ElementMatcherPlan, lint, patch_missing_braces
+from ..utils.ast_matcher import AST_MATCHER_VERSION, AstMatcherPlan, ElementIndex
+from ..utils.jac_checker import CHECK_TIMEOUT_MESSAGE, get_jac_checker_pool, jac_check_batch, classify_output
+from ..utils.functional_runner import TIMEOUT_MESSAGE as FUNCTIONAL_TIMEOUT_MESSAGE, get_functional_runner
+from .evaluation_store import aggregate_view, encode_result
+from .scoring import DEFAULT_WEIGHTS
+from .test_suite import get_test_suite
+from database import EvaluationCacheService
+
+# Bump whenever checks or scoring change so cached evaluations are not reused
+EVALUATOR_VERSION = "5"
+
+# Time limit of a single `jac check` run
+JAC_CHECK_TIMEOUT = 10
+
+
+def _remaining(deadline: Optional[float], limit: Optional[float] = None) -> Optional[float]:
+    """Seconds left until a time.monotonic() deadline, capped at limit"""
+    if deadline is None:
+        return limit
+    left = max(0.0, deadline - time.monotonic())
+    return left if limit is None else min(limit, left)
+
+
+def _fell_back(result: Dict) -> bool:
+    """Whether AST mode graded the result's elements with the regex matchers for want of a checker worker"""
+    return result.get("element_matcher") == "regex"
+
+
+def _hit_timeout(result: Dict) -> bool:
+    """Whether a check in the result was cut short by a time limit"""
+    return CHECK_TIMEOUT_MESSAGE in result.get("jac_errors", ()) or any(
+        FUNCTIONAL_TIMEOUT_MESSAGE in check for check in result.get("failed_checks", ())
+    )
 
 
 class EvaluatorService:
@@ -15,19 +51,45 @@ class EvaluatorService:
 
     def __init__(self, tests_file: str = "tests.json"):
         """Initialize evaluator with test cases"""
-        self.tests = self._load_test_cases(tests_file)
-
-    def _load_test_cases(self, tests_file: str) -> List[Dict]:
-        """Load test cases from JSON file"""
-        tests_path = Path(tests_file)
-        with open(tests_path, 'r') as f:
-            return json.load(f)
-
-    def jac_check(self, code: str) -> Tuple[bool, List[str], List[str]]:
+        self.suite = get_test_suite(tests_file)
+        self.tests = self.suite.tests
+        self.use_cache = os.getenv('EVAL_CACHE_ENABLED', 'true').lower() == 'true'
+        # 'ast' answers elements from one jaclang parse per response; verdicts differ from 'regex'
+        self.element_matcher = os.getenv('ELEMENT_MATCHER', 'regex').lower()
+        self.version = (
+            EVALUATOR_VERSION if self.element_matcher != 'ast' else f"{EVALUATOR_VERSION}-ast{AST_MATCHER_VERSION}"
+        )
+
+    def evaluation_stamp(self, eval_result: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """
+        What stored evaluations are graded with, for staleness checks. An
+        eval_result with tests that AST mode graded by regex is stamped with
+        the regex version, so it is re-graded once workers are available.
+        """
+        version = self.version
+        if eval_result is not None and any(
+            _fell_back(test)
+            for scores in eval_result.get("evaluation_results", {}).values()
+            for test in scores.get("tests", ())
+        ):
+            version = EVALUATOR_VERSION
+        return {"evaluator_version": version, "test_suite_hash": self.suite.digest}
+
+    def jac_check(self, code: str, deadline: Optional[float] = None) -> Tuple[bool, List[str], List[str]]:
         """
         Run jac check on code and return (is_valid, errors, warnings).
-        Uses jaclang's syntax checker for validation.
+        Uses the persistent jaclang worker pool when available and falls back
+        to a `jac check` subprocess otherwise. Either is killed at the deadline.
         """
+        pool = get_jac_checker_pool()
+        if pool is not None:
+            result = pool.check(code, timeout=_remaining(deadline))
+            if result is not None:
+                return result
+        return self._jac_check_subprocess(code, timeout=_remaining(deadline, JAC_CHECK_TIMEOUT))
+
+    def _jac_check_subprocess(self, code: str, timeout: float = JAC_CHECK_TIMEOUT) -> Tuple[bool, List[str], List[str]]:
+        """Run `jac check` in a fresh process and parse its output"""
         errors = []
         warnings = []
 
@@ -42,22 +104,14 @@ class EvaluatorService:
                 ['jac', 'check', temp_path],
                 capture_output=True,
                 text=True,
-                timeout=10
+                timeout=timeout
             )
 
-            output = result.stdout + result.stderr
-
-            for line in output.split('\n'):
-                line = line.strip()
-                if line.startswith('Error:') or ('error' in line.lower() and ':' in line):
-                    errors.append(line)
-                elif line.startswith('Warning:'):
-                    warnings.append(line)
-
+            errors, warnings = classify_output(result.stdout + result.stderr)
             is_valid = result.returncode == 0
 
         except subprocess.TimeoutExpired:
-            errors.append("Syntax check timed out")
+            errors.append(CHECK_TIMEOUT_MESSAGE)
             is_valid = False
         except FileNotFoundError:
             # jac not installed, skip validation
@@ -73,42 +127,102 @@ class EvaluatorService:
 
         return is_valid, errors, warnings
 
+    def _match_elements(self, code: str, test_case: Dict, use_jac_check: bool,
+                        jac_result: Optional[Tuple[bool, List[str], List[str]]],
+                        deadline: Optional[float] = None):
+        """
+        Match a test's elements, returning (plan, required hits, forbidden hits,
+        jac_result, fell_back). With the AST matcher the response is parsed once
+        in a checker worker, and that parse's check result is reused as
+        jac_result. Unparsable code is matched with the regex plan; so is code
+        no worker could parse, which sets fell_back.
+        """
+        if self.element_matcher == 'ast' and jac_result is None:
+            pool = get_jac_checker_pool()
+            analysis = pool.analyze(code, timeout=_remaining(deadline)) if pool is not None else None
+            if analysis is not None:
+                check_result, tokens = analysis
+                if use_jac_check:
+                    jac_result = check_result
+                if tokens is not None:
+                    plan = AstMatcherPlan.for_test(test_case)
+                    return (plan, *plan.match(code, ElementIndex(tokens)), jac_result, False)
+                plan = ElementMatcherPlan.for_test(test_case)
+                return (plan, *plan.match(code), jac_result, False)
+
+        plan = ElementMatcherPlan.for_test(test_case)
+        return (plan, *plan.match(code), jac_result, self.element_matcher == 'ast')
+
     def run_functional_test(self, code: str, harness: str) -> Tuple[bool, str]:
         """
         Run functional tests using jac test.
-        Combines generated code with harness code in a temporary file.
+        Combines generated code with harness code and runs it in the sandboxed runner.
         """
-        with tempfile.NamedTemporaryFile(
-            mode='w', suffix='.jac', delete=False
-        ) as f:
-            f.write(code + "\n\n" + harness)
-            temp_path = f.name
-
+        result = get_functional_runner().run(code, harness)
+        return result.passed, result.output
+
+    @staticmethod
+    def normalize_code(code: str) -> str:
+        """Normalize line endings and trailing whitespace, which no check depends on"""
+        lines = code.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        return '\n'.join(line.rstrip() for line in lines).rstrip('\n')
+
+    def cache_key(self, code: str, test_case: Dict, use_jac_check: bool = True) -> str:
+        """Content address of an evaluation: normalized code, test definition and evaluator version"""
+        payload = json.dumps({
+            'version': self.version,
+            'code': self.normalize_code(code),
+            'test': test_case,
+            'jac_check': use_jac_check
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _cache_get(self, keys: List[str]) -> Dict[str, Dict]:
         try:
-            # Use absolute path to jac binary in venv if available, otherwise assume in PATH
-            jac_cmd = os.path.abspath("venv/bin/jac")
-            if not os.path.exists(jac_cmd):
-                jac_cmd = "jac"
-
-            result = subprocess.run(
-                [jac_cmd, "test", temp_path],
-                capture_output=True,
-                text=True,
-                timeout=30
+            return EvaluationCacheService.get_many(keys)
+        except Exception as e:
+            print(f"Warning: Evaluation cache lookup failed: {e}")
+            return {}
+
+    def _cache_put(self, results: Dict[str, Dict]):
+        # A timeout may be a transient slowdown, so it must not stick to the code for good;
+        # nor may a regex verdict be cached under the AST matcher's version
+        results = {k: r for k, r in results.items() if not (_hit_timeout(r) or _fell_back(r))}
+        if not results:
+            return
+        try:
+            EvaluationCacheService.put_many(
+                {k: {f: v for f, v in r.items() if f != "code"} for k, r in results.items()},
+                self.version
             )
-            return result.returncode == 0, result.stdout + result.stderr
-
-        except subprocess.TimeoutExpired:
-            return False, "Functional test timed out"
         except Exception as e:
-            return False, f"Functional test failed to run: {str(e)}"
-        finally:
-            try:
-                os.unlink(temp_path)
-            except:
-                pass
+            print(f"Warning: Evaluation cache store failed: {e}")
+
+    def evaluate_code(self, code: str, test_case: Dict, use_jac_check: bool = True,
+                      use_cache: bool = True,
+                      jac_result: Optional[Tuple[bool, List[str], List[str]]] = None,
+                      deadline: Optional[float] = None) -> Dict:
+        """
+        Evaluate code against a test, reusing a cached result for identical code.
+        A precomputed jac_result (from a batched check) skips the per-test jac check.
+        jac check and functional test processes still running at the
+        time.monotonic() deadline are killed and count as timed out.
+        """
+        if not (use_cache and self.use_cache):
+            return self._evaluate_code_uncached(code, test_case, use_jac_check, jac_result, deadline)
 
-    def evaluate_code(self, code: str, test_case: Dict, use_jac_check: bool = True) -> Dict:
+        key = self.cache_key(code, test_case, use_jac_check)
+        cached = self._cache_get([key]).get(key)
+        if cached is not None:
+            return {**cached, "code": code}
+
+        result = self._evaluate_code_uncached(code, test_case, use_jac_check, jac_result, deadline)
+        self._cache_put({key: result})
+        return result
+
+    def _evaluate_code_uncached(self, code: str, test_case: Dict, use_jac_check: bool = True,
+                                jac_result: Optional[Tuple[bool, List[str], List[str]]] = None,
+                                deadline: Optional[float] = None) -> Dict:
         """Evaluate generated code against test requirements with strict validation"""
         score = 0
         max_score = test_case["points"]
@@ -124,10 +238,14 @@ class EvaluatorService:
         }
         
         syntax_errors = 0
+        functional_timing = None
+
+        plan, required_hits, forbidden_hits, jac_result, fell_back = self._match_elements(
+            code, test_case, use_jac_check, jac_result, deadline
+        )
 
         required_found = 0
-        for element in test_case["required_elements"]:
-            found = SyntaxChecker.validate_element_strict(code, element)
+        for element, found in zip(plan.required, required_hits):
             if found:
                 required_found += 1
                 passed_checks.append(f"[PASS] Found required element: '{element}'")
@@ -135,8 +253,8 @@ class EvaluatorService:
                 failed_checks.append(f"[FAIL] Missing required element: '{element}'")
 
         forbidden_found = 0
-        for element in test_case.get("forbidden_elements", []):
-            if element in code:
+        for element, found in zip(plan.forbidden, forbidden_hits):
+            if found:
                 forbidden_found += 1
                 failed_checks.append(f"[FAIL] Contains forbidden element: '{element}'")
             else:
@@ -152,7 +270,7 @@ class EvaluatorService:
             required_score = max_score
 
         if total_forbidden > 0:
-            forbidden_penalty = (forbidden_found / total_forbidden) * (max_score * 0.3)
+            forbidden_penalty = (forbidden_found / total_forbidden) * (max_score * DEFAULT_WEIGHTS.forbidden)
             penalties["forbidden"] = forbidden_penalty
         else:
             forbidden_penalty = 0
@@ -160,16 +278,17 @@ class EvaluatorService:
         score = max(0, required_score - forbidden_penalty)
 
         # Legacy syntax checks
-        syntax_checks = SyntaxChecker.check_syntax(code)
+        diagnostics = lint(code)
+        syntax_checks = [d.message for d in diagnostics]
         
         # jac check validation (15% penalty for invalid syntax)
         jac_valid = True
         jac_errors = []
         jac_warnings = []
         if use_jac_check:
-            jac_valid, jac_errors, jac_warnings = self.jac_check(code)
+            jac_valid, jac_errors, jac_warnings = jac_result if jac_result is not None else self.jac_check(code, deadline)
             if not jac_valid:
-                jac_penalty = max_score * 0.15
+                jac_penalty = max_score * DEFAULT_WEIGHTS.jac_check
                 penalties["jac_check"] = jac_penalty
                 score = max(0, score - jac_penalty)
                 failed_checks.append(f"[FAIL] jac check failed: {len(jac_errors)} errors")
@@ -178,7 +297,8 @@ class EvaluatorService:
         else:
             # Only apply heuristic syntax penalty if jac check is not used
             syntax_errors = len([c for c in syntax_checks if c.startswith('[WARN]')])
-            syntax_penalty = min(syntax_errors * 0.10 * max_score, max_score * 0.50)
+            syntax_penalty = min(syntax_errors * DEFAULT_WEIGHTS.syntax_per_warning * max_score,
+                                 max_score * DEFAULT_WEIGHTS.syntax_cap)
             penalties["syntax"] = syntax_penalty
             score = max(0, score - syntax_penalty)
 
@@ -187,7 +307,12 @@ class EvaluatorService:
             harness = test_case.get("test_harness", "")
             # Only run functional tests if basic compilation passed (or wasn't checked)
             if jac_valid:
-                func_passed, func_output = self.run_functional_test(code, harness)
+                func_result = get_functional_runner().run(code, harness, timeout=_remaining(deadline))
+                func_passed, func_output = func_result.passed, func_result.output
+                functional_timing = {
+                    "wall_time": round(func_result.wall_time, 3),
+                    "cpu_time": round(func_result.cpu_time, 3)
+                }
                 if func_passed:
                     passed_checks.append("[PASS] Functional tests passed")
                 else:
@@ -213,7 +338,7 @@ class EvaluatorService:
                 score = 0
                 failed_checks.append("[FAIL] Functional tests skipped due to compilation error")
 
-        return {
+        result = {
             "test_id": test_case["id"],
             "category": test_case["category"],
             "level": test_case["level"],
@@ -226,145 +351,169 @@ class EvaluatorService:
             "passed_checks": passed_checks,
             "failed_checks": failed_checks,
             "syntax_feedback": syntax_checks,
+            "syntax_codes": [[d.code, d.line, list(d.args)] for d in diagnostics],
             "syntax_errors": syntax_errors,
             "jac_valid": jac_valid,
             "jac_errors": jac_errors,
             "jac_warnings": jac_warnings,
             "code": code
         }
+        if functional_timing is not None:
+            result["functional_timing"] = functional_timing
+        if fell_back:
+            result["element_matcher"] = "regex"
+        return result
+
+    def _timeout_result(self, code: str, test_case: Dict, timeout: float) -> Dict:
+        """Result for a test whose evaluation exceeded the per-test timeout"""
+        max_score = test_case["points"]
+        return {
+            "test_id": test_case["id"],
+            "category": test_case["category"],
+            "level": test_case["level"],
+            "score": 0,
+            "max_score": max_score,
+            "score_breakdown": {
+                "required": max_score,
+                "forbidden": 0.0,
+                "syntax": 0.0,
+                "jac_check": 0.0,
+                "functional": 0.0
+            },
+            "percentage": 0,
+            "required_found": f"0/{len(test_case['required_elements'])}",
+            "forbidden_found": 0,
+            "passed_checks": [],
+            "failed_checks": [f"[FAIL] Evaluation timed out after {timeout:g}s"],
+            "syntax_feedback": [],
+            "syntax_codes": [],
+            "syntax_errors": 0,
+            "jac_valid": False,
+            "jac_errors": [],
+            "jac_warnings": [],
+            "code": code
+        }
 
-    def run_benchmark(self, responses_file: str) -> Dict:
-        """Run benchmark on LLM responses from file"""
-        try:
-            with open(responses_file, 'r') as f:
-                data = json.load(f)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in '{responses_file}' at line {e.lineno}: {e.msg}")
-        except FileNotFoundError:
-            raise FileNotFoundError(f"File not found: '{responses_file}'")
+    def _evaluate_tests(
+        self,
+        responses: Dict[str, str],
+        max_workers: Optional[int] = None,
+        test_timeout: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Evaluate every test that has a response, in tests.json order.
+        Tests are graded concurrently on a bounded thread pool (the heavy work
+        runs in jac subprocesses/workers); max_workers=1 keeps the serial path.
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv('EVAL_WORKERS', str(os.cpu_count() or 1)))
+        if test_timeout is None:
+            test_timeout = float(os.getenv('EVAL_TEST_TIMEOUT', '120'))
 
-        if "metadata" in data and "responses" in data:
-            metadata = data["metadata"]
-            responses = data["responses"]
+        pending = []
+        for test_case in self.tests:
+            if test_case["id"] in responses:
+                patched_code, _ = patch_missing_braces(responses[test_case["id"]])
+                pending.append((patched_code, test_case))
+
+        keys = [self.cache_key(code, test_case) for code, test_case in pending] if self.use_cache else []
+        cached = self._cache_get(keys) if keys else {}
+        results: List[Optional[Dict]] = [
+            {**cached[keys[i]], "code": code} if keys and keys[i] in cached else None
+            for i, (code, _) in enumerate(pending)
+        ]
+        misses = [i for i, r in enumerate(results) if r is None]
+        fresh = {}
+
+        # Without in-process workers, check all misses with batched `jac check` calls.
+        # The AST matcher needs a worker's parse anyway, so it never takes the batch
+        jac_results = {}
+        if self.element_matcher != 'ast' and len(misses) > 1:
+            pool = get_jac_checker_pool()
+            if pool is None or not pool.is_usable():
+                jac_results = dict(zip(misses, jac_check_batch(
+                    [pending[i][0] for i in misses], per_file_timeout=min(JAC_CHECK_TIMEOUT, test_timeout)
+                )))
+
+        if max_workers <= 1 or len(misses) <= 1:
+            for i in misses:
+                code, test_case = pending[i]
+                results[i] = self.evaluate_code(code, test_case, use_cache=False,
+                                                jac_result=jac_results.get(i),
+                                                deadline=time.monotonic() + test_timeout)
+                if keys:
+                    fresh[keys[i]] = results[i]
         else:
-            responses = data
-            metadata = {}
-
-        results = []
+            workers = min(max_workers, len(misses))
+            # One deadline for the whole set: each test gets test_timeout of a
+            # worker's time, and whatever still runs at the deadline is killed
+            deadline = time.monotonic() + test_timeout * math.ceil(len(misses) / workers)
+            executor = ThreadPoolExecutor(max_workers=workers)
+            try:
+                futures = {
+                    executor.submit(self.evaluate_code, *pending[i], use_cache=False,
+                                    jac_result=jac_results.get(i), deadline=deadline): i
+                    for i in misses
+                }
+                done, not_done = wait(futures, timeout=_remaining(deadline))
+                for future in done:
+                    i = futures[future]
+                    results[i] = future.result()
+                    if keys:
+                        fresh[keys[i]] = results[i]
+                for future in not_done:
+                    i = futures[future]
+                    future.cancel()
+                    results[i] = self._timeout_result(*pending[i], test_timeout)
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        if fresh:
+            self._cache_put(fresh)
+        return results
+
+    def _aggregate(self, results: List[Dict]) -> Dict[str, Any]:
+        """Roll per-test results up into category and level breakdowns"""
         category_scores = {}
         level_scores = {}
 
-        for test_case in self.tests:
-            test_id = test_case["id"]
-            if test_id in responses:
-                code = responses[test_id]
-                patched_code, _ = patch_missing_braces(code)
-                result = self.evaluate_code(patched_code, test_case)
-                results.append(result)
-
-                category = test_case["category"]
-                if category not in category_scores:
-                    category_scores[category] = {
-                        "score": 0, "max": 0, "count": 0,
-                        "penalties": {"required": 0, "forbidden": 0, "syntax": 0, "jac_check": 0, "functional": 0}
-                    }
-                category_scores[category]["score"] += result["score"]
-                category_scores[category]["max"] += result["max_score"]
-                category_scores[category]["count"] += 1
-                
-                breakdown = result.get("score_breakdown", {})
-                for k, v in breakdown.items():
-                    category_scores[category]["penalties"][k] += v
-
-                level = test_case["level"]
-                if level not in level_scores:
-                    level_scores[level] = {"score": 0, "max": 0, "count": 0}
-                level_scores[level]["score"] += result["score"]
-                level_scores[level]["max"] += result["max_score"]
-                level_scores[level]["count"] += 1
-
-        total_score = sum(r["score"] for r in results)
-        total_max = sum(r["max_score"] for r in results)
-        overall_percentage = (total_score / total_max * 100) if total_max > 0 else 0
-
-        return {
-            "results": results,
-            "summary": {
-                "total_score": round(total_score, 2),
-                "total_max": total_max,
-                "overall_percentage": round(overall_percentage, 2),
-                "tests_completed": len(results),
-                "tests_total": len(self.tests),
-                "category_breakdown": {
-                    cat: {
-                        "score": round(scores["score"], 2),
-                        "max": scores["max"],
-                        "percentage": round((scores["score"] / scores["max"] * 100) if scores["max"] > 0 else 0, 2),
-                        "count": scores["count"],
-                        "penalties": {k: round(v, 2) for k, v in scores["penalties"].items()}
-                    }
-                    for cat, scores in category_scores.items()
-                },
-                "level_breakdown": {
-                    f"Level {level}": {
-                        "score": round(scores["score"], 2),
-                        "max": scores["max"],
-                        "percentage": round((scores["score"] / scores["max"] * 100) if scores["max"] > 0 else 0, 2),
-                        "count": scores["count"]
-                    }
-                    for level, scores in sorted(level_scores.items())
+        for result in results:
+            category = result["category"]
+            if category not in category_scores:
+                category_scores[category] = {
+                    "score": 0, "max": 0, "count": 0,
+                    "penalties": {"required": 0, "forbidden": 0, "syntax": 0, "jac_check": 0, "functional": 0}
                 }
-            }
-        }
+            category_scores[category]["score"] += result["score"]
+            category_scores[category]["max"] += result["max_score"]
+            category_scores[category]["count"] += 1
 
-    def evaluate_responses(self, responses: Dict[str, str]) -> Dict[str, Any]:
-        """Evaluate a dictionary of test responses (for API use)"""
-        results = []
-        category_scores = {}
-        level_scores = {}
+            breakdown = result.get("score_breakdown", {})
+            for k, v in breakdown.items():
+                category_scores[category]["penalties"][k] += v
 
-        for test_case in self.tests:
-            test_id = test_case["id"]
-            if test_id in responses:
-                code = responses[test_id]
-                patched_code, _ = patch_missing_braces(code)
-                result = self.evaluate_code(patched_code, test_case)
-                results.append(result)
-
-                category = test_case["category"]
-                if category not in category_scores:
-                    category_scores[category] = {
-                        "score": 0, "max": 0, "count": 0,
-                        "penalties": {"required": 0, "forbidden": 0, "syntax": 0, "jac_check": 0, "functional": 0}
-                    }
-                category_scores[category]["score"] += result["score"]
-                category_scores[category]["max"] += result["max_score"]
-                category_scores[category]["count"] += 1
-                
-                breakdown = result.get("score_breakdown", {})
-                for k, v in breakdown.items():
-                    category_scores[category]["penalties"][k] += v
-
-                level = test_case["level"]
-                if level not in level_scores:
-                    level_scores[level] = {"score": 0, "max": 0, "count": 0}
-                level_scores[level]["score"] += result["score"]
-                level_scores[level]["max"] += result["max_score"]
-                level_scores[level]["count"] += 1
+            level = result["level"]
+            if level not in level_scores:
+                level_scores[level] = {"score": 0, "max": 0, "count": 0}
+            level_scores[level]["score"] += result["score"]
+            level_scores[level]["max"] += result["max_score"]
+            level_scores[level]["count"] += 1
 
         total_score = sum(r["score"] for r in results)
         total_max = sum(r["max_score"] for r in results)
         overall_percentage = (total_score / total_max * 100) if total_max > 0 else 0
 
         return {
-            "evaluation_results": {
+            "total_score": round(total_score, 2),
+            "total_max": total_max,
+            "overall_percentage": round(overall_percentage, 2),
+            "category_breakdown": {
                 cat: {
                     "score": round(scores["score"], 2),
                     "max": scores["max"],
                     "percentage": round((scores["score"] / scores["max"] * 100) if scores["max"] > 0 else 0, 2),
                     "count": scores["count"],
-                    "penalties": {k: round(v, 2) for k, v in scores["penalties"].items()},
-                    "tests": [r for r in results if r["category"] == cat]
+                    "penalties": {k: round(v, 2) for k, v in scores["penalties"].items()}
                 }
                 for cat, scores in category_scores.items()
             },
@@ -376,37 +525,132 @@ class EvaluatorService:
                     "count": scores["count"]
                 }
                 for level, scores in sorted(level_scores.items())
-            },
-            "total_score": round(total_score, 2),
-            "max_score": total_max,
-            "percentage": round(overall_percentage, 2),
-            "tests_completed": len(results)
+            }
         }
 
-    def get_test_stats(self) -> Dict[str, Any]:
-        """Get statistics about test cases"""
-        level_stats = {}
-        category_stats = {}
+    def run_benchmark(self, responses_file: str, max_workers: Optional[int] = None) -> Dict:
+        """Run benchmark on LLM responses from file"""
+        try:
+            with open(responses_file, 'r') as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in '{responses_file}' at line {e.lineno}: {e.msg}")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: '{responses_file}'")
 
-        for test in self.tests:
-            level = test['level']
-            category = test['category']
+        responses = data["responses"] if "metadata" in data and "responses" in data else data
 
-            if level not in level_stats:
-                level_stats[level] = {'count': 0, 'points': 0}
-            level_stats[level]['count'] += 1
-            level_stats[level]['points'] += test['points']
+        results = self._evaluate_tests(responses, max_workers=max_workers)
+        summary = self._aggregate(results)
 
-            if category not in category_stats:
-                category_stats[category] = {'count': 0, 'points': 0}
-            category_stats[category]['count'] += 1
-            category_stats[category]['points'] += test['points']
+        return {
+            "results": results,
+            "summary": {
+                "total_score": summary["total_score"],
+                "total_max": summary["total_max"],
+                "overall_percentage": summary["overall_percentage"],
+                "tests_completed": len(results),
+                "tests_total": len(self.tests),
+                "category_breakdown": summary["category_breakdown"],
+                "level_breakdown": summary["level_breakdown"]
+            }
+        }
 
-        total_points = sum(t['points'] for t in self.tests)
+    def evaluate_responses(self, responses: Dict[str, str], max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Evaluate a dictionary of test responses (for API use)"""
+        return self._build_response(self._evaluate_tests(responses, max_workers=max_workers))
 
+    def evaluate_batch(self, responses: Dict[str, str], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Grade one batch of responses as soon as it is generated. Batches are
+        combined with merge_batches once the run completes.
+        """
+        return self._evaluate_tests(responses, max_workers=max_workers)
+
+    def partial_summary(self, results: List[Dict]) -> Dict[str, Any]:
+        """Running totals over the tests graded so far, for progress updates"""
+        summary = self._aggregate(results)
         return {
-            'total_tests': len(self.tests),
-            'total_points': total_points,
-            'levels': level_stats,
-            'categories': category_stats
+            "total_score": summary["total_score"],
+            "max_score": summary["total_max"],
+            "percentage": summary["overall_percentage"],
+            "tests_graded": len(results)
         }
+
+    def merge_batches(self, batches: List[List[Dict]],
+                      responses: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Merge already-graded batches into the evaluate_responses result shape.
+        Later batches win for a repeated test id, matching how responses merge.
+        Given the run's final responses, only grades of those exact answers
+        are kept (streamed answers may come from attempts that later failed),
+        and any response without one is graded now.
+        """
+        by_id = {}
+        for batch in batches:
+            for result in batch:
+                by_id[result["test_id"]] = result
+        if responses is not None:
+            by_id = {
+                test_id: result for test_id, result in by_id.items()
+                if test_id in responses and result["code"] == patch_missing_braces(responses[test_id])[0]
+            }
+            ungraded = {test_id: code for test_id, code in responses.items() if test_id not in by_id}
+            if ungraded:
+                by_id.update((r["test_id"], r) for r in self._evaluate_tests(ungraded))
+        results = sorted(by_id.values(), key=lambda r: self.suite.order[r["test_id"]])
+        return self._build_response(results)
+
+    def reevaluate_tests(self, rows: List[Dict[str, Any]], responses: Dict[str, str],
+                         max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Grade only `responses` and splice them into a stored evaluation given
+        as its compact rows. Aggregates are rebuilt from the row columns, so
+        untouched tests are never re-graded. Returns the splice_evaluation
+        fields but the suite hash, where test_rows holds just the re-graded
+        tests and evaluator_version drops to regex if any of them fell back.
+        """
+        results = self._evaluate_tests(responses, max_workers=max_workers)
+        new_rows = [encode_result(result, self.suite.get(result["test_id"])) for result in results]
+        merged = {row['test_id']: row for row in rows}
+        merged.update((row['test_id'], row) for row in new_rows)
+        order = self.suite.order
+        views = [
+            aggregate_view(row, self.suite)
+            for row in sorted(merged.values(), key=lambda row: order.get(row['test_id'], len(order)))
+        ]
+        summary = self._aggregate(views)
+        return {
+            'evaluation_results': {
+                'category_breakdown': summary["category_breakdown"],
+                'level_breakdown': summary["level_breakdown"],
+                'tests_completed': len(views)
+            },
+            'total_score': summary["total_score"],
+            'max_score': summary["total_max"],
+            'percentage': summary["overall_percentage"],
+            'test_rows': new_rows,
+            'evaluator_version': EVALUATOR_VERSION if any(map(_fell_back, results)) else self.version
+        }
+
+    def _build_response(self, results: List[Dict]) -> Dict[str, Any]:
+        summary = self._aggregate(results)
+
+        return {
+            "evaluation_results": {
+                cat: {
+                    **scores,
+                    "tests": [r for r in results if r["category"] == cat]
+                }
+                for cat, scores in summary["category_breakdown"].items()
+            },
+            "level_breakdown": summary["level_breakdown"],
+            "total_score": summary["total_score"],
+            "max_score": summary["total_max"],
+            "percentage": summary["overall_percentage"],
+            "tests_completed": len(results)
+        }
+
+    def get_test_stats(self) -> Dict[str, Any]:
+        """Get statistics about test cases (precomputed by the shared test suite)"""
+        return self.suite.stats
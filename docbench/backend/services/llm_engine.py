@@ -0,0 +1,442 @@
+"""Shared asyncio engine for OpenRouter chat completions across all benchmark runs"""
+
+import asyncio
+import atexit
+import email.utils
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import openai
+
+from ..utils.http_client import create_async_http_client
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+class TokenBucket:
+    """
+    Per-model request rate limiter. A Retry-After from the API pauses the
+    bucket, so every run sharing the model backs off together instead of
+    each retrying into the same 429.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def take(self) -> float:
+        """Spend a token if one is available and return 0, else the seconds until one is"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds to wait from a rate-limit error's Retry-After (or retry-after-ms) header"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, openai.RateLimitError) or getattr(error, 'status_code', None) == 429
+
+
+class FairScheduler:
+    """
+    Grants the engine's concurrency slots. Waiters are served by priority
+    (higher first), then round-robin across models by start-time fair
+    queuing, so a model with a deep queue cannot starve the others. A slot
+    is granted only together with a token from the request's model bucket,
+    so queued requests spend no rate until they run; a waiter whose model is
+    out of tokens is passed over for the next one that can go.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.in_use = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._model_turns: Dict[str, int] = {}
+        self._clock = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, model_id: str, priority: int = 0, bucket: Optional[TokenBucket] = None):
+        if self.in_use < self.slots and not self._waiters and (bucket is None or bucket.take() == 0):
+            self.in_use += 1
+            return
+        turn = max(self._model_turns.get(model_id, 0), self._clock)
+        self._model_turns[model_id] = turn + 1
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, turn, next(self._sequence), model_id, bucket, waiter))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.in_use -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to waiters in order, skipping models that are out of tokens"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        waiting = []
+        limited: Dict[str, float] = {}
+        for entry in sorted(self._waiters):
+            _, turn, _, model_id, bucket, waiter = entry
+            if waiter.done():
+                continue
+            if self.in_use >= self.slots or model_id in limited:
+                waiting.append(entry)
+                continue
+            wait = bucket.take() if bucket is not None else 0.0
+            if wait > 0:
+                limited[model_id] = wait
+                waiting.append(entry)
+                continue
+            self.in_use += 1
+            self._clock = max(self._clock, turn)
+            waiter.set_result(None)
+        # A sorted list is a valid heap
+        self._waiters = waiting
+        if waiting and limited and self.in_use < self.slots:
+            self._timer = asyncio.get_running_loop().call_later(min(limited.values()), self._dispatch)
+
+
+class RequestTrace:
+    """Where one logical request's time went, across all of its attempts"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.queue_seconds = 0.0        # waiting on the model's rate limit and a free slot
+        self.latency_seconds = 0.0      # request time of the final attempt
+        self.first_token_seconds = None  # streaming only
+        self.errors = []                # exception class of each failed attempt
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'attempts': self.attempts,
+            'queue_seconds': round(self.queue_seconds, 3),
+            'latency_seconds': round(self.latency_seconds, 3),
+            'first_token_seconds': round(self.first_token_seconds, 3) if self.first_token_seconds is not None else None,
+            'errors': self.errors
+        }
+
+
+class TokenUsage:
+    """
+    Token counts accumulated over completions, including prompt-cache hits.
+    A usage with a parent (e.g. one batch of a run) also counts into it.
+    """
+
+    def __init__(self, parent: Optional['TokenUsage'] = None):
+        self.parent = parent
+        self.traces = []
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.replayed = 0
+        self.streams = 0
+        self.first_token_seconds = 0.0
+        self.stream_seconds = 0.0
+        self.streamed_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_replay(self):
+        """Count a completion served from the record/replay cache (no tokens spent)"""
+        with self._lock:
+            self.replayed += 1
+        if self.parent is not None:
+            self.parent.add_replay()
+
+    def new_trace(self) -> RequestTrace:
+        trace = RequestTrace()
+        with self._lock:
+            self.traces.append(trace)
+        return trace
+
+    def add(self, response: Any):
+        if self.parent is not None:
+            self.parent.add(response)
+        timing = getattr(response, 'timing', None)
+        usage = getattr(response, 'usage', None)
+        if timing is not None:
+            with self._lock:
+                self.streams += 1
+                self.first_token_seconds += timing['first_token']
+                self.stream_seconds += timing['generation']
+                self.streamed_tokens += getattr(usage, 'completion_tokens', 0) or 0
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += getattr(usage, 'prompt_tokens', 0) or 0
+            self.cached_tokens += getattr(details, 'cached_tokens', 0) or 0
+            self.completion_tokens += getattr(usage, 'completion_tokens', 0) or 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'prompt_tokens': self.prompt_tokens,
+            'cached_tokens': self.cached_tokens,
+            'completion_tokens': self.completion_tokens,
+            'replayed': self.replayed,
+            'cache_hit_rate': round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+            'streams': self.streams,
+            'avg_time_to_first_token': round(self.first_token_seconds / self.streams, 3) if self.streams else None,
+            'tokens_per_second': round(self.streamed_tokens / self.stream_seconds, 1) if self.stream_seconds else None
+        }
+
+
+class LLMEngine:
+    """
+    One event loop thread and one AsyncOpenAI client shared by every run in
+    the process. Requests wait for a global concurrency slot, granted only
+    when their model's token bucket allows another request, so simultaneous
+    runs share a fixed number of sockets and each model's rate limit.
+    """
+
+    def __init__(self, max_concurrency: int = 16, model_rpm: float = 60, model_burst: int = 10):
+        self.max_concurrency = max(1, max_concurrency)
+        self.model_rpm = model_rpm
+        self.model_burst = model_burst
+        self.stats = {'requests': 0, 'rate_limited': 0, 'retries': 0, 'failed': 0, 'in_flight': 0}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._client = None
+        self._loop = asyncio.new_event_loop()
+        self._scheduler = FairScheduler(self.max_concurrency)
+        self._thread = threading.Thread(target=self._run_loop, name='llm-engine', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _get_client(self):
+        # Created on the loop thread so its connection pool belongs to this loop;
+        # one keep-alive connection per concurrency slot, so no request waits on a handshake
+        if self._client is None:
+            api_key = os.getenv('OPENROUTER_API_KEY')
+            if not api_key:
+                raise RuntimeError("OPENROUTER_API_KEY not found in environment")
+            http_client = create_async_http_client(self.max_concurrency)
+            self._client = openai.AsyncOpenAI(
+                base_url=OPENROUTER_BASE_URL,
+                api_key=api_key,
+                max_retries=0,
+                http_client=http_client,
+                timeout=http_client.timeout,
+                default_headers={
+                    "HTTP-Referer": "https://github.com/jaseci-llmdocs",
+                    "X-Title": "Jac LLM Benchmark"
+                }
+            )
+        return self._client
+
+    def _bucket(self, model_id: str) -> TokenBucket:
+        bucket = self._buckets.get(model_id)
+        if bucket is None:
+            bucket = self._buckets[model_id] = TokenBucket(self.model_rpm, self.model_burst)
+        return bucket
+
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the engine loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the engine loop and block for its result"""
+        return self.submit(coro).result(timeout)
+
+    async def complete(self, model_id: str, max_retries: int = 3, base_delay: float = 2.0,
+                       on_attempt: Optional[Callable[[int], None]] = None, priority: int = 0,
+                       trace: Optional[RequestTrace] = None, **params) -> Any:
+        """
+        Create a chat completion, retrying failures with exponential backoff
+        and jitter. A 429 waits for its Retry-After, pausing the model for all runs.
+        Higher priority requests take free concurrency slots first.
+        """
+        return await self._with_retries(
+            model_id,
+            lambda: self._get_client().chat.completions.create(model=model_id, **params),
+            max_retries, base_delay, on_attempt, priority, trace
+        )
+
+    async def _with_retries(self, model_id: str, request: Callable[[], Awaitable], max_retries: int,
+                            base_delay: float, on_attempt: Optional[Callable[[int], None]],
+                            priority: int = 0, trace: Optional[RequestTrace] = None) -> Any:
+        trace = trace or RequestTrace()
+        bucket = self._bucket(model_id)
+        for attempt in range(max_retries + 1):
+            if on_attempt:
+                on_attempt(attempt)
+            queued = time.monotonic()
+            await self._scheduler.acquire(model_id, priority, bucket)
+            started = time.monotonic()
+            trace.queue_seconds += started - queued
+            trace.attempts += 1
+            self.stats['requests'] += 1
+            self.stats['in_flight'] += 1
+            try:
+                response = await request()
+                timing = getattr(response, 'timing', None)
+                if timing is not None:
+                    trace.first_token_seconds = timing['first_token']
+                return response
+            except Exception as e:
+                error = e
+                trace.errors.append(type(e).__name__)
+            finally:
+                trace.latency_seconds = time.monotonic() - started
+                self.stats['in_flight'] -= 1
+                self._scheduler.release()
+
+            if attempt >= max_retries:
+                self.stats['failed'] += 1
+                raise error
+            self.stats['retries'] += 1
+            delay = base_delay * (2 ** attempt) * (0.5 + random.random())
+            if is_rate_limited(error):
+                self.stats['rate_limited'] += 1
+                wait = retry_after(error)
+                if wait is not None:
+                    delay = wait
+                bucket.pause(delay)
+            await asyncio.sleep(delay)
+
+    async def stream(self, model_id: str, on_delta: Callable[[str], None], max_retries: int = 3,
+                     base_delay: float = 2.0, on_attempt: Optional[Callable[[int], None]] = None,
+                     priority: int = 0, trace: Optional[RequestTrace] = None, **params) -> Any:
+        """
+        Stream a chat completion, passing each content delta to on_delta as it
+        arrives. Returns a response shaped like complete()'s (content,
+        finish_reason, usage) plus timing: time to first token and generation
+        time after it. A retried attempt streams from the start again.
+        """
+        async def attempt():
+            started = time.monotonic()
+            first_token = None
+            parts = []
+            finish_reason = None
+            usage = None
+            stream = await self._get_client().chat.completions.create(
+                model=model_id, stream=True, stream_options={'include_usage': True}, **params
+            )
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = getattr(choice.delta, 'content', None)
+                if delta:
+                    if first_token is None:
+                        first_token = time.monotonic()
+                    parts.append(delta)
+                    on_delta(delta)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+            finished = time.monotonic()
+            first_token = first_token or finished
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=''.join(parts)), finish_reason=finish_reason)],
+                usage=usage,
+                timing={'first_token': first_token - started, 'generation': finished - first_token}
+            )
+
+        return await self._with_retries(model_id, attempt, max_retries, base_delay, on_attempt, priority, trace)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'queued': self._scheduler.queued,
+            'max_concurrency': self.max_concurrency,
+            'model_rpm': self.model_rpm,
+            'models': len(self._buckets)
+        }
+
+    def shutdown(self):
+        if self._client is not None:
+            try:
+                self.run(self._client.close(), timeout=5)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_engine: Optional[LLMEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_llm_engine() -> LLMEngine:
+    """Return the process-wide engine, configured by LLM_MAX_CONCURRENCY, LLM_MODEL_RPM and LLM_MODEL_BURST"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = LLMEngine(
+                max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '16')),
+                model_rpm=float(os.getenv('LLM_MODEL_RPM', '60')),
+                model_burst=int(os.getenv('LLM_MODEL_BURST', '10'))
+            )
+            atexit.register(_engine.shutdown)
+        return _engine
+
+
+def _reset_after_fork():
+    # The engine's loop thread does not survive a fork
+    global _engine, _engine_lock
+    _engine = None
+    _engine_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,40 +1,59 @@
 """LLM service for running benchmarks via OpenRouter API"""
 
+import asyncio
+import hashlib
 import json
+import math
 import os
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Optional, Callable
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Callable, Tuple
 from datetime import datetime
 
-import openai
+from database import BenchmarkResultService, DocumentationService, LLMReplayService
+from ..utils.json_utils import IncrementalPairReader, extract_complete_pairs
+from .llm_engine import TokenUsage, get_llm_engine
+from .model_catalog import get_model_catalog
+from .telemetry import batch_telemetry, summarize_batches
+from .test_suite import get_test_suite
 
-from database import BenchmarkResultService, DocumentationService
+
+# Providers that only cache prompt prefixes marked with cache_control; others cache stable prefixes automatically
+CACHE_CONTROL_PROVIDERS = ('anthropic/', 'google/')
+
+# LLM_REPLAY_MODE values: never / always record, only replay, or replay with recording on a miss
+REPLAY_MODES = ('off', 'record', 'replay', 'replay-or-record')
+
+# Rough token estimates used to size batches before anything is sent
+CHARS_PER_TOKEN = 4
+OUTPUT_TOKENS_BASE = 60        # expected answer tokens for a level 0 test
+OUTPUT_TOKENS_PER_LEVEL = 40   # extra expected answer tokens per test level
+BATCH_TOKEN_HEADROOM = 0.75    # share of the completion/context budget a planned batch may use
+
+
+class BatchOutputError(Exception):
+    """A batch's output was truncated or is not valid JSON; a smaller batch may succeed"""
+
+    def __init__(self, message: str, content: str = ""):
+        super().__init__(message)
+        self.content = content
 
 
 class LLMService:
     """Service for running LLM benchmarks via OpenRouter"""
 
-    _models_cache: Optional[Dict[str, Dict]] = None
-
     def __init__(self, tests_file: str = "tests.json"):
-        self.tests = self._load_tests(tests_file)
-        api_key = os.getenv('OPENROUTER_API_KEY')
-        if not api_key:
+        self.tests = get_test_suite(tests_file).tests
+        self.replay_mode = os.getenv('LLM_REPLAY_MODE', 'off').lower()
+        if self.replay_mode not in REPLAY_MODES:
+            raise ValueError(f"LLM_REPLAY_MODE must be one of: {', '.join(REPLAY_MODES)}")
+        self.streaming = os.getenv('LLM_STREAMING', 'false').lower() == 'true'
+        # Pure replay never reaches the API, so it also runs offline
+        if self.replay_mode != 'replay' and not os.getenv('OPENROUTER_API_KEY'):
             raise RuntimeError("OPENROUTER_API_KEY not found in environment")
-
-        self.client = openai.OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-            default_headers={
-                "HTTP-Referer": "https://github.com/jaseci-llmdocs",
-                "X-Title": "Jac LLM Benchmark"
-            }
-        )
-
-    def _load_tests(self, tests_file: str) -> List[Dict]:
-        with open(tests_file, 'r') as f:
-            return json.load(f)
+        # Requests from every run share one event loop, client and rate limits
+        self.engine = get_llm_engine()
 
     def get_doc_content(self, variant: str) -> Optional[str]:
         """Fetch documentation content from URL via DocumentationService"""
@@ -43,31 +62,12 @@ class LLMService:
         return DocumentationService.get_variant(variant)
 
     def fetch_available_models(self) -> List[Dict]:
-        """Fetch available models from OpenRouter API"""
-        import requests
-
-        api_key = os.getenv('OPENROUTER_API_KEY')
-        if not api_key:
-            return []
-
-        headers = {'Authorization': f'Bearer {api_key}'}
-
-        try:
-            response = requests.get('https://openrouter.ai/api/v1/models', headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            models = data.get('data', [])
-            LLMService._models_cache = {m['id']: m for m in models}
-            return models
-        except Exception as e:
-            print(f"Warning: Failed to fetch models from OpenRouter: {e}")
-            return []
+        """Available OpenRouter models, from the shared model catalogue"""
+        return get_model_catalog().get_models()
 
     def _get_model_data(self, model_id: str) -> Optional[Dict]:
-        """Get model data from cache, fetching if needed"""
-        if LLMService._models_cache is None:
-            self.fetch_available_models()
-        return (LLMService._models_cache or {}).get(model_id)
+        """Get one model's catalogue entry"""
+        return get_model_catalog().get(model_id)
 
     def get_available_variants(self) -> List[str]:
         """Get list of available documentation variants"""
@@ -84,6 +84,53 @@ class LLMService:
                 return max_tokens
         return 8192
 
+    def _estimate_tokens(self, text: str) -> int:
+        return len(text) // CHARS_PER_TOKEN + 1
+
+    def _estimate_output_tokens(self, test: Dict) -> int:
+        return OUTPUT_TOKENS_BASE + OUTPUT_TOKENS_PER_LEVEL * test["level"]
+
+    def _plan_batch_size(self, model_id: str, doc_content: str, max_tokens: int,
+                         limit: Optional[int] = None) -> Tuple[int, Dict]:
+        """
+        Choose the tests per batch so a batch's expected output fits the
+        completion budget (max_tokens and the provider's max_completion_tokens)
+        and its prompt plus output fits the model's context_length. limit, the
+        client's batch_size, caps the result. Batches are then evened out.
+        """
+        tests = self.tests
+        model_data = self._get_model_data(model_id) or {}
+        context_length = model_data.get('context_length')
+        provider_max = (model_data.get('top_provider') or {}).get('max_completion_tokens')
+        completion_budget = min(t for t in (max_tokens, provider_max) if t) if (max_tokens or provider_max) else None
+
+        prefix, suffix = self._construct_prompt_parts(doc_content, tests)
+        prefix_tokens = self._estimate_tokens(prefix)
+        prompt_per_test = self._estimate_tokens(suffix) / len(tests)
+        output_per_test = sum(self._estimate_output_tokens(t) for t in tests) / len(tests)
+
+        size = len(tests)
+        if limit:
+            size = min(size, limit)
+        if completion_budget:
+            size = min(size, int(completion_budget * BATCH_TOKEN_HEADROOM / output_per_test))
+        if context_length:
+            room = context_length * BATCH_TOKEN_HEADROOM - prefix_tokens
+            size = min(size, int(room / (prompt_per_test + output_per_test)))
+        size = max(1, size)
+
+        num_batches = math.ceil(len(tests) / size)
+        size = math.ceil(len(tests) / num_batches)
+        return size, {
+            'batch_size': size,
+            'num_batches': num_batches,
+            'requested_batch_size': limit,
+            'context_length': context_length,
+            'completion_budget': completion_budget,
+            'doc_tokens': prefix_tokens,
+            'output_tokens_per_test': round(output_per_test)
+        }
+
     def _build_response_format(self, tests: List[Dict]) -> Dict:
         """Build JSON schema for structured output enforcement via OpenRouter"""
         properties = {
@@ -104,8 +151,11 @@ class LLMService:
             }
         }
 
-    def _construct_prompt(self, doc_content: str, tests_to_use: List[Dict]) -> str:
-        """Construct full prompt for LLM"""
+    def _construct_prompt_parts(self, doc_content: str, tests_to_use: List[Dict]) -> Tuple[str, str]:
+        """
+        Split the prompt into the documentation prefix, identical for every
+        batch of a run, and the batch-specific test cases.
+        """
         test_prompts = {
             "tests": [
                 {
@@ -122,21 +172,42 @@ class LLMService:
 
         test_prompts_json = json.dumps(test_prompts, indent=2)
 
-        prompt_template = """You are a Jac programming language expert. Write valid Jac code for each test case based on the documentation.
+        prefix_template = """You are a Jac programming language expert. Write valid Jac code for each test case based on the documentation.
 
 # Documentation
 {doc_content}
-
+"""
+        suffix_template = """
 # Test Cases
 {test_prompts_json}
 
 # Task
 Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and \\" for quotes in the code strings.
 """
-        return prompt_template.format(
-            doc_content=doc_content,
-            test_prompts_json=test_prompts_json
+        return (
+            prefix_template.format(doc_content=doc_content),
+            suffix_template.format(test_prompts_json=test_prompts_json)
         )
+
+    def _construct_prompt(self, doc_content: str, tests_to_use: List[Dict]) -> str:
+        """Construct full prompt for LLM"""
+        return ''.join(self._construct_prompt_parts(doc_content, tests_to_use))
+
+    def _construct_messages(self, model_id: str, doc_content: str, tests_to_use: List[Dict]) -> List[Dict]:
+        """
+        Chat messages with the documentation as a leading content part of its
+        own, so providers can cache it as a prompt prefix across batches.
+        Providers that need an explicit breakpoint get a cache_control hint.
+        """
+        prefix, suffix = self._construct_prompt_parts(doc_content, tests_to_use)
+        if os.getenv('PROMPT_CACHE', 'true').lower() != 'true':
+            return [{"role": "user", "content": prefix + suffix}]
+
+        doc_part = {"type": "text", "text": prefix}
+        if model_id.startswith(CACHE_CONTROL_PROVIDERS):
+            doc_part["cache_control"] = {"type": "ephemeral"}
+        return [{"role": "user", "content": [doc_part, {"type": "text", "text": suffix}]}]
+
     def run_benchmark(
         self,
         model_id: str,
@@ -155,31 +226,14 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
             raise ValueError(f"No documentation content found for variant '{variant}'")
 
         tests_to_use = self.tests
-        prompt = self._construct_prompt(doc_content, tests_to_use)
-
-        max_retries = 3
-        retry_delay = 20
-
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    time.sleep(retry_delay)
-                response = self.client.chat.completions.create(
-                    model=model_id,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    response_format=self._build_response_format(tests_to_use)
-                )
-                response_text = response.choices[0].message.content.strip()
-                break
-            except Exception as e:
-                if '429' in str(e) and attempt < max_retries - 1:
-                    retry_delay *= 2
-                else:
-                    raise
+        usage = TokenUsage()
 
-        responses = json.loads(response_text)
+        responses, errors = self.engine.run(self._generate_batch(
+            model_id, doc_content, tests_to_use, temperature, max_tokens, usage,
+            max_retries=2, base_delay=20
+        ))
+        if not responses:
+            raise RuntimeError(f"No responses generated: {'; '.join(errors)}")
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         safe_model_name = model_id.replace('/', '-')
@@ -195,7 +249,8 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
             total_tests=len(tests_to_use),
             responses=responses,
             batch_size=len(tests_to_use),
-            num_batches=1
+            num_batches=1,
+            metadata={'usage': usage.as_dict()}
         )
 
         return {
@@ -203,37 +258,207 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
             'model': model_id,
             'variant': variant,
             'num_responses': len(responses),
-            'responses': responses
+            'responses': responses,
+            'errors': errors if errors else None,
+            'usage': usage.as_dict()
         }
 
+    def _replay_key(self, model_id: str, doc_content: str, tests: List[Dict],
+                    temperature: float, max_tokens: int) -> str:
+        """Key of a recorded completion: model, prompt hash, sampling settings and schema hash"""
+        prompt = self._construct_prompt(doc_content, tests)
+        schema = json.dumps(self._build_response_format(tests), sort_keys=True)
+        payload = json.dumps({
+            'model': model_id,
+            'prompt': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'schema': hashlib.sha256(schema.encode('utf-8')).hexdigest()
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def _complete_text(self, model_id: str, doc_content: str, tests: List[Dict],
+                             temperature: float, max_tokens: int,
+                             usage: Optional[TokenUsage] = None,
+                             on_answer: Optional[Callable[[str, str], None]] = None, **retry) -> str:
+        """
+        Completion text for a set of tests, through the record/replay layer
+        (LLM_REPLAY_MODE). With on_answer the completion is streamed and
+        on_answer(test_id, code) fires as soon as each answer's string closes;
+        an answer may be reported again if the request is retried.
+        """
+        mode = self.replay_mode
+        key = self._replay_key(model_id, doc_content, tests, temperature, max_tokens) if mode != 'off' else None
+
+        if mode in ('replay', 'replay-or-record'):
+            recorded = await asyncio.to_thread(LLMReplayService.get, key)
+            if recorded is not None:
+                if usage is not None:
+                    usage.add_replay()
+                if on_answer is not None:
+                    self._emit_answers(extract_complete_pairs(recorded['content']).items(), tests, on_answer)
+                return recorded['content']
+            if mode == 'replay':
+                raise LookupError(f"No recorded completion for {model_id} (LLM_REPLAY_MODE=replay)")
+
+        request = dict(
+            messages=self._construct_messages(model_id, doc_content, tests),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=self._build_response_format(tests),
+            trace=usage.new_trace() if usage is not None else None,
+            **retry
+        )
+        if on_answer is None:
+            response = await self.engine.complete(model_id, **request)
+        else:
+            reader = [IncrementalPairReader()]
+            on_attempt = request.pop('on_attempt', None)
+
+            def restart(attempt):
+                # Every attempt streams the object from its start
+                reader[0] = IncrementalPairReader()
+                if on_attempt:
+                    on_attempt(attempt)
+
+            response = await self.engine.stream(
+                model_id,
+                lambda delta: self._emit_answers(reader[0].feed(delta), tests, on_answer),
+                on_attempt=restart,
+                **request
+            )
+        if usage is not None:
+            usage.add(response)
+        choice = response.choices[0]
+        content = choice.message.content
+        if getattr(choice, 'finish_reason', None) == 'length':
+            raise BatchOutputError(f"Output truncated at max_tokens={max_tokens}", content or "")
+
+        if mode in ('record', 'replay-or-record'):
+            single = TokenUsage()
+            single.add(response)
+            await asyncio.to_thread(
+                LLMReplayService.put, key, model_id, temperature, max_tokens, content, single.as_dict()
+            )
+        return content
+
+    @staticmethod
+    def _emit_answers(pairs, tests: List[Dict], on_answer: Callable[[str, str], None]):
+        ids = {test["id"] for test in tests}
+        for test_id, code in pairs:
+            if test_id in ids:
+                on_answer(test_id, code)
+
+    async def _generate_batch(self, model_id: str, doc_content: str, batch: List[Dict],
+                              temperature: float, max_tokens: int, usage: Optional[TokenUsage] = None,
+                              on_recover: Optional[Callable] = None,
+                              on_answer: Optional[Callable[[str, str], None]] = None,
+                              **retry) -> Tuple[Dict, List[str]]:
+        """
+        Generate responses for a batch. Truncated or unparsable output is not
+        retried whole: every complete answer in it is kept and only the missing
+        tests are requested again, or, if nothing was salvageable, the batch is
+        bisected. Returns (responses, errors) so a partly failed batch keeps
+        what succeeded.
+        """
+        ids = {test["id"] for test in batch}
+        try:
+            content = await self._complete_text(
+                model_id, doc_content, batch, temperature, max_tokens, usage, on_answer, **retry
+            )
+            try:
+                return json.loads(content.strip()), []
+            except json.JSONDecodeError as e:
+                raise BatchOutputError(f"Invalid JSON output: {e}", content)
+        except BatchOutputError as e:
+            salvaged = {k: v for k, v in extract_complete_pairs(e.content).items() if k in ids}
+            if salvaged:
+                missing = [test for test in batch if test["id"] not in salvaged]
+                if on_recover:
+                    on_recover(len(batch), "salvage", f"{e}; kept {len(salvaged)}, re-requesting {len(missing)}")
+                if not missing:
+                    return salvaged, []
+                rest, errors = await self._generate_batch(
+                    model_id, doc_content, missing, temperature, max_tokens, usage, on_recover, on_answer,
+                    max_retries=retry.get('max_retries', 3), priority=retry.get('priority', 0)
+                )
+                return {**salvaged, **rest}, errors
+            if len(batch) == 1:
+                return {}, [f"{batch[0]['id']}: {e}"]
+            if on_recover:
+                on_recover(len(batch), "split", str(e))
+
+        middle = len(batch) // 2
+        halves = await asyncio.gather(*(
+            self._generate_batch(model_id, doc_content, half, temperature, max_tokens, usage, on_recover,
+                                 on_answer, max_retries=retry.get('max_retries', 3),
+                                 priority=retry.get('priority', 0))
+            for half in (batch[:middle], batch[middle:])
+        ), return_exceptions=True)
+
+        responses = {}
+        errors = []
+        for half, outcome in zip((batch[:middle], batch[middle:]), halves):
+            if isinstance(outcome, Exception):
+                errors.append(f"{half[0]['id']}..{half[-1]['id']}: {outcome}")
+            else:
+                responses.update(outcome[0])
+                errors.extend(outcome[1])
+        return responses, errors
+
+    async def _run_batch_async(self, model_id: str, doc_content: str, batch: List[Dict],
+                               temperature: float, max_tokens: int, batch_num: int,
+                               status_callback: Optional[Callable] = None,
+                               usage: Optional[TokenUsage] = None,
+                               on_recover: Optional[Callable] = None,
+                               on_answer: Optional[Callable[[str, str], None]] = None,
+                               priority: int = 0) -> tuple:
+        """
+        Run a single batch on the engine with retries, salvage and split-on-failure.
+        Returns (batch_num, responses, error, retries, telemetry); responses may
+        be partial when error is set. Token counts also go to usage.
+        """
+        max_retries = 3
+        attempts = [0]
+        batch_usage = TokenUsage(parent=usage)
+        started = time.monotonic()
+
+        def on_attempt(retry):
+            attempts[0] = retry
+            if status_callback:
+                status_callback(batch_num, "running", retry, max_retries)
+
+        def recover(size, action, reason):
+            if on_recover:
+                on_recover(batch_num, size, action, reason)
+            if status_callback:
+                status_callback(batch_num, action, attempts[0], max_retries)
+
+        try:
+            responses, errors = await self._generate_batch(
+                model_id, doc_content, batch, temperature, max_tokens, batch_usage, recover, on_answer,
+                max_retries=max_retries, on_attempt=on_attempt, priority=priority
+            )
+        except Exception as e:
+            responses, errors = {}, [str(e)]
+        error = '; '.join(errors) if errors else None
+        status = "completed" if not error else ("partial" if responses else "failed")
+        if status_callback:
+            status_callback(batch_num, status, attempts[0], max_retries)
+        # Cached model data only: this runs on the engine loop, which must not block on a fetch
+        telemetry = batch_telemetry(
+            batch_num, len(batch), status, batch_usage, time.monotonic() - started,
+            get_model_catalog().peek(model_id)
+        )
+        return (batch_num, responses, error, attempts[0], telemetry)
+
     def _run_batch(self, model_id: str, doc_content: str, batch: List[Dict],
                    temperature: float, max_tokens: int, batch_num: int,
                    status_callback: Optional[Callable] = None) -> tuple:
-        """Run a single batch API call with retries. Returns (batch_num, responses, error, retries)"""
-        max_retries = 3
-        for retry in range(max_retries + 1):
-            try:
-                if status_callback:
-                    status_callback(batch_num, "running", retry, max_retries)
-                if retry > 0:
-                    time.sleep(2 ** retry)
-                prompt = self._construct_prompt(doc_content, batch)
-                response = self.client.chat.completions.create(
-                    model=model_id,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    response_format=self._build_response_format(batch)
-                )
-                if status_callback:
-                    status_callback(batch_num, "completed", retry, max_retries)
-                return (batch_num, json.loads(response.choices[0].message.content.strip()), None, retry)
-            except Exception as e:
-                if retry >= max_retries:
-                    if status_callback:
-                        status_callback(batch_num, "failed", retry, max_retries)
-                    return (batch_num, {}, str(e), retry)
-        return (batch_num, {}, "Unknown error", max_retries)
+        """Blocking wrapper around _run_batch_async"""
+        return self.engine.run(self._run_batch_async(
+            model_id, doc_content, batch, temperature, max_tokens, batch_num, status_callback
+        ))
 
     def run_benchmark_concurrent(
         self,
@@ -241,10 +466,29 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
         variant: str,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        batch_size: int = 45,
-        progress_callback: Optional[Callable] = None
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable] = None,
+        batch_callback: Optional[Callable] = None,
+        streaming: Optional[bool] = None,
+        test_callback: Optional[Callable] = None,
+        priority: int = 0,
+        cancel_event: Optional[threading.Event] = None
     ) -> Dict:
-        """Run batched benchmark with parallel API calls"""
+        """
+        Run batched benchmark with parallel API calls. Batch sizes are planned
+        from the model's context and completion limits; batch_size, if given,
+        is an upper bound. batch_callback(batch_num, responses) is called for
+        each batch with responses as soon as it completes, so callers can start
+        grading it immediately.
+
+        With streaming (default LLM_STREAMING), test_callback(batch_num,
+        test_id, code) is called on the engine thread as each answer closes,
+        and batch_callback then only receives answers it has not seen.
+        Requests of higher priority runs take free engine slots first.
+        Setting cancel_event cancels outstanding batches and raises RuntimeError.
+        """
+        if streaming is None:
+            streaming = self.streaming
         if temperature is None:
             temperature = float(os.getenv('DEFAULT_TEMPERATURE', '0.1'))
         if max_tokens is None:
@@ -255,7 +499,8 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
             raise ValueError(f"No documentation content found for variant '{variant}'")
 
         tests_to_use = self.tests
-        num_batches = (len(tests_to_use) + batch_size - 1) // batch_size
+        batch_size, batch_plan = self._plan_batch_size(model_id, doc_content, max_tokens, batch_size)
+        num_batches = batch_plan['num_batches']
 
         batches = []
         for i in range(num_batches):
@@ -265,8 +510,12 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
 
         batch_statuses = {i + 1: {"status": "pending", "retry": 0, "max_retries": 2} for i in range(num_batches)}
 
+        answered = {}
+
         def batch_status_callback(batch_num, status, retry, max_retries):
             batch_statuses[batch_num] = {"status": status, "retry": retry, "max_retries": max_retries}
+            if streaming:
+                batch_statuses[batch_num]["answered"] = answered.get(batch_num, 0)
             if progress_callback:
                 progress_callback(
                     completed * batch_size, len(tests_to_use), f"Batch {batch_num} {status}",
@@ -282,20 +531,61 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
         completed = 0
         failed = 0
         errors = []
-
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            futures = [
-                executor.submit(self._run_batch, model_id, doc_content, batch, temperature, max_tokens, batch_num, batch_status_callback)
-                for batch_num, batch in batches
-            ]
-
-            for future in as_completed(futures):
-                batch_num, batch_responses, error, retries = future.result()
+        usage = TokenUsage()
+        recoveries = []
+        batch_details = []
+        started = time.monotonic()
+
+        def on_recover(batch_num, size, action, reason):
+            recoveries.append({'batch_num': batch_num, 'tests': size, 'action': action, 'reason': reason})
+
+        # Answers already handed to test_callback, so retries and the final batch don't repeat them
+        streamed = {}
+
+        def answer_callback(batch_num):
+            def on_answer(test_id, code):
+                if streamed.get(test_id) == code:
+                    return
+                streamed[test_id] = code
+                answered[batch_num] = answered.get(batch_num, 0) + 1
+                batch_statuses[batch_num]["answered"] = answered[batch_num]
+                if test_callback:
+                    test_callback(batch_num, test_id, code)
+                if progress_callback:
+                    progress_callback(
+                        len(streamed), len(tests_to_use), f"Batch {batch_num}: {test_id} answered",
+                        batch_num=completed, num_batches=num_batches, failed=failed,
+                        batch_statuses=batch_statuses
+                    )
+            return on_answer
+
+        # Batches run on the shared engine; this thread only collects results
+        futures = [
+            self.engine.submit(self._run_batch_async(
+                model_id, doc_content, batch, temperature, max_tokens, batch_num, batch_status_callback, usage,
+                on_recover, answer_callback(batch_num) if streaming else None, priority
+            ))
+            for batch_num, batch in batches
+        ]
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1.0 if cancel_event else None, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+                raise RuntimeError("Run cancelled")
+            for future in done:
+                batch_num, batch_responses, error, retries, telemetry = future.result()
+                batch_details.append(telemetry)
                 if error:
                     failed += 1
                     errors.append(f"Batch {batch_num}: {error}")
-                else:
+                if batch_responses:
                     responses.update(batch_responses)
+                    unseen = {k: v for k, v in batch_responses.items() if streamed.get(k) != v} if test_callback else batch_responses
+                    if batch_callback and unseen:
+                        batch_callback(batch_num, unseen)
                 completed += 1
 
                 if progress_callback:
@@ -318,6 +608,8 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         safe_model_name = model_id.replace('/', '-')
         run_id = f"{safe_model_name}-{variant}-{timestamp}"
+        batch_details.sort(key=lambda b: b['batch_num'])
+        telemetry = summarize_batches(batch_details, time.monotonic() - started)
 
         BenchmarkResultService.create(
             run_id=run_id,
@@ -329,7 +621,12 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
             total_tests=len(tests_to_use),
             responses=responses,
             batch_size=batch_size,
-            num_batches=num_batches
+            num_batches=num_batches,
+            metadata={
+                'usage': usage.as_dict(),
+                'batching': {**batch_plan, 'recoveries': recoveries},
+                'telemetry': {**telemetry, 'batch_details': batch_details}
+            }
         )
 
         return {
@@ -339,7 +636,10 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
             'num_responses': len(responses),
             'responses': responses,
             'failed_batches': failed,
-            'errors': errors if errors else None
+            'errors': errors if errors else None,
+            'usage': usage.as_dict(),
+            'batching': {**batch_plan, 'recoveries': recoveries},
+            'telemetry': telemetry
         }
 
     def rerun_single_batch(
@@ -351,7 +651,7 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
         batch_num: int,
         batch_size: int = 45
     ) -> Dict:
-        """Rerun a single batch and return the responses"""
+        """Rerun a single batch and return the responses (partial if some split halves failed)"""
         doc_content = self.get_doc_content(variant)
         if doc_content is None:
             raise ValueError(f"No documentation content found for variant '{variant}'")
@@ -364,11 +664,13 @@ Return a JSON object mapping each test ID to Jac code. Use \\n for newlines and
         if not batch:
             raise ValueError(f"Batch {batch_num} is empty or out of range")
 
-        _, responses, error, _ = self._run_batch(
+        _, responses, error, _, _ = self._run_batch(
             model_id, doc_content, batch, temperature, max_tokens, batch_num
         )
 
-        if error:
+        if error and not responses:
             raise RuntimeError(f"Batch {batch_num} failed: {error}")
+        if error:
+            print(f"Warning: Batch {batch_num} rerun partly failed: {error}")
 
         return responses
\ No newline at end of file
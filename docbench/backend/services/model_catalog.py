@@ -0,0 +1,186 @@
+"""OpenRouter model catalogue, served from memory and persisted in the database"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from database import ModelCatalogService
+from ..utils.http_client import get_http_session
+from .llm_engine import OPENROUTER_BASE_URL
+
+MODELS_URL = f"{OPENROUTER_BASE_URL}/models"
+
+# Fields of each model the control panel uses
+SUMMARY_FIELDS = ('id', 'name', 'context_length', 'pricing', 'architecture', 'top_provider')
+
+
+class ModelCatalog:
+    """
+    The model list keyed by id, so context_length and max_completion_tokens
+    lookups are dictionary hits. Loaded from the database on first use;
+    once older than the TTL it keeps being served while a background
+    thread revalidates it with a conditional request (ETag/Last-Modified).
+    Only an empty catalogue with nothing stored is fetched synchronously,
+    and a failed fetch is not retried until the TTL has passed again.
+    """
+
+    def __init__(self, source: str = MODELS_URL, ttl: float = 3600):
+        self.source = source
+        self.ttl = ttl
+        self.models: List[Dict[str, Any]] = []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.summaries: List[Dict[str, Any]] = []
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.fetched_at: Optional[float] = None
+        self.checked_at: float = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _set_models(self, models: List[Dict[str, Any]]):
+        self.by_id = {m['id']: m for m in models if 'id' in m}
+        self.summaries = [{field: m.get(field) for field in SUMMARY_FIELDS} for m in models]
+        self.models = models
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                snapshot = ModelCatalogService.get(self.source)
+            except Exception as e:
+                print(f"Warning: Failed to load stored model catalogue: {e}")
+                snapshot = None
+            if snapshot:
+                self._set_models(snapshot['models'])
+                self.etag = snapshot['etag']
+                self.last_modified = snapshot['last_modified']
+                self.fetched_at = snapshot['fetched_at']
+                self.checked_at = snapshot['checked_at']
+            self._loaded = True
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self.checked_at > self.ttl
+
+    def _ensure_fresh(self):
+        self._load()
+        # checked_at also records failed fetches, so an empty catalogue is not refetched on every lookup
+        if not self.is_stale:
+            return
+        if self.models:
+            self.refresh_async()
+        else:
+            self.refresh()
+
+    def warm(self):
+        """Load the stored catalogue and revalidate it in the background if needed"""
+        self._load()
+        if not self.models or self.is_stale:
+            self.refresh_async()
+
+    def get_models(self) -> List[Dict[str, Any]]:
+        """Full model objects as OpenRouter returns them"""
+        self._ensure_fresh()
+        return self.models
+
+    def get_summaries(self) -> List[Dict[str, Any]]:
+        """The /api/models view of every model, built once per catalogue change"""
+        self._ensure_fresh()
+        return self.summaries
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_fresh()
+        return self.by_id.get(model_id)
+
+    def peek(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a model from memory only; never loads or fetches"""
+        return self.by_id.get(model_id)
+
+    def refresh(self) -> bool:
+        """
+        Revalidate against OpenRouter now. Returns True if the catalogue is
+        current afterwards. Without OPENROUTER_API_KEY nothing is fetched.
+        """
+        api_key = os.getenv('OPENROUTER_API_KEY')
+        if not api_key:
+            return False
+
+        headers = {'Authorization': f'Bearer {api_key}'}
+        if self.models:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            if self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+
+        try:
+            response = get_http_session(OPENROUTER_BASE_URL).get(self.source, headers=headers)
+            if response.status_code == 304:
+                self.checked_at = time.time()
+                ModelCatalogService.touch(self.source)
+                return True
+            response.raise_for_status()
+            models = response.json().get('data', [])
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            self._set_models(models)
+            self.etag = etag
+            self.last_modified = last_modified
+            self.fetched_at = self.checked_at = time.time()
+            ModelCatalogService.save(self.source, models, etag, last_modified)
+            return True
+        except Exception as e:
+            print(f"Warning: Failed to fetch models from OpenRouter: {e}")
+            # Back off for a TTL instead of refetching on every lookup
+            self.checked_at = time.time()
+            return False
+
+    def refresh_async(self):
+        """Start a background revalidation unless one is already running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='model-catalog-refresh', daemon=True).start()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            'models': len(self.models),
+            'fetched_at': self.fetched_at,
+            'checked_at': self.checked_at or None,
+            'ttl': self.ttl,
+            'stale': self.is_stale,
+            'refreshing': self._refreshing
+        }
+
+
+_catalog: Optional[ModelCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_model_catalog() -> ModelCatalog:
+    """Return the process-wide catalogue, with its TTL from MODEL_CATALOG_TTL (seconds)"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ModelCatalog(ttl=float(os.getenv('MODEL_CATALOG_TTL', '3600')))
+        return _catalog
+
+
+def _reset_after_fork():
+    # A refresh thread does not survive a fork; the child reloads its own copy
+    global _catalog, _catalog_lock
+    _catalog = None
+    _catalog_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
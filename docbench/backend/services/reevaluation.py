@@ -0,0 +1,165 @@
+"""Resumable background re-evaluation of stored benchmark results"""
+
+import multiprocessing
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Optional, Tuple
+
+from database import BenchmarkResultService, ReevaluationJobService
+from .evaluation_store import evaluation_record
+from .evaluator import EvaluatorService
+from .test_suite import get_test_suite
+
+_jobs: Dict[str, threading.Thread] = {}
+_jobs_lock = threading.Lock()
+
+_worker_evaluator: Optional[EvaluatorService] = None
+
+
+def _grade(responses: Dict[str, str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Grade one run in a worker process; returns (test suite hash, evaluation
+    record). The record carries the evaluator_version it was graded with.
+    """
+    global _worker_evaluator
+    suite = get_test_suite()
+    if _worker_evaluator is None or _worker_evaluator.suite is not suite:
+        _worker_evaluator = EvaluatorService()
+        # Re-scoring must not be answered from cached results of the old evaluation
+        _worker_evaluator.use_cache = False
+    eval_result = _worker_evaluator.evaluate_responses(responses or {}, max_workers=1)
+    record = evaluation_record(eval_result, suite)
+    record['evaluator_version'] = _worker_evaluator.evaluation_stamp(eval_result)['evaluator_version']
+    return suite.digest, record
+
+
+def _emit(socketio, job: Optional[Dict[str, Any]]):
+    if socketio is not None and job is not None:
+        socketio.emit('reevaluation_update', job)
+
+
+def _run_job(job_id: str, socketio, workers: int):
+    executor = None
+    try:
+        ReevaluationJobService.set_status(job_id, 'running')
+        job = ReevaluationJobService.get(job_id)
+        _emit(socketio, job)
+        print(f"[REEVAL] Job {job_id} running ({job['processed']}/{job['total']} done)", flush=True)
+
+        # Grading is CPU-bound Python; worker processes keep it off the web process's GIL.
+        # They are spawned, not forked: a fork of the threaded server could inherit
+        # locks held by its other threads (database pool, engine loop, logging)
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+        while True:
+            job = ReevaluationJobService.get(job_id)
+            if job is None or job['status'] != 'running':
+                break
+
+            chunk = ReevaluationJobService.next_chunk(job_id)
+            if not chunk:
+                ReevaluationJobService.set_status(job_id, 'completed')
+                job = ReevaluationJobService.get(job_id)
+                _emit(socketio, job)
+                print(f"[REEVAL] Job {job_id} completed: {job['processed']} runs, {job['failed']} failed", flush=True)
+                break
+
+            futures = {executor.submit(_grade, r['responses']): r for r in chunk}
+            graded = {}
+            failed = 0
+            for future in as_completed(futures):
+                result = futures[future]
+                try:
+                    digest, record = future.result()
+                except Exception as e:
+                    print(f"[REEVAL] Failed to re-evaluate {result['run_id']}: {e}", flush=True)
+                    failed += 1
+                    continue
+                if digest != job['test_suite_hash']:
+                    raise RuntimeError("tests.json changed during re-evaluation; start a new job")
+                graded[result['id']] = record
+
+            job = ReevaluationJobService.commit_chunk(
+                job_id, graded, last_result_id=max(r['id'] for r in chunk), failed=failed
+            )
+            _emit(socketio, job)
+
+    except Exception as e:
+        print(f"[REEVAL] Job {job_id} failed: {e}", flush=True)
+        traceback.print_exc()
+        ReevaluationJobService.set_status(job_id, 'failed', error_message=str(e))
+        _emit(socketio, ReevaluationJobService.get(job_id))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with _jobs_lock:
+            _jobs.pop(job_id, None)
+
+
+def _launch(job_id: str, socketio, workers: Optional[int]):
+    if workers is None:
+        workers = int(os.getenv('REEVAL_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+    thread = threading.Thread(target=_run_job, args=(job_id, socketio, max(1, workers)), daemon=True)
+    _jobs[job_id] = thread
+    thread.start()
+
+
+def start_reevaluation(socketio=None, chunk_size: Optional[int] = None,
+                       workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Start re-grading every result not evaluated with the current evaluator
+    version and tests.json. Returns the already running job if there is one.
+    """
+    with _jobs_lock:
+        for job in ReevaluationJobService.get_unfinished():
+            if job['job_id'] in _jobs:
+                return job
+
+        if chunk_size is None:
+            chunk_size = int(os.getenv('REEVAL_CHUNK_SIZE', '50'))
+        job = ReevaluationJobService.create(
+            job_id=uuid.uuid4().hex[:12],
+            **EvaluatorService().evaluation_stamp(),
+            chunk_size=max(1, chunk_size)
+        )
+        _launch(job['job_id'], socketio, workers)
+        return job
+
+
+def resume_reevaluation_jobs(socketio=None):
+    """
+    Resume jobs interrupted by a restart, from their last committed chunk.
+    Evaluations the restart cut off are failed first; a job skips results
+    while they are 'evaluating', so they would otherwise never be re-graded.
+    """
+    interrupted = BenchmarkResultService.fail_interrupted_evaluations()
+    if interrupted:
+        print(f"[REEVAL] Marked {interrupted} interrupted evaluation(s) as failed", flush=True)
+    stamp = EvaluatorService().evaluation_stamp()
+    with _jobs_lock:
+        for job in ReevaluationJobService.get_unfinished():
+            if job['job_id'] in _jobs:
+                continue
+            if job['evaluator_version'] != stamp['evaluator_version'] or job['test_suite_hash'] != stamp['test_suite_hash']:
+                ReevaluationJobService.set_status(
+                    job['job_id'], 'cancelled',
+                    error_message="Evaluator or tests.json changed since the job started"
+                )
+                continue
+            print(f"[REEVAL] Resuming job {job['job_id']} after result id {job['last_result_id']}", flush=True)
+            _launch(job['job_id'], socketio, None)
+
+
+def cancel_reevaluation(job_id: str) -> Optional[Dict[str, Any]]:
+    """Stop a job at the next chunk boundary"""
+    job = ReevaluationJobService.get(job_id)
+    if job is None or job['status'] not in ('pending', 'running'):
+        return job
+    ReevaluationJobService.set_status(job_id, 'cancelled')
+    return ReevaluationJobService.get(job_id)
@@ -0,0 +1,199 @@
+"""Vectorized what-if rescoring of stored per-test outcomes under alternative penalty weights"""
+
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from database import TestCaseEvaluationService
+from .evaluation_store import JAC_CHECKED, JAC_VALID, FUNCTIONAL_FAILED, FUNCTIONAL_SKIPPED, TIMED_OUT
+
+
+class ScoringWeights(NamedTuple):
+    """Penalty weights, as fractions of a test's max_score unless noted"""
+    forbidden: float = 0.30           # lost when every forbidden element is present
+    jac_check: float = 0.15           # lost when jac check fails
+    syntax_per_warning: float = 0.10  # per lint warning, applied only when jac check was not run
+    syntax_cap: float = 0.50          # cap on the lint warning penalty
+    functional: float = 1.0           # fraction of the remaining score lost when functional tests fail
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'ScoringWeights':
+        """Build a profile from a partial mapping; missing weights keep their defaults"""
+        data = data or {}
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown weights: {', '.join(sorted(unknown))}")
+        weights = {}
+        for name, value in data.items():
+            try:
+                weights[name] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Weight '{name}' must be a number")
+            if weights[name] < 0:
+                raise ValueError(f"Weight '{name}' must not be negative")
+        return cls(**weights)
+
+
+DEFAULT_WEIGHTS = ScoringWeights()
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(masks).astype(np.float64)
+    return np.fromiter((bin(m).count('1') for m in masks.tolist()), dtype=np.float64, count=len(masks))
+
+
+class OutcomeMatrix:
+    """
+    Column arrays of raw outcomes for every stored test across a set of runs.
+    Element hits are counted once here, so rescoring is pure arithmetic.
+    """
+
+    def __init__(self, runs: List[Dict[str, Any]], outcomes: List[tuple]):
+        self.runs = runs
+        run_index = {run['id']: i for i, run in enumerate(runs)}
+        self.categories: List[str] = []
+        category_index: Dict[str, int] = {}
+
+        n = len(outcomes)
+        columns = list(zip(*outcomes)) if outcomes else [()] * len(TestCaseEvaluationService.OUTCOME_COLUMNS)
+        result_ids, categories, points, required_mask, required_total, \
+            forbidden_mask, forbidden_total, flags, syntax_errors = columns
+        for category in categories:
+            if category not in category_index:
+                category_index[category] = len(self.categories)
+                self.categories.append(category)
+
+        def column(values, dtype):
+            return np.fromiter((v or 0 for v in values), dtype=dtype, count=n)
+
+        self.run = np.fromiter((run_index[i] for i in result_ids), dtype=np.int64, count=n)
+        self.category = np.fromiter((category_index[c] for c in categories), dtype=np.int64, count=n)
+        max_score = column(points, np.float64)
+        required_mask = column(required_mask, np.int64)
+        required_total = column(required_total, np.float64)
+        forbidden_mask = column(forbidden_mask, np.int64)
+        forbidden_total = column(forbidden_total, np.float64)
+        flags = column(flags, np.int64)
+        syntax_errors = column(syntax_errors, np.float64)
+
+        self.max_score = max_score
+        self.required_fraction = np.divide(
+            _popcount(required_mask), required_total, out=np.ones(n), where=required_total > 0
+        )
+        self.forbidden_fraction = np.divide(
+            _popcount(forbidden_mask), forbidden_total, out=np.zeros(n), where=forbidden_total > 0
+        )
+        self.syntax_errors = syntax_errors
+        self.jac_checked = (flags & JAC_CHECKED) != 0
+        self.jac_failed = self.jac_checked & ((flags & JAC_VALID) == 0)
+        self.functional_failed = (flags & (FUNCTIONAL_FAILED | FUNCTIONAL_SKIPPED)) != 0
+        self.timed_out = (flags & TIMED_OUT) != 0
+
+    def __len__(self) -> int:
+        return len(self.run)
+
+    def test_scores(self, weights: ScoringWeights) -> np.ndarray:
+        """Per-test scores, mirroring EvaluatorService.evaluate_code's penalty order"""
+        max_score = self.max_score
+        score = np.maximum(
+            0, self.required_fraction * max_score - self.forbidden_fraction * (max_score * weights.forbidden)
+        )
+        score = np.maximum(0, score - np.where(self.jac_failed, max_score * weights.jac_check, 0))
+        syntax_penalty = np.minimum(
+            self.syntax_errors * weights.syntax_per_warning * max_score, max_score * weights.syntax_cap
+        )
+        score = np.maximum(0, score - np.where(self.jac_checked, 0, syntax_penalty))
+        score = np.where(self.functional_failed, score * (1 - min(weights.functional, 1.0)), score)
+        score = np.where(self.timed_out, 0, score)
+        return np.round(score, 2)
+
+    def rescore(self, weights: ScoringWeights) -> Dict[str, Any]:
+        """Per-run totals and category percentages under weights"""
+        scores = self.test_scores(weights)
+        n_runs = len(self.runs)
+        n_categories = len(self.categories)
+        run_scores = np.bincount(self.run, weights=scores, minlength=n_runs)
+        run_max = np.bincount(self.run, weights=self.max_score, minlength=n_runs)
+        cell = self.run * n_categories + self.category
+        cell_scores = np.bincount(cell, weights=scores, minlength=n_runs * n_categories).reshape(n_runs, n_categories)
+        cell_max = np.bincount(cell, weights=self.max_score, minlength=n_runs * n_categories).reshape(n_runs, n_categories)
+        # Same operation order as EvaluatorService._aggregate, so percentages round identically
+        run_pct = np.divide(run_scores, run_max, out=np.zeros(n_runs), where=run_max > 0) * 100
+        cell_pct = np.divide(cell_scores, cell_max, out=np.zeros_like(cell_scores), where=cell_max > 0) * 100
+
+        # Plain lists keep the per-run loop below free of numpy scalar overhead. Totals are
+        # rounded with round() as the evaluator does: np.round differs on some halfway values
+        run_scores = [round(score, 2) for score in run_scores.tolist()]
+        run_pct = run_pct.tolist()
+        has_tests = (run_max > 0).tolist()
+        run_max = run_max.tolist()
+        cell_pct = [[round(pct, 2) for pct in row] for row in cell_pct.tolist()]
+        cell_present = (cell_max > 0).tolist()
+
+        results = []
+        for i, run in enumerate(self.runs):
+            if not has_tests[i]:
+                continue
+            stored = run['percentage']
+            results.append({
+                'run_id': run['run_id'],
+                'model': run['model'],
+                'variant': run['variant'],
+                'collection': run['collection'],
+                'total_score': run_scores[i],
+                'max_score': run_max[i],
+                'percentage': round(run_pct[i], 2),
+                'stored_percentage': stored,
+                'delta': round(run_pct[i] - stored, 2) if stored is not None else None,
+                'category_breakdown': {
+                    category: pct
+                    for category, pct, present in zip(self.categories, cell_pct[i], cell_present[i]) if present
+                }
+            })
+        return {
+            'weights': weights._asdict(),
+            'runs': results,
+            'summary': {
+                'runs': len(results),
+                'tests': len(self),
+                'mean_percentage': round(float(np.mean([r['percentage'] for r in results])), 2) if results else 0
+            }
+        }
+
+
+_matrices: Dict[Tuple, Tuple[Tuple, OutcomeMatrix]] = {}
+_matrices_lock = threading.Lock()
+_MAX_CACHED_MATRICES = 8
+
+
+def load_outcomes(collections: Optional[List[str]] = None,
+                  run_ids: Optional[List[str]] = None) -> OutcomeMatrix:
+    """
+    Load the outcome matrix for a scope. Matrices are reused until one of
+    the scoped results is re-evaluated, added or removed, so repeated what-if
+    queries only pay for the arithmetic.
+    """
+    runs = TestCaseEvaluationService.get_outcome_runs(collections, run_ids)
+    scope = (tuple(sorted(collections or ())), tuple(sorted(run_ids or ())))
+    fingerprint = tuple((run['id'], run['evaluated_at']) for run in runs)
+
+    with _matrices_lock:
+        entry = _matrices.get(scope)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+
+    matrix = OutcomeMatrix(runs, TestCaseEvaluationService.get_outcomes([run['id'] for run in runs]))
+    with _matrices_lock:
+        if scope not in _matrices and len(_matrices) >= _MAX_CACHED_MATRICES:
+            _matrices.pop(next(iter(_matrices)))
+        _matrices[scope] = (fingerprint, matrix)
+    return matrix
+
+
+def rescore(weights: Optional[Dict[str, Any]] = None, collections: Optional[List[str]] = None,
+            run_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Recompute scores of stored evaluations under a weight profile without re-checking any code"""
+    profile = ScoringWeights.from_dict(weights)
+    return load_outcomes(collections, run_ids).rescore(profile)
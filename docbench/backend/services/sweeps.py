@@ -0,0 +1,281 @@
+"""Matrix sweeps: models x variants x batch sizes x repeats as one scheduled job"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from database import BenchmarkResultService, BenchmarkRunService, SweepService
+from .evaluation_store import evaluation_record
+from .evaluator import EvaluatorService
+from .llm_service import LLMService
+
+MAX_SWEEP_RUNS = 500
+
+_sweeps: Dict[str, Dict[str, Any]] = {}
+_sweeps_lock = threading.Lock()
+
+
+def _string_list(spec: Dict[str, Any], key: str) -> List[str]:
+    values = spec.get(key)
+    if isinstance(values, str):
+        values = [values]
+    if not values or not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+        raise ValueError(f"'{key}' must be a non-empty list of names")
+    return list(dict.fromkeys(values))
+
+
+def expand_matrix(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a sweep spec into one cell per run. Models vary fastest, so the
+    first cells to start already cover every model of the sweep.
+    """
+    models = _string_list(spec, 'models')
+    variants = _string_list(spec, 'variants')
+    batch_sizes = spec.get('batch_sizes') or [spec.get('batch_size')]
+    if not isinstance(batch_sizes, list) or not all(b is None or (isinstance(b, int) and b > 0) for b in batch_sizes):
+        raise ValueError("'batch_sizes' must be a list of positive integers")
+    try:
+        repeats = int(spec.get('repeats', 1))
+        temperature = float(spec.get('temperature', float(os.getenv('DEFAULT_TEMPERATURE', '0.1'))))
+        max_tokens = int(spec.get('max_tokens', 16000))
+        priority = int(spec.get('priority', 0))
+        model_priorities = {m: int(p) for m, p in (spec.get('model_priorities') or {}).items()}
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("repeats, temperature, max_tokens and priorities must be numbers")
+    if repeats < 1:
+        raise ValueError("'repeats' must be at least 1")
+
+    cells = [
+        {
+            'model': model,
+            'variant': variant,
+            'batch_size': batch_size,
+            'repeat': repeat,
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'priority': priority + model_priorities.get(model, 0)
+        }
+        for repeat in range(1, repeats + 1)
+        for variant in variants
+        for batch_size in batch_sizes
+        for model in models
+    ]
+    if len(cells) > MAX_SWEEP_RUNS:
+        raise ValueError(f"Sweep expands to {len(cells)} runs; the limit is {MAX_SWEEP_RUNS}")
+    return cells
+
+
+def _cell_label(cell: Dict[str, Any]) -> str:
+    label = f"{cell['model']}/{cell['variant']}"
+    if cell['batch_size']:
+        label += f" batch {cell['batch_size']}"
+    return f"{label} #{cell['repeat']}"
+
+
+def _live_progress(state: Dict[str, Any]) -> Dict[str, Any]:
+    cells = state['cells']
+    completed = sum(c['completed'] for c in cells)
+    total = sum(c['total'] for c in cells)
+    return {
+        'tests_completed': completed,
+        'tests_total': total,
+        'percent': round(completed * 100 / total, 1) if total else 0.0,
+        'runs_active': sum(1 for c in cells if c['status'] in ('running', 'evaluating')),
+        'runs_pending': sum(1 for c in cells if c['status'] == 'pending'),
+        'cells': [dict(c) for c in cells]
+    }
+
+
+def _send_update(state: Dict[str, Any], refresh: bool):
+    try:
+        if refresh:
+            sweep = SweepService.get(state['sweep_id'])
+            if sweep is not None:
+                state['sweep'] = sweep
+        state['socketio'].emit('sweep_update', {**state['sweep'], 'progress': _live_progress(state)})
+    except Exception as e:
+        print(f"Warning: Failed to send sweep update for {state['sweep_id']}: {e}")
+
+
+def _emit(state: Dict[str, Any], force: bool = False):
+    """
+    Queue a sweep_update. Progress callbacks run on the LLM engine's event
+    loop, so the database read and the emit happen on the sweep's emitter
+    thread; only forced updates (a run finished) re-read the stored record.
+    """
+    if state['socketio'] is None:
+        return
+    now = time.monotonic()
+    # Progress events from many concurrent runs are coalesced to about one per second
+    if not force and now - state['last_emit'] < 1.0:
+        return
+    state['last_emit'] = now
+    try:
+        state['emitter'].submit(_send_update, state, force)
+    except RuntimeError:
+        pass  # the sweep has finished and sent its final update
+
+
+def _run_cell(state: Dict[str, Any], index: int, eval_executor: ThreadPoolExecutor):
+    cell = state['spec_cells'][index]
+    progress = state['cells'][index]
+    if state['cancelled'].is_set():
+        progress['status'] = 'cancelled'
+        return
+
+    sweep_id = state['sweep_id']
+    run_id = f"{cell['model']}_{cell['variant']}_{uuid.uuid4().hex[:8]}"
+    progress.update(status='running', run_id=run_id)
+    try:
+        llm_service = LLMService()
+        evaluator = EvaluatorService()
+        graded_batches = []
+        BenchmarkRunService.create(
+            run_id=run_id, model=cell['model'], model_id=cell['model'], variant=cell['variant'],
+            temperature=cell['temperature'], max_tokens=cell['max_tokens']
+        )
+
+        def progress_callback(completed, total, message, **kwargs):
+            progress.update(completed=min(completed, total), total=total, message=message)
+            _emit(state)
+
+        def batch_callback(batch_num, batch_responses):
+            graded_batches.append(eval_executor.submit(evaluator.evaluate_batch, batch_responses))
+
+        result = llm_service.run_benchmark_concurrent(
+            cell['model'], cell['variant'], cell['temperature'], cell['max_tokens'],
+            batch_size=cell['batch_size'], progress_callback=progress_callback,
+            batch_callback=batch_callback, priority=cell['priority'], cancel_event=state['cancelled']
+        )
+        result_run_id = result['run_id']
+        progress.update(status='evaluating', result_run_id=result_run_id, completed=progress['total'])
+
+        BenchmarkResultService.set_evaluation_status(result_run_id, 'evaluating')
+        try:
+            eval_result = evaluator.merge_batches([f.result() for f in graded_batches], result['responses'])
+            BenchmarkResultService.update_evaluation(
+                run_id=result_run_id,
+                **evaluation_record(eval_result, evaluator.suite),
+                **evaluator.evaluation_stamp(eval_result)
+            )
+            progress['percentage'] = eval_result['percentage']
+        except Exception:
+            BenchmarkResultService.set_evaluation_status(result_run_id, 'failed')
+            raise
+        finally:
+            BenchmarkResultService.add_to_collection([result_run_id], state['collection'])
+
+        BenchmarkRunService.complete(run_id=run_id, metadata={
+            'result_run_id': result_run_id, 'sweep_id': sweep_id, 'telemetry': result.get('telemetry')
+        })
+        SweepService.record_run(sweep_id, run_id=result_run_id)
+        progress['status'] = 'completed'
+    except Exception as e:
+        if state['cancelled'].is_set():
+            BenchmarkRunService.fail(run_id=run_id, error_message="Sweep cancelled")
+            progress['status'] = 'cancelled'
+            _emit(state, force=True)
+            return
+        print(f"[SWEEP] {sweep_id}: {_cell_label(cell)} failed: {e}", flush=True)
+        traceback.print_exc()
+        BenchmarkRunService.fail(run_id=run_id, error_message=str(e))
+        SweepService.record_run(sweep_id, error=f"{_cell_label(cell)}: {e}")
+        progress.update(status='failed', error=str(e))
+    _emit(state, force=True)
+
+
+def _run_sweep(state: Dict[str, Any]):
+    sweep_id = state['sweep_id']
+    cells = state['spec_cells']
+    # Up to SWEEP_RUN_WORKERS runs are in flight at once; among those, the shared LLM
+    # engine's slots, rate limits and priorities decide what is sent
+    run_workers = min(len(cells), max(1, int(os.getenv('SWEEP_RUN_WORKERS', '32'))))
+    run_executor = ThreadPoolExecutor(max_workers=run_workers, thread_name_prefix=f'sweep-{sweep_id}')
+    eval_executor = ThreadPoolExecutor(max_workers=max(1, int(os.getenv('SWEEP_EVAL_WORKERS', '2'))))
+    try:
+        futures = [run_executor.submit(_run_cell, state, i, eval_executor) for i in range(len(cells))]
+        for future in futures:
+            future.result()
+
+        sweep = SweepService.get(sweep_id)
+        if state['cancelled'].is_set():
+            status = 'cancelled'
+        elif sweep and sweep['completed_runs'] == 0:
+            status = 'failed'
+        else:
+            status = 'completed'
+        SweepService.set_status(sweep_id, status)
+        print(f"[SWEEP] {sweep_id} {status}: {sweep['completed_runs']} runs, {sweep['failed_runs']} failed", flush=True)
+    except Exception as e:
+        print(f"[SWEEP] {sweep_id} failed: {e}", flush=True)
+        traceback.print_exc()
+        SweepService.set_status(sweep_id, 'failed')
+    finally:
+        run_executor.shutdown(wait=False)
+        eval_executor.shutdown(wait=False)
+        _emit(state, force=True)
+        # Queued updates are still sent; the emitter thread exits after them
+        state['emitter'].shutdown(wait=False)
+        with _sweeps_lock:
+            _sweeps.pop(sweep_id, None)
+
+
+def start_sweep(spec: Dict[str, Any], socketio=None) -> Dict[str, Any]:
+    """
+    Expand a matrix spec and start all of its runs in the background.
+    Finished runs are added to spec['collection'] (default: a new
+    sweep-<timestamp> collection). Raises ValueError for an invalid spec.
+    """
+    cells = expand_matrix(spec)
+    collection = spec.get('collection') or f"sweep-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    sweep = SweepService.create(
+        sweep_id=uuid.uuid4().hex[:12],
+        spec=spec,
+        collection=collection,
+        priority=int(spec.get('priority', 0)),
+        total_runs=len(cells)
+    )
+    state = {
+        'sweep_id': sweep['sweep_id'],
+        'collection': collection,
+        'spec_cells': cells,
+        'cells': [
+            {'label': _cell_label(c), 'status': 'pending', 'completed': 0, 'total': 0}
+            for c in cells
+        ],
+        'cancelled': threading.Event(),
+        'socketio': socketio,
+        'sweep': sweep,
+        'emitter': ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sweep-{sweep['sweep_id']}-emit"),
+        'last_emit': 0.0
+    }
+    with _sweeps_lock:
+        _sweeps[sweep['sweep_id']] = state
+    threading.Thread(target=_run_sweep, args=(state,), daemon=True).start()
+    return {**sweep, 'progress': _live_progress(state)}
+
+
+def get_sweep(sweep_id: str) -> Optional[Dict[str, Any]]:
+    """A sweep's stored record, with live per-run progress while it is running"""
+    sweep = SweepService.get(sweep_id)
+    if sweep is None:
+        return None
+    with _sweeps_lock:
+        state = _sweeps.get(sweep_id)
+    if state is not None:
+        sweep['progress'] = _live_progress(state)
+    return sweep
+
+
+def cancel_sweep(sweep_id: str) -> Optional[Dict[str, Any]]:
+    """Cancel a sweep's outstanding requests; runs already generated are still graded and kept"""
+    with _sweeps_lock:
+        state = _sweeps.get(sweep_id)
+    if state is not None:
+        state['cancelled'].set()
+    return get_sweep(sweep_id)
@@ -0,0 +1,126 @@
+"""Per-batch request telemetry and latency percentiles across stored runs"""
+
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from database import BenchmarkResultService
+from .llm_engine import TokenUsage
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentiles(values: Sequence[float]) -> Optional[Dict[str, float]]:
+    """p50/p95/p99 of values, or None when there are none"""
+    if not values:
+        return None
+    points = np.percentile(np.asarray(values, dtype=np.float64), PERCENTILES)
+    return {f'p{p}': round(float(v), 3) for p, v in zip(PERCENTILES, points)}
+
+
+def estimate_cost(model_data: Optional[Dict], prompt_tokens: int, cached_tokens: int,
+                  completion_tokens: int) -> Optional[float]:
+    """USD cost from the model's OpenRouter per-token pricing; None if unpriced"""
+    pricing = (model_data or {}).get('pricing') or {}
+    try:
+        prompt_price = float(pricing['prompt'])
+        completion_price = float(pricing['completion'])
+        cache_price = float(pricing.get('input_cache_read') or prompt_price)
+    except (KeyError, TypeError, ValueError):
+        return None
+    cost = (prompt_tokens - cached_tokens) * prompt_price + cached_tokens * cache_price \
+        + completion_tokens * completion_price
+    return round(cost, 6)
+
+
+def batch_telemetry(batch_num: int, tests: int, status: str, usage: TokenUsage,
+                    wall_seconds: float, model_data: Optional[Dict] = None) -> Dict[str, Any]:
+    """One batch's record: its requests (including salvage and split follow-ups), tokens and cost"""
+    traces = [t.as_dict() for t in usage.traces]
+    tokens = usage.as_dict()
+    generation = sum(t['latency_seconds'] - (t['first_token_seconds'] or 0) for t in traces)
+    return {
+        'batch_num': batch_num,
+        'tests': tests,
+        'status': status,
+        'wall_seconds': round(wall_seconds, 3),
+        'requests': traces,
+        'retries': sum(max(0, t['attempts'] - 1) for t in traces),
+        'errors': [e for t in traces for e in t['errors']],
+        'queue_seconds': round(sum(t['queue_seconds'] for t in traces), 3),
+        'first_token_seconds': next((t['first_token_seconds'] for t in traces if t['first_token_seconds'] is not None), None),
+        'prompt_tokens': tokens['prompt_tokens'],
+        'cached_tokens': tokens['cached_tokens'],
+        'completion_tokens': tokens['completion_tokens'],
+        'replayed': tokens['replayed'],
+        'tokens_per_second': round(tokens['completion_tokens'] / generation, 1) if generation > 0 else None,
+        'cost': estimate_cost(model_data, tokens['prompt_tokens'], tokens['cached_tokens'], tokens['completion_tokens'])
+    }
+
+
+def summarize_batches(batches: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Run-level totals and latency percentiles over a run's batch records"""
+    requests = [r for b in batches for r in b['requests']]
+    costs = [b['cost'] for b in batches if b['cost'] is not None]
+    return {
+        'wall_seconds': round(wall_seconds, 3),
+        'num_batches': len(batches),
+        'requests': len(requests),
+        'retries': sum(b['retries'] for b in batches),
+        'errors': dict(Counter(e for b in batches for e in b['errors'])),
+        'queue_seconds': round(sum(b['queue_seconds'] for b in batches), 3),
+        'latency': percentiles([r['latency_seconds'] for r in requests]),
+        'first_token': percentiles([r['first_token_seconds'] for r in requests if r['first_token_seconds'] is not None]),
+        'prompt_tokens': sum(b['prompt_tokens'] for b in batches),
+        'cached_tokens': sum(b['cached_tokens'] for b in batches),
+        'completion_tokens': sum(b['completion_tokens'] for b in batches),
+        'cost': round(sum(costs), 6) if costs else None
+    }
+
+
+def latency_report(hours: float = 24, models: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Per-model request latency, queue wait, time to first token and tokens/sec
+    percentiles over runs created in the last `hours`, from their stored telemetry.
+    """
+    since = time.time() - hours * 3600
+    per_model: Dict[str, Dict[str, Any]] = {}
+    for run in BenchmarkResultService.get_telemetry_since(since, models):
+        telemetry = (run['run_metadata'] or {}).get('telemetry') or {}
+        batches = telemetry.get('batch_details') or []
+        if not batches:
+            continue
+        entry = per_model.setdefault(run['model'], {
+            'runs': 0, 'batches': [], 'requests': [], 'errors': Counter(), 'cost': 0.0, 'priced': False
+        })
+        entry['runs'] += 1
+        entry['batches'].extend(batches)
+        entry['requests'].extend(r for b in batches for r in b['requests'])
+        entry['errors'].update(e for b in batches for e in b['errors'])
+        if telemetry.get('cost') is not None:
+            entry['cost'] += telemetry['cost']
+            entry['priced'] = True
+
+    report = {}
+    for model, entry in sorted(per_model.items()):
+        requests = entry['requests']
+        batches = entry['batches']
+        report[model] = {
+            'runs': entry['runs'],
+            'batches': len(batches),
+            'requests': len(requests),
+            'retries': sum(b['retries'] for b in batches),
+            'errors': dict(entry['errors']),
+            'latency_seconds': percentiles([r['latency_seconds'] for r in requests]),
+            'queue_seconds': percentiles([r['queue_seconds'] for r in requests]),
+            'first_token_seconds': percentiles(
+                [r['first_token_seconds'] for r in requests if r['first_token_seconds'] is not None]
+            ),
+            'tokens_per_second': percentiles([b['tokens_per_second'] for b in batches if b['tokens_per_second']]),
+            'batch_wall_seconds': percentiles([b['wall_seconds'] for b in batches]),
+            'completion_tokens': sum(b['completion_tokens'] for b in batches),
+            'cost': round(entry['cost'], 6) if entry['priced'] else None
+        }
+    return {'hours': hours, 'since': since, 'models': report}
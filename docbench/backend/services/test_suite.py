@@ -0,0 +1,102 @@
+"""Process-wide registry of parsed and indexed test suites"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.syntax import ElementMatcherPlan
+
+
+class TestSuite:
+    """
+    An immutable, indexed view of one tests.json. Instances are shared across
+    requests and threads, so callers must treat every attribute as read-only.
+    """
+
+    # Not a pytest test class, despite the name
+    __test__ = False
+
+    def __init__(self, path: str, tests: List[Dict], digest: str):
+        self.path = path
+        self.digest = digest
+        self.tests = tests
+        self.order = {test["id"]: i for i, test in enumerate(tests)}
+        self.by_id = {test["id"]: test for test in tests}
+        self.by_category: Dict[str, List[Dict]] = {}
+        self.by_level: Dict[int, List[Dict]] = {}
+        for test in tests:
+            self.by_category.setdefault(test["category"], []).append(test)
+            self.by_level.setdefault(test["level"], []).append(test)
+
+        # Compile element matchers once per suite rather than per evaluator
+        for test in tests:
+            ElementMatcherPlan.for_test(test)
+
+        self.stats = self._build_stats()
+        self.api_stats = self._build_api_stats()
+
+    def get(self, test_id: str) -> Optional[Dict]:
+        return self.by_id.get(test_id)
+
+    def _build_stats(self) -> Dict[str, Any]:
+        """Totals in the EvaluatorService.get_test_stats shape"""
+        return {
+            'total_tests': len(self.tests),
+            'total_points': sum(t['points'] for t in self.tests),
+            'levels': {
+                level: {'count': len(tests), 'points': sum(t['points'] for t in tests)}
+                for level, tests in self.by_level.items()
+            },
+            'categories': {
+                category: {'count': len(tests), 'points': sum(t['points'] for t in tests)}
+                for category, tests in self.by_category.items()
+            }
+        }
+
+    def _build_api_stats(self) -> Dict[str, Any]:
+        """Totals in the /api/stats shape (levels 1-10 keyed as level_N)"""
+        levels = {}
+        for level in range(1, 11):
+            level_tests = self.by_level.get(level, [])
+            levels[f'level_{level}'] = {
+                'count': len(level_tests),
+                'points': sum(t['points'] for t in level_tests)
+            }
+        return {
+            'total_tests': self.stats['total_tests'],
+            'total_points': self.stats['total_points'],
+            'levels': levels,
+            'categories': self.stats['categories']
+        }
+
+
+_suites: Dict[str, Tuple[Tuple[int, int], TestSuite]] = {}
+_suites_lock = threading.Lock()
+
+
+def get_test_suite(tests_file: str = "tests.json") -> TestSuite:
+    """
+    Return the shared suite for tests_file. The file is stat'ed on every call
+    and re-parsed only when its mtime or size changes and its content hash
+    differs from the loaded suite.
+    """
+    path = os.path.abspath(tests_file)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _suites_lock:
+        entry = _suites.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if entry is not None and entry[1].digest == digest:
+            suite = entry[1]
+        else:
+            suite = TestSuite(path, json.loads(raw), digest)
+        _suites[path] = (signature, suite)
+        return suite
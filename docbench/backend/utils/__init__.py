@@ -1,6 +1,10 @@
-"""Backend utilities for syntax checking and JSON handling"""
+"""Backend utilities for syntax checking, JSON handling and HTTP clients"""
 
-from .syntax import SyntaxChecker, patch_missing_braces
-from .json_utils import repair_json
+from .syntax import SyntaxChecker, ElementMatcherPlan, patch_missing_braces
+from .ast_matcher import AstMatcherPlan, ElementIndex
+from .json_utils import repair_json, extract_complete_pairs, IncrementalPairReader
+from .jac_checker import JacCheckerPool, get_jac_checker_pool, jac_check_batch
+from .functional_runner import FunctionalTestRunner, get_functional_runner
+from .http_client import get_http_session, create_async_http_client, http_timeouts
 
-__all__ = ['SyntaxChecker', 'patch_missing_braces', 'repair_json']
+__all__ = ['SyntaxChecker', 'ElementMatcherPlan', 'AstMatcherPlan', 'ElementIndex', 'patch_missing_braces', 'repair_json', 'extract_complete_pairs', 'IncrementalPairReader', 'JacCheckerPool', 'get_jac_checker_pool', 'jac_check_batch', 'FunctionalTestRunner', 'get_functional_runner', 'get_http_session', 'create_async_http_client', 'http_timeouts']
@@ -0,0 +1,259 @@
+"""Element matching against one jaclang parse of a response"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, Union
+
+from .syntax import ARCHETYPE_KEYWORDS, compile_element_matcher
+
+# Bump whenever rule verdicts change; AST-mode evaluations are versioned with it
+AST_MATCHER_VERSION = "2"
+
+# Placeholder in a token sequence for any identifier
+NAME = object()
+
+EDGE_OPERATORS = frozenset(['-->', '<--', '<-->', '++>', '<++', '<++>'])
+ACCESS_TAGS = frozenset(['pub', 'priv', 'protect'])
+OPEN_BRACKETS = frozenset('([{')
+CLOSE_BRACKETS = frozenset(')]}')
+DOTTED_ALTERNATIVES = {'socket.notify': ('notify', 'notify_channels')}
+HAS_TYPED = re.compile(r'^has\s+(\w+)\s*:\s*(\w+)$')
+
+Part = Union[str, FrozenSet[str], object]
+Rule = Callable[['ElementIndex'], bool]
+
+
+class ElementIndex:
+    """
+    One parsed response, indexed for element rules. The structure is read
+    off the parse's leaf tokens in a single pass: archetype declarations,
+    abilities, has fields, imports, spawn and visit sites and edge operators,
+    plus every token by value for the remaining sequence rules. String
+    literals are kept apart so identifiers and keywords only match real
+    code, and comments never reach the index because they are not part of
+    the tree.
+    """
+
+    def __init__(self, tokens: Sequence[Sequence[str]]):
+        code = [(kind, value) for kind, value in tokens if kind != 'string']
+        self.kinds = [kind for kind, _ in code]
+        self.values = [value for _, value in code]
+        self.positions: Dict[str, List[int]] = {}
+        for i, value in enumerate(self.values):
+            self.positions.setdefault(value, []).append(i)
+
+        self.declarations: Dict[str, Set[str]] = {keyword: set() for keyword in ARCHETYPE_KEYWORDS}
+        self.abilities: Dict[str, Set[str]] = {'can': set(), 'def': set()}
+        self.fields: Set[Tuple[str, str]] = set()  # (name, type); type is '' when unannotated
+        self.imports: Set[str] = set()
+        self.spawns: Set[str] = set()
+        self.visits = 0
+        self.edge_ops: Set[str] = set()
+        for i, (kind, value) in enumerate(code):
+            # Keywords and operators are never names, so a field called `has` starts nothing
+            if kind == 'name':
+                continue
+            if value in self.declarations:
+                name = self._skip_access(i + 1)
+                if self._is_name(name):
+                    self.declarations[value].add(self.values[name])
+            elif value == 'can' or value == 'def':
+                name = self._skip_access(i + 1)
+                if self._is_name(name) and self._value(name + 1) == ('with' if value == 'can' else '('):
+                    self.abilities[value].add(self.values[name])
+            elif value == 'has':
+                self._index_fields(i + 1)
+            elif value == 'import':
+                self._index_imports(i + 1)
+            elif value == 'spawn':
+                if self._is_name(i + 1) and self._value(i + 2) == '(':
+                    self.spawns.add(self.values[i + 1])
+            elif value == 'visit':
+                if self._value(i + 1) not in (None, ';'):
+                    self.visits += 1
+            elif value in EDGE_OPERATORS:
+                self.edge_ops.add(value)
+
+    def _value(self, i: int) -> Optional[str]:
+        return self.values[i] if i < len(self.values) else None
+
+    def _is_name(self, i: int) -> bool:
+        return i < len(self.kinds) and self.kinds[i] == 'name'
+
+    def _skip_access(self, i: int) -> int:
+        """Index past an access tag such as `:pub`, if one starts at i"""
+        if self._value(i) == ':' and self._value(i + 1) in ACCESS_TAGS:
+            return i + 2
+        return i
+
+    def _index_fields(self, i: int):
+        """Record the fields of one `has` statement (`has a: int = 0, b: str;`)"""
+        while True:
+            i = self._skip_access(i)
+            if not self._is_name(i):
+                return
+            annotated = self._value(i + 1) == ':'
+            self.fields.add((self.values[i], (self._value(i + 2) or '') if annotated else ''))
+            depth = 0
+            i += 1
+            while True:
+                value = self._value(i)
+                if value is None:
+                    return
+                if value in OPEN_BRACKETS:
+                    depth += 1
+                elif value in CLOSE_BRACKETS:
+                    if depth == 0:
+                        return
+                    depth -= 1
+                elif depth == 0 and value == ';':
+                    return
+                elif depth == 0 and value == ',':
+                    i += 1
+                    break
+                i += 1
+
+    def _index_imports(self, i: int):
+        """Record the modules of one import (`import os, a.b;`, `import from m { x }`, `import:py m;`)"""
+        if self._value(i) == ':' and self._value(i + 1) == 'py':
+            i += 2
+        if self._value(i) == 'from':
+            i += 1
+        while self._is_name(i):
+            path = [self.values[i]]
+            while self._value(i + 1) == '.' and self._is_name(i + 2):
+                path.append(self.values[i + 2])
+                i += 2
+            self.imports.update((path[0], '.'.join(path)))
+            if self._value(i + 1) != ',':
+                return
+            i += 2
+
+    def has(self, value: str) -> bool:
+        return value in self.positions
+
+    def _part_matches(self, i: int, part: Part) -> bool:
+        if i >= len(self.values):
+            return False
+        if part is NAME:
+            return self.kinds[i] == 'name'
+        if isinstance(part, frozenset):
+            return self.values[i] in part
+        return self.values[i] == part
+
+    def sequence(self, first: str, *rest: Part) -> bool:
+        """Whether the token `first` is ever directly followed by `rest`"""
+        return any(
+            all(self._part_matches(i + offset, part) for offset, part in enumerate(rest, 1))
+            for i in self.positions.get(first, ())
+        )
+
+
+def _sequence(first: str, *rest: Part) -> Rule:
+    return lambda index: index.sequence(first, *rest)
+
+
+def _present(value: str) -> Rule:
+    return lambda index: index.has(value)
+
+
+@lru_cache(maxsize=None)
+def compile_ast_rule(element: str) -> Optional[Rule]:
+    """
+    Compile an element into a rule over an ElementIndex, or None for purely
+    lexical elements (punctuation, comment and string markers) that are
+    still answered from the source text.
+    """
+    parts = element.split()
+
+    if element in ARCHETYPE_KEYWORDS:
+        return lambda index: bool(index.declarations[element])
+    if len(parts) == 2 and parts[0] in ARCHETYPE_KEYWORDS and parts[1].isidentifier():
+        keyword, name = parts
+        return lambda index: name in index.declarations[keyword]
+
+    typed = HAS_TYPED.match(element)
+    if typed:
+        field = typed.groups()
+        return lambda index: field in index.fields
+    if element == 'has':
+        return lambda index: any(annotation for _, annotation in index.fields)
+    if element in ('can', 'def'):
+        return lambda index: bool(index.abilities[element])
+    if element == 'import':
+        return lambda index: bool(index.imports)
+    if len(parts) == 2 and parts[0] in ('has', 'can', 'def', 'import') and parts[1].isidentifier():
+        keyword, name = parts
+        if keyword == 'has':
+            return lambda index: any(field == name for field, _ in index.fields)
+        if keyword == 'import':
+            return lambda index: name in index.imports
+        return lambda index: name in index.abilities[keyword]
+
+    if element in ('with entry', 'with exit'):
+        return _sequence('with', parts[1])
+    if element == 'spawn':
+        return lambda index: bool(index.spawns)
+    if element == 'visit':
+        return lambda index: index.visits > 0
+    if element == 'by llm(':
+        return _sequence('by', 'llm', '(')
+    if element == 'by llm()':
+        return _sequence('by', 'llm', '(', ')')
+    if element == 'async':
+        return _sequence('async', frozenset(['walker', 'def']))
+    if element in ('here', 'self'):
+        return _sequence(element, '.')
+    if element == '__specs__':
+        return _sequence('obj', '__specs__')
+
+    if element in EDGE_OPERATORS:
+        return lambda index: element in index.edge_ops
+
+    if element.endswith('(') and element[:-1].isidentifier():
+        return _sequence(element[:-1], '(')
+
+    if '.' in element and '(' not in element:
+        head, _, attribute = element.rpartition('.')
+        names = DOTTED_ALTERNATIVES.get(element, (attribute,))
+        if attribute.isidentifier() and (not head or head.isidentifier()):
+            if head:
+                return _sequence(head, '.', frozenset(names), '(')
+            return _sequence('.', frozenset(names), '(')
+        return None
+
+    if element.isidentifier():
+        return _present(element)
+    return None
+
+
+class AstMatcherPlan:
+    """
+    Matcher plan answering a test's elements from one ElementIndex.
+    Elements without an AST rule use the regex matchers of ElementMatcherPlan.
+    """
+
+    def __init__(self, required: Tuple[str, ...], forbidden: Tuple[str, ...]):
+        self.required = required
+        self.forbidden = forbidden
+        self._required = [(compile_ast_rule(e), compile_element_matcher(e)) for e in required]
+        self._forbidden = [(compile_ast_rule(e), e) for e in forbidden]
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _build(required: Tuple[str, ...], forbidden: Tuple[str, ...]) -> 'AstMatcherPlan':
+        return AstMatcherPlan(required, forbidden)
+
+    @classmethod
+    def for_test(cls, test_case: Dict) -> 'AstMatcherPlan':
+        """Get the (shared, compiled-once) plan for a test definition"""
+        return cls._build(
+            tuple(test_case.get("required_elements", [])),
+            tuple(test_case.get("forbidden_elements", []))
+        )
+
+    def match(self, code: str, index: ElementIndex) -> Tuple[List[bool], List[bool]]:
+        """Return per-element hits for required and forbidden elements"""
+        required_hits = [rule(index) if rule else matcher(code) for rule, matcher in self._required]
+        forbidden_hits = [rule(index) if rule else element in code for rule, element in self._forbidden]
+        return required_hits, forbidden_hits
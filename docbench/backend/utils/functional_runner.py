@@ -0,0 +1,192 @@
+"""Sandboxed, concurrency-bounded runner for `jac test` functional harnesses"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+# Applies rlimits in the child and then execs the real command, so limits are
+# set without a preexec_fn (which is unsafe in the threaded server)
+_LAUNCHER = (
+    "import os, resource, sys\n"
+    "cpu, mem, nofile = (int(v) for v in sys.argv[1:4])\n"
+    "resource.setrlimit(resource.RLIMIT_CORE, (0, 0))\n"
+    "if cpu > 0: resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))\n"
+    "if mem > 0: resource.setrlimit(resource.RLIMIT_AS, (mem, mem))\n"
+    "if nofile > 0: resource.setrlimit(resource.RLIMIT_NOFILE, (nofile, nofile))\n"
+    "os.execvp(sys.argv[4], sys.argv[4:])\n"
+)
+
+MAX_OUTPUT_BYTES = 64 * 1024
+
+TIMEOUT_MESSAGE = "Functional test timed out"
+
+
+class FunctionalResult(NamedTuple):
+    """Outcome of one harness run; times are in seconds"""
+    passed: bool
+    output: str
+    wall_time: float
+    cpu_time: float
+
+
+def _resolve_jac() -> str:
+    # Use absolute path to jac binary in venv if available, otherwise assume in PATH
+    jac_cmd = os.path.abspath("venv/bin/jac")
+    if os.path.exists(jac_cmd):
+        return jac_cmd
+    found = shutil.which("jac")
+    if found is None:
+        raise FileNotFoundError("[Errno 2] No such file or directory: 'jac'")
+    return found
+
+
+class FunctionalTestRunner:
+    """
+    Runs generated code plus its harness with `jac test` in a fresh process
+    per test, under CPU, address-space and open-file limits and, where
+    unprivileged user namespaces work, without network access. At most
+    `max_workers` harnesses run at once. Interpreters are never reused:
+    harnesses execute arbitrary generated code whose global state would leak
+    into the next test.
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 30, cpu_seconds: int = 20,
+                 memory_mb: int = 2048, max_open_files: int = 256, isolate_network: bool = True):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_open_files = max_open_files
+        self.isolate_network = isolate_network
+        self._slots = threading.Semaphore(max(1, max_workers))
+        self._netns_supported: Optional[bool] = None
+
+    def _netns_prefix(self) -> List[str]:
+        if not self.isolate_network:
+            return []
+        if self._netns_supported is None:
+            unshare = shutil.which("unshare")
+            supported = False
+            if unshare:
+                try:
+                    supported = subprocess.run(
+                        [unshare, "--user", "--map-root-user", "--net", "true"],
+                        capture_output=True, timeout=5
+                    ).returncode == 0
+                except Exception:
+                    supported = False
+            if not supported:
+                print("Warning: network namespaces unavailable, functional tests run with network access")
+            self._netns_supported = supported
+        return ["unshare", "--user", "--map-root-user", "--net"] if self._netns_supported else []
+
+    def _command(self, jac_cmd: str, path: str) -> List[str]:
+        return [
+            *self._netns_prefix(),
+            sys.executable, "-c", _LAUNCHER,
+            str(self.cpu_seconds), str(self.memory_mb * 1024 * 1024), str(self.max_open_files),
+            jac_cmd, "test", path
+        ]
+
+    def run(self, code: str, harness: str, timeout: Optional[float] = None) -> FunctionalResult:
+        """
+        Run the harness against the code and report pass/fail, output and
+        timings. `timeout` lowers the runner's time limit for this run; it
+        also bounds the wait for a free slot.
+        """
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=None if timeout is None else max(0.0, timeout)):
+            return FunctionalResult(False, TIMEOUT_MESSAGE, time.monotonic() - start, 0.0)
+        try:
+            limit = self.timeout
+            if timeout is not None:
+                limit = min(limit, timeout - (time.monotonic() - start))
+            workdir = tempfile.mkdtemp(prefix="jac-functional-")
+            path = os.path.join(workdir, "test.jac")
+            log_path = os.path.join(workdir, "output.log")
+            try:
+                with open(path, "w") as f:
+                    f.write(code + "\n\n" + harness)
+                return self._run_sandboxed(_resolve_jac(), path, log_path, workdir, max(0.0, limit))
+            except Exception as e:
+                return FunctionalResult(False, f"Functional test failed to run: {str(e)}", 0.0, 0.0)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        finally:
+            self._slots.release()
+
+    def _run_sandboxed(self, jac_cmd: str, path: str, log_path: str, workdir: str,
+                       timeout: float) -> FunctionalResult:
+        timed_out = threading.Event()
+        start = time.monotonic()
+        with open(log_path, "wb") as log:
+            proc = subprocess.Popen(
+                self._command(jac_cmd, path),
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                cwd=workdir,
+                start_new_session=True
+            )
+
+        def kill():
+            timed_out.set()
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            # wait4 rather than Popen.wait so the child's rusage is not lost
+            _, status, rusage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        wall_time = time.monotonic() - start
+        cpu_time = rusage.ru_utime + rusage.ru_stime
+
+        if timed_out.is_set():
+            return FunctionalResult(False, TIMEOUT_MESSAGE, wall_time, cpu_time)
+
+        with open(log_path, "rb") as log:
+            output = log.read(MAX_OUTPUT_BYTES).decode("utf-8", errors="replace")
+        if proc.returncode == -signal.SIGXCPU:
+            output += f"\nFunctional test killed: CPU limit of {self.cpu_seconds}s exceeded"
+        return FunctionalResult(proc.returncode == 0, output, wall_time, cpu_time)
+
+
+_runner: Optional[FunctionalTestRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_functional_runner() -> FunctionalTestRunner:
+    """Return the process-wide functional test runner configured from the environment"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = FunctionalTestRunner(
+                max_workers=int(os.getenv('FUNCTIONAL_TEST_WORKERS', str(min(4, os.cpu_count() or 1)))),
+                timeout=float(os.getenv('FUNCTIONAL_TEST_TIMEOUT', '30')),
+                cpu_seconds=int(os.getenv('FUNCTIONAL_TEST_CPU_SECONDS', '20')),
+                memory_mb=int(os.getenv('FUNCTIONAL_TEST_MEMORY_MB', '2048')),
+                max_open_files=int(os.getenv('FUNCTIONAL_TEST_MAX_FILES', '256')),
+                isolate_network=os.getenv('FUNCTIONAL_TEST_ISOLATE_NETWORK', 'true').lower() == 'true'
+            )
+        return _runner
+
+
+def _reset_after_fork():
+    # The parent's slot semaphore may be held by threads that do not exist in the child
+    global _runner, _runner_lock
+    _runner = None
+    _runner_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,96 @@
+"""Pooled, keep-alive HTTP clients shared by all OpenRouter traffic"""
+
+import importlib.util
+import os
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def http_timeouts() -> Tuple[float, float]:
+    """
+    (connect, read) timeouts from HTTP_CONNECT_TIMEOUT and HTTP_READ_TIMEOUT.
+    The read timeout bounds the wait for each chunk, and a large
+    non-streamed batch can think for minutes before its first byte.
+    """
+    return (
+        float(os.getenv('HTTP_CONNECT_TIMEOUT', '10')),
+        float(os.getenv('HTTP_READ_TIMEOUT', '600'))
+    )
+
+
+def http_pool_size() -> int:
+    """Keep-alive connections held per host, from HTTP_POOL_SIZE"""
+    return int(os.getenv('HTTP_POOL_SIZE', '32'))
+
+
+class _TimeoutAdapter(HTTPAdapter):
+    """Applies the default timeouts to requests sent without their own"""
+
+    def __init__(self, timeout: Tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_session(base_url: str) -> requests.Session:
+    """
+    Return the process-wide session for base_url, created on first use.
+    Its connections stay open between calls, so repeated requests to the
+    same host skip the TCP and TLS handshakes.
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            pool_size = http_pool_size()
+            session = requests.Session()
+            session.mount(base_url, _TimeoutAdapter(
+                http_timeouts(), pool_connections=1, pool_maxsize=pool_size
+            ))
+            _sessions[base_url] = session
+        return session
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs httpx's optional h2 dependency"""
+    return importlib.util.find_spec('h2') is not None
+
+
+def create_async_http_client(max_connections: int):
+    """
+    An httpx.AsyncClient for the OpenAI SDK with explicit pool limits and
+    timeouts, using HTTP/2 when h2 is installed. The caller owns it: an async
+    client is bound to the event loop it is first used on.
+    """
+    import httpx
+
+    connect, read = http_timeouts()
+    return httpx.AsyncClient(
+        http2=http2_available(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60'))
+        ),
+        timeout=httpx.Timeout(read, connect=connect)
+    )
+
+
+def _reset_after_fork():
+    # Pooled sockets would be shared with the parent; the child opens its own
+    global _sessions, _sessions_lock
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
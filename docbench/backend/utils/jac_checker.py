@@ -0,0 +1,297 @@
+"""Pool of persistent jaclang worker processes for `jac check`-equivalent validation"""
+
+import atexit
+import json
+import os
+import re
+import select
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+WORKER_SCRIPT = Path(__file__).with_name('jac_worker.py')
+
+CheckResult = Tuple[bool, List[str], List[str]]
+
+CHECK_TIMEOUT_MESSAGE = "Syntax check timed out"
+
+
+class WorkerError(Exception):
+    """Raised when a worker crashes, hangs or answers garbage"""
+
+
+class _JacWorker:
+    """A single long-lived checker process"""
+
+    def __init__(self, startup_timeout: float):
+        self.checks = 0
+        self._buffer = b''
+        self.proc = subprocess.Popen(
+            [sys.executable, str(WORKER_SCRIPT)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        hello = self._read_message(startup_timeout)
+        if not hello.get('ready'):
+            self.close()
+            raise RuntimeError(hello.get('error', 'jac worker failed to start'))
+
+    def _read_message(self, timeout: float) -> dict:
+        fd = self.proc.stdout.fileno()
+        while b'\n' not in self._buffer:
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                raise TimeoutError("jac worker did not respond in time")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise WorkerError("jac worker exited unexpectedly")
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            raise WorkerError(f"Malformed worker response: {e}")
+
+    def check(self, code: str, timeout: float, index: bool = False) -> Tuple[CheckResult, Optional[List]]:
+        """Check code; with index, also return the parse's tokens (None if unparsable)"""
+        try:
+            self.proc.stdin.write((json.dumps({'code': code, 'index': index}) + '\n').encode('utf-8'))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"jac worker pipe closed: {e}")
+
+        message = self._read_message(timeout)
+        self.checks += 1
+        if not message.get('ok'):
+            raise WorkerError(message.get('error', 'unknown worker error'))
+        return (message['is_valid'], message['errors'], message['warnings']), message.get('tokens')
+
+    def close(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+class JacCheckerPool:
+    """
+    Pool of worker processes that import jaclang once and check source strings
+    in-process. Workers are recycled after `max_checks` checks, after a crash
+    or after a timeout. `check` returns None whenever the pool cannot answer
+    so callers can fall back to the `jac check` subprocess path. A worker
+    that fails to start pauses the pool for `retry_backoff` seconds, doubling
+    with each consecutive failure up to `max_retry_backoff`.
+    """
+
+    def __init__(self, size: int = 4, max_checks: int = 200,
+                 timeout: float = 10, startup_timeout: float = 60,
+                 retry_backoff: float = 5, max_retry_backoff: float = 300):
+        self.size = max(1, size)
+        self.max_checks = max_checks
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._failures = 0
+        self._retry_at = 0.0
+        self._idle: List[_JacWorker] = []
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.size)
+        self._closed = False
+
+    def _acquire_worker(self) -> Optional[_JacWorker]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            worker = _JacWorker(self.startup_timeout)
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+                delay = min(self.retry_backoff * 2 ** (self._failures - 1), self.max_retry_backoff)
+                self._retry_at = time.monotonic() + delay
+            print(f"Warning: jac worker failed to start, falling back to subprocess for {delay:g}s: {e}")
+            return None
+        with self._lock:
+            self._failures = 0
+        return worker
+
+    @property
+    def available(self) -> bool:
+        """False while the pool is closed or backing off after a failed worker start"""
+        return not self._closed and time.monotonic() >= self._retry_at
+
+    def _release_worker(self, worker: _JacWorker):
+        with self._lock:
+            if not self._closed and worker.checks < self.max_checks:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+    def is_usable(self) -> bool:
+        """Whether the pool can serve checks, starting a first worker to find out"""
+        if not self.available:
+            return False
+        with self._lock:
+            if self._idle:
+                return True
+        worker = self._acquire_worker()
+        if worker is None:
+            return False
+        self._release_worker(worker)
+        return True
+
+    def check(self, code: str, timeout: Optional[float] = None) -> Optional[CheckResult]:
+        """Check code in a pooled worker, or return None if the pool cannot answer"""
+        analysis = self.analyze(code, index=False, timeout=timeout)
+        return analysis[0] if analysis is not None else None
+
+    def analyze(self, code: str, index: bool = True,
+                timeout: Optional[float] = None) -> Optional[Tuple[CheckResult, Optional[List]]]:
+        """
+        Check code and, with index, return the tokens of the same parse for
+        AST element matching: (check result, tokens or None). Returns None
+        if the pool cannot answer. `timeout` lowers the pool's per-check
+        timeout; a worker that overruns it is killed.
+        """
+        if not self.available:
+            return None
+
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=timeout):
+            return (False, [CHECK_TIMEOUT_MESSAGE], []), None
+        try:
+            worker = self._acquire_worker()
+            if worker is None:
+                return None
+            limit = self.timeout
+            if timeout is not None:
+                limit = max(0.0, min(limit, timeout - (time.monotonic() - start)))
+            try:
+                result = worker.check(code, limit, index=index)
+            except TimeoutError:
+                worker.close()
+                return (False, [CHECK_TIMEOUT_MESSAGE], []), None
+            except WorkerError as e:
+                print(f"Warning: jac worker failed, recycling: {e}")
+                worker.close()
+                return None
+            self._release_worker(worker)
+            return result
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+_pool: Optional[JacCheckerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_jac_checker_pool() -> Optional[JacCheckerPool]:
+    """Return the process-wide checker pool, or None if disabled via JAC_CHECK_POOL"""
+    global _pool
+    if os.getenv('JAC_CHECK_POOL', 'true').lower() != 'true':
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = JacCheckerPool(
+                size=int(os.getenv('JAC_CHECK_WORKERS', str(min(4, os.cpu_count() or 1)))),
+                max_checks=int(os.getenv('JAC_CHECK_RECYCLE_AFTER', '200')),
+                timeout=float(os.getenv('JAC_CHECK_TIMEOUT', '10'))
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def _reset_after_fork():
+    # A forked child must not talk to the parent's worker pipes
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# The closing summary of `jac check`, which is not a diagnostic itself
+SUMMARY_LINE = re.compile(r'^Errors:\s*\d+,\s*Warnings:\s*\d+')
+
+
+def classify_output(output: str) -> Tuple[List[str], List[str]]:
+    """Split `jac check` output into error and warning lines"""
+    errors = []
+    warnings = []
+    for line in output.split('\n'):
+        line = line.strip()
+        if SUMMARY_LINE.match(line):
+            continue
+        if line.startswith('Error:') or ('error' in line.lower() and ':' in line):
+            errors.append(line)
+        elif line.startswith('Warning:'):
+            warnings.append(line)
+    return errors, warnings
+
+
+def _scratch_dir() -> Optional[str]:
+    """Prefer tmpfs for the many small files of a batch check"""
+    shm = '/dev/shm'
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+
+
+def _check_file(path: str, timeout: float) -> CheckResult:
+    """Check one file with `jac check`, which takes a single file per call"""
+    try:
+        result = subprocess.run(
+            ['jac', 'check', path],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return (False, [CHECK_TIMEOUT_MESSAGE], [])
+    errors, warnings = classify_output(result.stdout + result.stderr)
+    return (result.returncode == 0, errors, warnings)
+
+
+def jac_check_batch(codes: List[str], per_file_timeout: float = 10,
+                    workers: Optional[int] = None) -> List[CheckResult]:
+    """
+    Run `jac check` over many sources when the checker pool is unavailable.
+    Each source is checked by its own process, with up to `workers`
+    (JAC_CHECK_BATCH_WORKERS) running at once. Returns one
+    (is_valid, errors, warnings) per input, in order.
+    """
+    if not codes:
+        return []
+    if workers is None:
+        workers = int(os.getenv('JAC_CHECK_BATCH_WORKERS', str(os.cpu_count() or 1)))
+
+    with tempfile.TemporaryDirectory(prefix='jac-batch-', dir=_scratch_dir()) as tmpdir:
+        paths = []
+        for i, code in enumerate(codes):
+            path = os.path.join(tmpdir, f'docbench_response_{i:05d}.jac')
+            with open(path, 'w') as f:
+                f.write(code)
+            paths.append(path)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+                return list(executor.map(lambda path: _check_file(path, per_file_timeout), paths))
+        except FileNotFoundError:
+            # jac not installed, skip validation
+            return [(True, [], []) for _ in codes]
+        except Exception as e:
+            return [(False, [f"Syntax check failed: {str(e)}"], []) for _ in codes]
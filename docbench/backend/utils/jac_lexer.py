@@ -0,0 +1,50 @@
+"""Lightweight single-pass tokenizer for Jac source used by the heuristic linter"""
+
+import re
+from typing import List, NamedTuple
+
+NAME = 'name'
+NUMBER = 'number'
+STRING = 'string'
+BRACKET = 'bracket'
+SEP = 'sep'
+OP = 'op'
+
+_TOKEN_RE = re.compile(r'''\s*(?:
+    (?P<comment>\#\*[\s\S]*?(?:\*\#|\Z) | \#[^\n]*)
+  | (?P<string>[rRbBfF]{0,2}(?:"""[\s\S]*?(?:"""|\Z) | \'\'\'[\s\S]*?(?:\'\'\'|\Z)
+                             | "(?:\\.|[^"\\\n])*"? | \'(?:\\.|[^\'\\\n])*\'?))
+  | (?P<number>\d[\w.]*)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<bracket>[()\[\]{}])
+  | (?P<sep>[;,])
+  | (?P<op>[^\w\s()\[\]{};,"\'\#]+)
+)''', re.VERBOSE)
+
+
+class Token(NamedTuple):
+    """A significant token; operators are maximal runs of punctuation (e.g. '-->', '++>', '+=')"""
+    kind: str
+    value: str
+    line: int
+    end_line: int
+
+
+def tokenize(code: str) -> List[Token]:
+    """Tokenize code in one regex pass, skipping whitespace and comments"""
+    tokens = []
+    append = tokens.append
+    line = 1
+    for match in _TOKEN_RE.finditer(code):
+        kind = match.lastgroup
+        start = match.start(kind)
+        line += code.count('\n', match.start(), start)
+        value = match.group(kind)
+        if kind == 'comment' or kind == 'string':
+            end_line = line + value.count('\n')
+            if kind == 'string':
+                append(Token(kind, value, line, end_line))
+            line = end_line
+        else:
+            append(Token(kind, value, line, line))
+    return tokens
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Long-lived Jac checker worker.
+
+Imports jaclang once and checks source strings sent over stdin, one JSON
+request per line, answering with one JSON line per request on stdout.
+Started by JacCheckerPool; not meant to be imported by the backend.
+"""
+
+import inspect
+import json
+import os
+import sys
+import tempfile
+
+
+def _first_line(alert) -> str:
+    """Collapse a jaclang alert to a single diagnostic line"""
+    lines = [line.strip() for line in str(alert).splitlines() if line.strip()]
+    return lines[0] if lines else repr(alert)
+
+
+def _compile(program_cls, code: str, workdir: str):
+    """
+    Compile code with whatever signature the installed jaclang exposes.
+    Returns (program, module AST or None).
+    """
+    program = program_cls()
+    params = inspect.signature(program.compile).parameters
+    file_path = os.path.join(workdir, 'check.jac')
+    kwargs = {}
+    if 'use_str' in params:
+        kwargs['use_str'] = code
+    else:
+        with open(file_path, 'w') as f:
+            f.write(code)
+    if 'type_check' in params:
+        # `jac check` does not fail on type errors; verdicts must match the subprocess path
+        kwargs['type_check'] = False
+    module = program.compile(file_path=file_path, **kwargs)
+    if module is None or not hasattr(module, 'kid'):
+        module = getattr(getattr(program, 'mod', None), 'main', None)
+    return program, module
+
+
+# Literal text: plain strings and the text pieces and delimiters of f-strings.
+# TYP_STRING is the `str` type keyword, not a literal.
+STRING_TOKENS = frozenset(['STRING', 'F_FORMAT_TEXT', 'D_LBRACE', 'D_RBRACE'])
+FSTRING_TOKEN_PREFIXES = ('F_', 'RF_')
+
+
+def _token_kind(name: str) -> str:
+    if name == 'NAME' or name == 'KWESC_NAME':
+        return 'name'
+    if name in STRING_TOKENS or name.startswith(FSTRING_TOKEN_PREFIXES):
+        return 'string'
+    return 'token'
+
+
+def tokens(module) -> list:
+    """
+    Leaf tokens of a parsed module in source order, as [kind, value] with
+    kind 'name', 'string' or 'token' (keywords, operators, punctuation).
+    Comments are not part of the tree, so they never show up here.
+    """
+    leaves = []
+    stack = [module]
+    while stack:
+        node = stack.pop()
+        kids = getattr(node, 'kid', None)
+        if kids:
+            stack.extend(reversed(kids))
+        elif isinstance(getattr(node, 'name', None), str) and isinstance(getattr(node, 'value', None), str):
+            leaves.append(node)
+    leaves.sort(key=lambda t: (getattr(t, 'line_no', 0), getattr(t, 'c_start', 0)))
+    return [[_token_kind(t.name), t.value] for t in leaves]
+
+
+def check(program_cls, code: str, workdir: str, index: bool = False) -> dict:
+    """
+    Check a source string, mirroring the output of `jac check`. With index,
+    the tokens of the same parse are returned too (only for valid code).
+    """
+    program, module = _compile(program_cls, code, workdir)
+    errors = [f"Error: {_first_line(e)}" for e in getattr(program, 'errors_had', [])]
+    warnings = [f"Warning: {_first_line(w)}" for w in getattr(program, 'warnings_had', [])]
+    response = {'ok': True, 'is_valid': not errors, 'errors': errors, 'warnings': warnings}
+    if index:
+        response['tokens'] = tokens(module) if module is not None and not errors else None
+    return response
+
+
+def main():
+    # Keep the protocol channel private; anything jaclang prints goes to stderr
+    proto = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(payload: dict):
+        proto.write(json.dumps(payload) + '\n')
+        proto.flush()
+
+    try:
+        from jaclang.compiler.program import JacProgram
+    except Exception as e:
+        send({'ready': False, 'error': f"jaclang unavailable: {e}"})
+        return
+
+    send({'ready': True})
+    workdir = tempfile.mkdtemp(prefix='jac-worker-')
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            send(check(JacProgram, request['code'], workdir, index=request.get('index', False)))
+        except Exception as e:
+            send({'ok': False, 'error': f"{type(e).__name__}: {e}"})
+
+
+if __name__ == '__main__':
+    main()
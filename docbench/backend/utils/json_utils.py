@@ -1,6 +1,8 @@
 """JSON repair and handling utilities"""
 
 import re
+from json.decoder import scanstring
+from typing import Dict, List, Tuple
 
 
 def repair_json(json_str: str) -> str:
@@ -48,3 +50,71 @@ def repair_json(json_str: str) -> str:
     json_str = re.sub(r',(\s*[}\]])', r'\1', json_str)
 
     return json_str
+
+
+def extract_complete_pairs(json_str: str) -> Dict[str, str]:
+    """
+    Incrementally parse a JSON object of string values, returning every
+    fully terminated "key": "value" pair. Parsing stops at the first pair
+    that is cut off or malformed, so a truncated completion still yields
+    all the answers before the cut.
+    """
+    return dict(IncrementalPairReader().feed(json_str))
+
+
+class IncrementalPairReader:
+    """
+    Reads a JSON object of string values as it streams in. Each feed()
+    returns the "key": "value" pairs whose value string it closed, so a
+    consumer can act on an answer the moment it is complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self.buffer += chunk
+        if self.pos is None:
+            start = self.buffer.find('{')
+            if start == -1:
+                return []
+            self.pos = start + 1
+        elif '"' not in chunk:
+            # A value string can only be closed by a quote
+            return []
+        pairs, self.pos = _scan_pairs(self.buffer, self.pos)
+        return pairs
+
+
+def _scan_pairs(text: str, pos: int) -> Tuple[List[Tuple[str, str]], int]:
+    """Complete pairs from pos on, and the position after the last of them"""
+    pairs = []
+    end = len(text)
+    while True:
+        cursor = _skip(text, pos, ' \t\r\n,')
+        if cursor >= end or text[cursor] != '"':
+            break
+        try:
+            key, cursor = scanstring(text, cursor + 1)
+        except ValueError:
+            break
+        cursor = _skip(text, cursor, ' \t\r\n')
+        if cursor >= end or text[cursor] != ':':
+            break
+        cursor = _skip(text, cursor + 1, ' \t\r\n')
+        if cursor >= end or text[cursor] != '"':
+            break
+        try:
+            value, cursor = scanstring(text, cursor + 1)
+        except ValueError:
+            break
+        pairs.append((key, value))
+        pos = cursor
+    return pairs, pos
+
+
+def _skip(text: str, pos: int, chars: str) -> int:
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
@@ -1,7 +1,10 @@
 """Jac language syntax validation utilities"""
 
 import re
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .jac_lexer import Token, tokenize, NAME, NUMBER, BRACKET, OP
 
 
 def patch_missing_braces(code: str) -> Tuple[str, bool]:
@@ -38,219 +41,463 @@ def patch_missing_braces(code: str) -> Tuple[str, bool]:
     return code, was_patched
 
 
-class SyntaxChecker:
-    """Validates Jac language syntax"""
-
-    @staticmethod
-    def validate_element_strict(code: str, element: str) -> bool:
-        """
-        Strictly validate element presence with context-aware pattern matching.
-        Returns True only if element appears in proper syntactic context.
-        """
-        code_normalized = ' '.join(code.split())
-
-        strict_patterns = {
-            'walker': r'\bwalker\s+\w+\s*\{',
-            'node': r'\bnode\s+\w+\s*\{',
-            'edge': r'\bedge\s+\w+\s*\{',
-            'obj': r'\bobj\s+\w+\s*\{',
-            'enum': r'\benum\s+\w+\s*\{',
-            'has': r'\bhas\s+\w+\s*:\s*\w+',
-            'can': r'\bcan\s+\w+\s+with\s+',
-            'with entry': r'\bwith\s+entry\s*\{',
-            'with exit': r'\bwith\s+exit\s*\{',
-            'visit': r'\bvisit\s+[^\s;]+',
-            'spawn': r'\bspawn\s+\w+\s*\(',
-            'by llm': r'\bby\s+llm\s*\(',
-            'import': r'\bimport\s+',
-            'from': r'\bfrom\s+\w+\s*\{',
-            'return': r'\breturn\s+',
-            'report': r'\breport\s+',
-            'def': r'\bdef\s+\w+\s*\(',
-            'async': r'\basync\s+(walker|def)',
-            '__specs__': r'\bobj\s+__specs__\s*\{',
-            'socket.notify': r'socket\.notify(_channels)?\s*\(',
-            'here': r'\bhere\s*\.',
-            'self': r'\bself\s*\.',
-            '-[': r'-\[\w+\]->',
-            '-->': r'-->',
-            '<--': r'<--',
-        }
-
-        if element in strict_patterns:
-            pattern = strict_patterns[element]
-            if re.search(pattern, code):
-                return True
-            return False
-
-        if ':' in element and 'has' not in code:
-            return False
-
-        if element.startswith('def ') and 'def' in code:
-            func_name = element.split()[1] if len(element.split()) > 1 else None
-            if func_name:
-                pattern = rf'\bdef\s+{re.escape(func_name)}\s*\([^)]*\)'
-                return bool(re.search(pattern, code))
-
-        for keyword in ['walker', 'node', 'edge', 'obj', 'enum']:
-            if element.startswith(keyword + ' '):
-                name = element.split()[1] if len(element.split()) > 1 else None
-                if name:
-                    pattern = rf'\b{keyword}\s+{re.escape(name)}\s*\{{'
-                    return bool(re.search(pattern, code))
-
-        if '.' in element and '(' not in element:
-            method_pattern = re.escape(element) + r'\s*\('
-            if re.search(method_pattern, code):
-                return True
-            return False
-
-        if element.count('.') == 1 and '(' not in element:
-            parts = element.split('.')
-            if len(parts) == 2:
-                pattern = rf'\b{re.escape(parts[0])}\.{re.escape(parts[1])}\b'
-                return bool(re.search(pattern, code))
-
-        if element.startswith('"') or element.startswith("'"):
-            return element in code
-
-        if element in ['==', '!=', '<=', '>=', '+=', '-=', '*=', '/=', '**', '//',
-                       '<<', '>>', '&', '|', '^', '~', 'and', 'or', 'not', 'in', 'is']:
-            return element in code
-
-        if element.replace('_', '').isalnum():
-            pattern = rf'\b{re.escape(element)}\b'
-            return bool(re.search(pattern, code))
-        else:
-            return element in code
-
-    @staticmethod
-    def check_syntax(code: str) -> List[str]:
-        """Enhanced syntax validation checks for Jac code"""
-        checks = []
-
-        if re.search(r'\bwith entry\b', code) and not re.search(r'with entry\s*{', code):
-            checks.append("[WARN] 'with entry' should be followed by a block { }")
-
-        if re.search(r'\bwith exit\b', code) and not re.search(r'with exit\s*{', code):
-            checks.append("[WARN] 'with exit' should be followed by a block { }")
-
-        for keyword in ['walker', 'node', 'edge', 'obj', 'enum']:
-            if re.search(rf'\b{keyword}\s+\w+\b', code):
-                if not re.search(rf'\b{keyword}\s+\w+\s*{{', code):
-                    checks.append(f"[WARN] '{keyword}' declaration should be followed by opening brace {{")
-
-        if re.search(r'\bcan\s+\w+\b', code):
-            if not re.search(r'\bcan\s+\w+\s+with\s+', code):
-                checks.append("[WARN] 'can' ability should include 'with' clause (e.g., 'can ability_name with entry')")
-
-        if re.search(r'\bvisit\b(?!\s+[^\s;]+)', code):
-            checks.append("[WARN] 'visit' should be followed by a target")
-
-        if re.search(r'\bspawn\b', code) and not re.search(r'\bspawn\s+\w+\s*\(', code):
-            checks.append("[WARN] 'spawn' should be followed by walker name and parentheses")
-
-        if re.search(r'\bby\s+llm\b', code) and not re.search(r'\bby\s+llm\s*\(', code):
-            checks.append("[WARN] 'by llm' should be followed by parentheses (e.g., 'by llm()')")
-
-        if re.search(r'\bhas\s+\w+\s*[=;]', code):
-            if not re.search(r'\bhas\s+\w+\s*:\s*\w+', code):
-                checks.append("[WARN] 'has' attributes should have type annotations (e.g., 'has name: str')")
+STRICT_PATTERNS = {
+    'walker': re.compile(r'\bwalker\s+\w+\s*\{'),
+    'node': re.compile(r'\bnode\s+\w+\s*\{'),
+    'edge': re.compile(r'\bedge\s+\w+\s*\{'),
+    'obj': re.compile(r'\bobj\s+\w+\s*\{'),
+    'enum': re.compile(r'\benum\s+\w+\s*\{'),
+    'has': re.compile(r'\bhas\s+\w+\s*:\s*\w+'),
+    'can': re.compile(r'\bcan\s+\w+\s+with\s+'),
+    'with entry': re.compile(r'\bwith\s+entry\s*\{'),
+    'with exit': re.compile(r'\bwith\s+exit\s*\{'),
+    'visit': re.compile(r'\bvisit\s+[^\s;]+'),
+    'spawn': re.compile(r'\bspawn\s+\w+\s*\('),
+    'by llm': re.compile(r'\bby\s+llm\s*\('),
+    'import': re.compile(r'\bimport\s+'),
+    'from': re.compile(r'\bfrom\s+\w+\s*\{'),
+    'return': re.compile(r'\breturn\s+'),
+    'report': re.compile(r'\breport\s+'),
+    'def': re.compile(r'\bdef\s+\w+\s*\('),
+    'async': re.compile(r'\basync\s+(walker|def)'),
+    '__specs__': re.compile(r'\bobj\s+__specs__\s*\{'),
+    'socket.notify': re.compile(r'socket\.notify(_channels)?\s*\('),
+    'here': re.compile(r'\bhere\s*\.'),
+    'self': re.compile(r'\bself\s*\.'),
+    '-[': re.compile(r'-\[\w+\]->'),
+    '-->': re.compile(r'-->'),
+    '<--': re.compile(r'<--'),
+}
+
+ARCHETYPE_KEYWORDS = ('walker', 'node', 'edge', 'obj', 'enum')
+
+SUBSTRING_ELEMENTS = frozenset([
+    '==', '!=', '<=', '>=', '+=', '-=', '*=', '/=', '**', '//',
+    '<<', '>>', '&', '|', '^', '~', 'and', 'or', 'not', 'in', 'is'
+])
+
+
+class ElementMatcher:
+    """
+    Precompiled check for one required element.
+    `word` is set when the element is a bare identifier, which a plan can
+    resolve with a single combined scan instead of a per-element search.
+    """
 
-        if re.search(r'\basync\b', code):
-            if not re.search(r'\basync\s+(walker|def)\b', code):
-                checks.append("[WARN] 'async' should be used before 'walker' or 'def'")
+    __slots__ = ('element', 'word', '_match')
 
-        open_braces = code.count('{')
-        close_braces = code.count('}')
-        if open_braces != close_braces:
-            checks.append(f"[WARN] Mismatched braces: {open_braces} opening, {close_braces} closing")
+    def __init__(self, element: str, match: Callable[[str], bool], word: Optional[str] = None):
+        self.element = element
+        self.word = word
+        self._match = match
 
-        open_brackets = code.count('[')
-        close_brackets = code.count(']')
-        if open_brackets != close_brackets:
-            checks.append(f"[WARN] Mismatched brackets: {open_brackets} opening, {close_brackets} closing")
+    def __call__(self, code: str) -> bool:
+        return self._match(code)
 
-        open_parens = code.count('(')
-        close_parens = code.count(')')
-        if open_parens != close_parens:
-            checks.append(f"[WARN] Mismatched parentheses: {open_parens} opening, {close_parens} closing")
 
-        lines = code.split('\n')
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-            if not stripped or stripped.startswith('#') or stripped.startswith('*#'):
-                continue
+def _searcher(pattern: str) -> Callable[[str], bool]:
+    compiled = re.compile(pattern)
+    return lambda code: compiled.search(code) is not None
 
-            needs_semi = any(keyword in stripped for keyword in [
-                'glob ', 'has ', 'print(', 'report ', 'import ', 'include ',
-                'disengage', 'raise ', 'return ', 'break', 'continue'
-            ])
 
-            no_semi_start = ('def ', 'obj ', 'node ', 'edge ', 'walker ', 'enum ',
-                            'can ', 'if ', 'elif ', 'else', 'for ', 'while ',
-                            'try', 'except', 'match ', 'case ', 'async def',
-                            'with ', 'class ')
-            no_semi_end = ('{', '}', ':', ',', '\\')
+def _compile_fallback(element: str) -> Tuple[Callable[[str], bool], Optional[str]]:
+    """Element rules that apply after the strict-pattern and def checks"""
+    parts = element.split()
 
-            has_assignment = '=' in stripped and not stripped.startswith(no_semi_start)
+    for keyword in ARCHETYPE_KEYWORDS:
+        if element.startswith(keyword + ' ') and len(parts) > 1:
+            return _searcher(rf'\b{keyword}\s+{re.escape(parts[1])}\s*\{{'), None
 
-            if (needs_semi or has_assignment) and not stripped.startswith(no_semi_start):
-                if not stripped.endswith(no_semi_end) and not stripped.endswith(';'):
-                    checks.append(f"[WARN] Line {i} may be missing semicolon: {stripped[:60]}")
+    if '.' in element and '(' not in element:
+        return _searcher(re.escape(element) + r'\s*\('), None
 
-        if re.search(r'has\s+\w+\s*=', code) and not re.search(r'has\s+\w+\s*:\s*\w+', code):
-            checks.append("[WARN] Attributes should have type annotations (has name: type)")
+    if element.startswith('"') or element.startswith("'") or element in SUBSTRING_ELEMENTS:
+        return (lambda code: element in code), None
 
-        if re.search(r'def\s+\w+\s*\([^)]*\w+\s*\)', code):
-            if not re.search(r'def\s+\w+\s*\([^)]*:\s*\w+', code):
-                checks.append("[WARN] Function parameters should have type annotations")
+    if element.replace('_', '').isalnum():
+        return _searcher(rf'\b{re.escape(element)}\b'), element
+    return (lambda code: element in code), None
 
-        if 'def ' in code and 'return' in code:
-            if not re.search(r'def\s+\w+[^{]*->\s*\w+', code):
-                checks.append("[WARN] Functions with return statements should have return type annotations (-> type)")
 
-        if re.search(r'\bnode\s+\w+\s+\w+', code):
-            checks.append("[WARN] Node declaration should use 'node ClassName {' syntax")
+@lru_cache(maxsize=None)
+def compile_element_matcher(element: str) -> ElementMatcher:
+    """Compile an element into a matcher with the same verdicts as validate_element_strict"""
+    if element in STRICT_PATTERNS:
+        pattern = STRICT_PATTERNS[element]
+        return ElementMatcher(element, lambda code: pattern.search(code) is not None)
 
-        if re.search(r'\bedge\s+\w+\s+\w+', code):
-            checks.append("[WARN] Edge declaration should use 'edge ClassName {' syntax")
+    needs_has = ':' in element
+    parts = element.split()
+    def_pattern = None
+    if element.startswith('def ') and len(parts) > 1:
+        def_pattern = re.compile(rf'\bdef\s+{re.escape(parts[1])}\s*\([^)]*\)')
+    fallback, word = _compile_fallback(element)
 
-        if re.search(r'\bwalker\s+\w+\s+\w+', code):
-            checks.append("[WARN] Walker declaration should use 'walker ClassName {' syntax")
+    if not needs_has and def_pattern is None:
+        return ElementMatcher(element, fallback, word)
 
-        if '-->' in code and not any(op in code for op in ['[-->', '-->]', '++>', '+>:']):
-            checks.append("[WARN] Navigation operator '-->' should be used in visit statements with brackets")
-
-        if 'visit' in code and not re.search(r'visit\s+\[', code):
-            checks.append("[WARN] Visit statements should use bracket notation: visit [...]")
+    def match(code: str) -> bool:
+        if needs_has and 'has' not in code:
+            return False
+        if def_pattern is not None and 'def' in code:
+            return def_pattern.search(code) is not None
+        return fallback(code)
 
-        if 'glob ' in code and ':g:' not in code:
-            checks.append("[WARN] Global variables should be accessed with :g: notation")
+    return ElementMatcher(element, match)
 
-        if '?' in code and '`?' not in code and 'visit' in code:
-            checks.append("[WARN] Type filtering in visit should use backtick: `?Type")
 
-        if 'spawn' in code and not re.search(r'(root|here|\w+)\s+spawn\s+\w+', code):
-            checks.append("[WARN] Spawn should follow pattern: 'node spawn walker_instance'")
+class ElementMatcherPlan:
+    """
+    Matcher plan for one test's required/forbidden elements.
+    Identifier elements are resolved together by one combined word scan;
+    everything else uses its precompiled matcher.
+    """
 
-        if 'can ' in code and 'with' in code:
-            if not re.search(r'can\s+\w+\s+with\s+(entry|exit)', code):
-                checks.append("[WARN] Abilities should use 'can ability_name with entry/exit' syntax")
+    def __init__(self, required: Tuple[str, ...], forbidden: Tuple[str, ...]):
+        self.required = required
+        self.forbidden = forbidden
+        self._matchers = [compile_element_matcher(e) for e in required]
+        words = sorted({m.word for m in self._matchers if m.word}, key=len, reverse=True)
+        self._word_scan = re.compile(
+            r'\b(?:' + '|'.join(re.escape(w) for w in words) + r')\b'
+        ) if words else None
 
-        if 'by llm(' in code and 'def' in code:
-            if not re.search(r'def\s+\w+[^{]*by\s+llm\(\)', code):
-                checks.append("[WARN] AI functions should use 'def func() -> type by llm()' syntax")
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _build(required: Tuple[str, ...], forbidden: Tuple[str, ...]) -> 'ElementMatcherPlan':
+        return ElementMatcherPlan(required, forbidden)
+
+    @classmethod
+    def for_test(cls, test_case: Dict) -> 'ElementMatcherPlan':
+        """Get the (shared, compiled-once) plan for a test definition"""
+        return cls._build(
+            tuple(test_case.get("required_elements", [])),
+            tuple(test_case.get("forbidden_elements", []))
+        )
+
+    def match(self, code: str) -> Tuple[List[bool], List[bool]]:
+        """Return per-element hits for required and forbidden elements"""
+        found_words = set(self._word_scan.findall(code)) if self._word_scan else set()
+        required_hits = [
+            m.word in found_words if m.word else m(code)
+            for m in self._matchers
+        ]
+        forbidden_hits = [element in code for element in self.forbidden]
+        return required_hits, forbidden_hits
 
-        if '__specs__' in code:
-            if not re.search(r'obj\s+__specs__\s*{', code):
-                checks.append("[WARN] Walker specs should use 'obj __specs__ { static has ... }' syntax")
 
-        if re.search(r'import\s+\w+\s*(?!;|from)', code):
-            checks.append("[WARN] Import statements should end with semicolon")
+class SyntaxChecker:
+    """Validates Jac language syntax"""
 
-        if any(op in code for op in ['++>', '<++>', '+>:', '<+:']):
-            if not re.search(r'\w+\s*(-->|<-->|<--|\+\+>|<\+\+>|\+>:|<\+:)', code):
-                checks.append("[WARN] Connection operators should be used between nodes")
+    @staticmethod
+    def validate_element_strict(code: str, element: str) -> bool:
+        """
+        Strictly validate element presence with context-aware pattern matching.
+        Returns True only if element appears in proper syntactic context.
+        """
+        return compile_element_matcher(element)(code)
 
-        return checks
+    @staticmethod
+    def check_syntax(code: str) -> List[str]:
+        """Heuristic syntax checks for Jac code, as '[WARN] ...' messages"""
+        return [d.message for d in lint(code)]
+
+
+DIAGNOSTIC_MESSAGES = {
+    'W01': "'with entry' should be followed by a block {{ }}",
+    'W02': "'with exit' should be followed by a block {{ }}",
+    'W03': "'{0}' declaration should be followed by opening brace {{",
+    'W04': "'can' ability should include 'with' clause (e.g., 'can ability_name with entry')",
+    'W05': "'visit' should be followed by a target",
+    'W06': "'spawn' should be followed by walker name and parentheses",
+    'W07': "'by llm' should be followed by parentheses (e.g., 'by llm()')",
+    'W08': "'has' attributes should have type annotations (e.g., 'has name: str')",
+    'W09': "'async' should be used before 'walker' or 'def'",
+    'W10': "Mismatched braces: {0} opening, {1} closing",
+    'W11': "Mismatched brackets: {0} opening, {1} closing",
+    'W12': "Mismatched parentheses: {0} opening, {1} closing",
+    'W13': "Line {0} may be missing semicolon: {1}",
+    'W14': "Attributes should have type annotations (has name: type)",
+    'W15': "Function parameters should have type annotations",
+    'W16': "Functions with return statements should have return type annotations (-> type)",
+    'W17': "{0} declaration should use '{1} ClassName {{' syntax",
+    'W18': "Navigation operator '-->' should be used in visit statements with brackets",
+    'W19': "Visit statements should use bracket notation: visit [...]",
+    'W20': "Global variables should be accessed with :g: notation",
+    'W21': "Type filtering in visit should use backtick: `?Type",
+    'W22': "Spawn should follow pattern: 'node spawn walker_instance'",
+    'W23': "Abilities should use 'can ability_name with entry/exit' syntax",
+    'W24': "AI functions should use 'def func() -> type by llm()' syntax",
+    'W25': "Walker specs should use 'obj __specs__ {{ static has ... }}' syntax",
+    'W26': "Import statements should end with semicolon",
+    'W27': "Connection operators should be used between nodes",
+}
+
+
+class SyntaxDiagnostic(NamedTuple):
+    """A heuristic lint finding: message code, 1-based line (if any) and message arguments"""
+    code: str
+    line: Optional[int]
+    args: Tuple = ()
+
+    @property
+    def message(self) -> str:
+        text = DIAGNOSTIC_MESSAGES[self.code].format(*self.args)
+        if self.line is not None and self.code != 'W13':
+            text += f" (line {self.line})"
+        return f"[WARN] {text}"
+
+
+SEMICOLON_KEYWORDS = frozenset([
+    'glob', 'has', 'report', 'import', 'include', 'disengage', 'raise', 'return', 'break', 'continue'
+])
+BLOCK_KEYWORDS = frozenset([
+    'def', 'obj', 'node', 'edge', 'walker', 'enum', 'can', 'if', 'elif', 'else', 'for', 'while',
+    'try', 'except', 'match', 'case', 'with', 'class'
+])
+STATEMENT_ENDINGS = ('{', '}', ':', ',', '\\', ';')
+CONNECT_OPS = ('++>', '<++>', '+>:', '<+:')
+EDGE_OPS = ('-->', '<-->', '<--') + CONNECT_OPS
+
+
+LINT_NAMES = frozenset(
+    ('with', 'can', 'visit', 'spawn', 'by', 'has', 'async', 'def', 'return', 'glob', '__specs__', 'import')
+    + ARCHETYPE_KEYWORDS
+)
+
+
+def lint(code: str) -> List[SyntaxDiagnostic]:
+    """
+    Run every heuristic check over a single token stream.
+    String literals and comments never trigger warnings; findings that are
+    about a specific construct carry the line of its first bad occurrence.
+    """
+    tokens = tokenize(code)
+    n = len(tokens)
+    first = {}      # fact -> line of first occurrence
+    good = set()    # facts satisfied somewhere in the code
+    counts = {c: 0 for c in '{}[]()'}
+    lines = None
+    diagnostics = []
+    semicolon_diagnostics = []
+
+    def seen(fact: str, line: int):
+        if fact not in first:
+            first[fact] = line
+
+    def value_at(i: int) -> Optional[str]:
+        return tokens[i][1] if i < n else None
+
+    def name_at(i: int) -> Optional[str]:
+        return tokens[i][1] if i < n and tokens[i][0] == NAME else None
+
+    # Per-line state for the semicolon heuristic
+    line_no, line_head, needs_semi, has_assignment = 0, -1, False, False
+
+    def end_line(last: int):
+        nonlocal lines
+        if not (needs_semi or has_assignment) or line_head < 0:
+            return
+        head, tail = tokens[line_head], tokens[last]
+        if tail[3] != tail[2] or tail[1].endswith(STATEMENT_ENDINGS):
+            return
+        if head[0] == NAME and (head[1] in BLOCK_KEYWORDS or (
+                head[1] == 'async' and line_head < last and tokens[line_head + 1][1] == 'def')):
+            return
+        if lines is None:
+            lines = code.split('\n')
+        snippet = lines[line_no - 1].strip()[:60]
+        semicolon_diagnostics.append(SyntaxDiagnostic('W13', line_no, (line_no, snippet)))
+
+    for i, (kind, value, line, _) in enumerate(tokens):
+        if line != line_no:
+            end_line(i - 1)
+            line_no, line_head, needs_semi, has_assignment = line, i, False, False
+
+        if kind == NAME:
+            if value in SEMICOLON_KEYWORDS or (value == 'print' and value_at(i + 1) == '('):
+                needs_semi = True
+            if value not in LINT_NAMES:
+                continue
+        elif kind == BRACKET:
+            counts[value] += 1
+            if value == '[' and i > 0 and tokens[i - 1][1] == 'visit':
+                good.add('visit_bracket')
+            continue
+        elif kind == OP:
+            if '=' in value:
+                has_assignment = True
+            if '-->' in value:
+                seen('nav_arrow', line)
+                if (i > 0 and tokens[i - 1][1] == '[') or value_at(i + 1) == ']':
+                    good.add('nav_arrow')
+            if '+' in value:
+                if '++>' in value or '+>:' in value:
+                    good.add('nav_arrow')
+                if any(op in value for op in CONNECT_OPS):
+                    seen('connect', line)
+            if '--' in value or '+' in value:
+                if any(op in value for op in EDGE_OPS) and i > 0 and (
+                        tokens[i - 1][0] == NAME or tokens[i - 1][1] in (')', ']')):
+                    good.add('connect')
+            if '?' in value:
+                seen('question', line)
+                if '`?' in value:
+                    good.add('question')
+            if value.endswith(':') and name_at(i + 1) in ('g', 'global') and (value_at(i + 2) or '').startswith(':'):
+                good.add('glob')
+            continue
+        else:
+            continue
+
+        nxt = name_at(i + 1)
+
+        if value == 'with':
+            seen('with_kw', line)
+            if nxt in ('entry', 'exit'):
+                seen(f'with_{nxt}', line)
+                if value_at(i + 2) == '{':
+                    good.add(f'with_{nxt}')
+        elif value in ARCHETYPE_KEYWORDS:
+            if nxt:
+                seen(f'decl_{value}', line)
+                if value_at(i + 2) == '{':
+                    good.add(f'decl_{value}')
+                if value in ('node', 'edge', 'walker') and name_at(i + 2):
+                    seen(f'decl_shape_{value}', line)
+                if value == 'obj' and nxt == '__specs__' and value_at(i + 2) == '{':
+                    good.add('specs')
+        elif value == 'can':
+            seen('can_kw', line)
+            if nxt:
+                seen('can', line)
+                if name_at(i + 2) == 'with':
+                    good.add('can')
+                    if name_at(i + 3) in ('entry', 'exit'):
+                        good.add('ability')
+        elif value == 'visit':
+            seen('visit', line)
+            if value_at(i + 1) in (None, ';', '}'):
+                seen('visit_target', line)
+        elif value == 'spawn':
+            seen('spawn', line)
+            if nxt and value_at(i + 2) == '(':
+                good.add('spawn')
+            if nxt and i > 0 and (tokens[i - 1][0] == NAME or tokens[i - 1][1] == ')'):
+                good.add('spawn_pattern')
+        elif value == 'by':
+            if nxt == 'llm':
+                seen('by_llm', line)
+                if value_at(i + 2) == '(':
+                    good.add('by_llm')
+                    seen('by_llm_call', line)
+        elif value == 'has':
+            if nxt:
+                after = value_at(i + 2)
+                if after in ('=', ';'):
+                    seen('has', line)
+                    if after == '=':
+                        seen('has_assign', line)
+                elif after == ':' and name_at(i + 3):
+                    good.add('has')
+        elif value == 'async':
+            seen('async', line)
+            if nxt in ('walker', 'def'):
+                good.add('async')
+        elif value == 'def':
+            seen('def', line)
+            if nxt:
+                _scan_def(tokens, i + 1, good, seen)
+            elif value_at(i + 1) == ':' and name_at(i + 2):
+                _scan_def(tokens, i + 2, good, seen)
+        elif value == 'return':
+            seen('return', line)
+        elif value == 'glob':
+            seen('glob', line)
+        elif value == '__specs__':
+            seen('specs', line)
+        elif value == 'import' and nxt != 'from':
+            j = i + 1
+            while j < n and (tokens[j][0] == NAME or tokens[j][1] in ('.', ',', ':')):
+                j += 1
+            if j > i + 1 and value_at(j) not in (';', '{'):
+                seen('import', line)
+
+    end_line(n - 1)
+
+    def warn(fact: str, code_id: str, *args):
+        if fact in first and fact not in good:
+            diagnostics.append(SyntaxDiagnostic(code_id, first[fact], args))
+
+    warn('with_entry', 'W01')
+    warn('with_exit', 'W02')
+    for keyword in ARCHETYPE_KEYWORDS:
+        warn(f'decl_{keyword}', 'W03', keyword)
+    warn('can', 'W04')
+    if 'visit_target' in first:
+        diagnostics.append(SyntaxDiagnostic('W05', first['visit_target']))
+    warn('spawn', 'W06')
+    warn('by_llm', 'W07')
+    warn('has', 'W08')
+    warn('async', 'W09')
+
+    for code_id, (open_c, close_c) in (('W10', '{}'), ('W11', '[]'), ('W12', '()')):
+        if counts[open_c] != counts[close_c]:
+            diagnostics.append(SyntaxDiagnostic(code_id, None, (counts[open_c], counts[close_c])))
+
+    diagnostics.extend(semicolon_diagnostics)
+
+    warn('has_assign', 'W14')
+    warn('def_params', 'W15')
+    if 'def' in first and 'return' in first and 'def_return' not in good:
+        diagnostics.append(SyntaxDiagnostic('W16', first['return']))
+    for keyword in ('node', 'edge', 'walker'):
+        if f'decl_shape_{keyword}' in first:
+            diagnostics.append(SyntaxDiagnostic('W17', first[f'decl_shape_{keyword}'], (keyword.capitalize(), keyword)))
+    warn('nav_arrow', 'W18')
+    if 'visit' in first and 'visit_bracket' not in good:
+        diagnostics.append(SyntaxDiagnostic('W19', first['visit']))
+    warn('glob', 'W20')
+    if 'visit' in first:
+        warn('question', 'W21')
+    if 'spawn' in first and 'spawn_pattern' not in good:
+        diagnostics.append(SyntaxDiagnostic('W22', first['spawn']))
+    if 'can_kw' in first and 'with_kw' in first and 'ability' not in good:
+        diagnostics.append(SyntaxDiagnostic('W23', first['can_kw']))
+    if 'def' in first:
+        warn('by_llm_call', 'W24')
+    warn('specs', 'W25')
+    warn('import', 'W26')
+    warn('connect', 'W27')
+
+    return diagnostics
+
+
+def _scan_def(tokens: List[Token], name_idx: int, good: set, seen: Callable):
+    """Inspect the header following a def's name token for parameter and return annotations"""
+    n = len(tokens)
+    j = name_idx + 1
+    if j < n and tokens[j].value == '(':
+        j += 1
+        prev = None
+        while j < n and tokens[j].value != ')':
+            tok = tokens[j]
+            if tok.value == ':' and j + 1 < n and tokens[j + 1].kind == NAME:
+                good.add('def_params')
+            prev = tok
+            j += 1
+        if prev is not None and prev.kind in (NAME, NUMBER):
+            seen('def_params', tokens[name_idx].line)
+
+    # Header runs until the opening brace of the body
+    j = name_idx + 1
+    while j < n and tokens[j].value != '{':
+        tok = tokens[j]
+        if tok.value == '->' and j + 1 < n and tokens[j + 1].kind == NAME:
+            good.add('def_return')
+        if (tok.value == 'by' and j + 3 < n and tokens[j + 1].value == 'llm'
+                and tokens[j + 2].value == '(' and tokens[j + 3].value == ')'):
+            good.add('by_llm_call')
+        if tok.value == ';':
+            break
+        j += 1
@@ -94,7 +94,7 @@ export default function BenchmarkControls({
 					onBlur={(e) => { if (!e.target.value || parseInt(e.target.value) < 1) setBatchSize(45); }}
 					disabled={isRunning}
 					className="w-16 px-2 py-2 bg-zinc-900 border border-terminal-border rounded text-gray-300 text-sm focus:outline-none focus:border-terminal-accent disabled:opacity-50 disabled:cursor-not-allowed text-center"
-					title="Tests per batch"
+					title="Maximum tests per batch (smaller if the model's context or output limit requires it)"
 				/>
 			</div>
 
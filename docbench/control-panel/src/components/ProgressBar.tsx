@@ -88,6 +88,10 @@ export default function ProgressBar({ status, onBatchClick, rerunningBatches }:
 												? "bg-green-900 text-green-300"
 												: bs.status === "failed"
 												? "bg-red-900 text-red-300"
+												: bs.status === "partial"
+												? "bg-orange-900 text-orange-300"
+												: bs.status === "split" || bs.status === "salvage"
+												? "bg-yellow-900 text-yellow-300"
 												: bs.status === "running" && bs.retry > 0
 												? "bg-yellow-900 text-yellow-300"
 												: bs.status === "running"
@@ -100,6 +104,10 @@ export default function ProgressBar({ status, onBatchClick, rerunningBatches }:
 											? `${batchNum}...`
 											: bs.status === "running" && bs.retry > 0
 											? `${batchNum}: ${bs.retry}/${bs.max_retries}`
+											: bs.status === "split" || bs.status === "salvage"
+											? `${batchNum}: ${bs.status}`
+											: bs.status === "running" && bs.answered
+											? `${batchNum}: ${bs.answered}`
 											: batchNum}
 									</button>
 								);
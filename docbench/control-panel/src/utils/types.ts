@@ -43,9 +43,10 @@ export interface TestFile {
 }
 
 export interface BatchStatus {
-	status: "pending" | "running" | "completed" | "failed";
+	status: "pending" | "running" | "split" | "salvage" | "partial" | "completed" | "failed";
 	retry: number;
 	max_retries: number;
+	answered?: number;
 }
 
 export interface BenchmarkStatus {
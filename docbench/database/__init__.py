@@ -4,6 +4,11 @@ from .models import (
     BenchmarkResult,
     BenchmarkRun,
     DocumentationVariant,
+    EvaluationCacheEntry,
+    LLMReplayEntry,
+    ModelCatalogSnapshot,
+    ReevaluationJob,
+    Sweep,
     get_db,
     init_db,
     engine
@@ -14,7 +19,12 @@ from .services import (
     BenchmarkRunService,
     DocumentationService,
     CollectionService,
-    TestCaseEvaluationService
+    TestCaseEvaluationService,
+    EvaluationCacheService,
+    LLMReplayService,
+    ModelCatalogService,
+    ReevaluationJobService,
+    SweepService
 )
 
 __all__ = [
@@ -23,6 +33,11 @@ __all__ = [
     'BenchmarkResult',
     'BenchmarkRun',
     'DocumentationVariant',
+    'EvaluationCacheEntry',
+    'LLMReplayEntry',
+    'ModelCatalogSnapshot',
+    'ReevaluationJob',
+    'Sweep',
     'get_db',
     'init_db',
     'engine',
@@ -30,5 +45,10 @@ __all__ = [
     'BenchmarkRunService',
     'DocumentationService',
     'CollectionService',
-    'TestCaseEvaluationService'
+    'TestCaseEvaluationService',
+    'EvaluationCacheService',
+    'LLMReplayService',
+    'ModelCatalogService',
+    'ReevaluationJobService',
+    'SweepService'
 ]
@@ -7,9 +7,9 @@ All data stored in PostgreSQL with proper JSON schemas
 import os
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Boolean, JSON, Index, ForeignKey
+from sqlalchemy import create_engine, inspect, text, Column, Integer, BigInteger, String, Float, Text, Boolean, JSON, Index, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.orm import sessionmaker, Session, relationship, backref
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.dialects.postgresql import JSONB
 
@@ -82,6 +82,10 @@ class BenchmarkResult(Base):
     status = Column(String(32), nullable=False, default='completed', index=True)
     evaluation_status = Column(String(32), nullable=True, default='pending', index=True)  # pending, evaluating, completed, failed
 
+    # What the stored evaluation was graded with (NULL = unknown, treated as stale)
+    evaluator_version = Column(String(32), nullable=True, index=True)
+    test_suite_hash = Column(String(64), nullable=True, index=True)  # sha256 of tests.json
+
     # Collection grouping (for organizing multiple runs)
     collection_id = Column(Integer, ForeignKey('collections.id'), nullable=True, index=True)
 
@@ -167,7 +171,11 @@ class DocumentationVariant(Base):
 
 
 class TestCaseEvaluation(Base):
-    """Individual test case evaluation results"""
+    """
+    Individual test case evaluation results, stored compactly: element checks
+    as bitmasks over the test's element lists, outcomes as flags and lint
+    findings as codes. The check prose is rebuilt from these when served.
+    """
     __tablename__ = 'test_case_evaluations'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -181,26 +189,51 @@ class TestCaseEvaluation(Base):
     test_level = Column(String(32), nullable=True, index=True)
     test_description = Column(Text, nullable=True)
 
-    # Generated response
-    code_response = Column(Text, nullable=False)
+    # Generated response (legacy; the code lives in BenchmarkResult.responses)
+    code_response = Column(Text, nullable=True)
 
     # Evaluation results
     passed = Column(Boolean, nullable=False, index=True)
     score = Column(Float, nullable=False)
     max_score = Column(Float, nullable=False)
 
-    # Detailed checks
+    percentage = Column(Float, nullable=True)
+
+    # Element checks: bit i set = element i found
+    required_mask = Column(BigInteger, nullable=True)
+    required_total = Column(Integer, nullable=True)
+    forbidden_mask = Column(BigInteger, nullable=True)
+    forbidden_total = Column(Integer, nullable=True)
+
+    # Outcome flags (see backend.services.evaluation_store)
+    flags = Column(Integer, nullable=True)
+
+    # Score breakdown
+    penalty_required = Column(Float, nullable=True)
+    penalty_forbidden = Column(Float, nullable=True)
+    penalty_syntax = Column(Float, nullable=True)
+    penalty_jac_check = Column(Float, nullable=True)
+    penalty_functional = Column(Float, nullable=True)
+
+    # Heuristic lint findings as [code, line, args]
+    syntax_errors = Column(Integer, nullable=True)
+    lint_codes = Column(get_json_type(), nullable=True)
+
+    # Detailed checks (legacy prose)
     passed_checks = Column(get_json_type(), nullable=True)
     failed_checks = Column(get_json_type(), nullable=True)
 
-    # Additional evaluation details
+    # Tool output that has no compact form (jac errors, functional output, timings)
     evaluation_details = Column(get_json_type(), nullable=True)
 
     # Timestamps
     evaluated_at = Column(Float, nullable=False, index=True)
 
     # Relationship
-    benchmark_result = relationship('BenchmarkResult', backref='test_evaluations')
+    benchmark_result = relationship(
+        'BenchmarkResult',
+        backref=backref('test_evaluations', cascade='all, delete-orphan')
+    )
 
     __table_args__ = (
         Index('idx_test_benchmark', 'benchmark_result_id', 'test_id'),
@@ -208,6 +241,113 @@ class TestCaseEvaluation(Base):
     )
 
 
+class EvaluationCacheEntry(Base):
+    """Cached per-test evaluation results keyed by normalized code + test definition"""
+    __tablename__ = 'evaluation_cache'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)  # sha256 hex
+
+    # Evaluator output for the test (without the code itself)
+    result = Column(get_json_type(), nullable=False)
+    evaluator_version = Column(String(32), nullable=False)
+
+    # Usage tracking for LRU eviction
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(Float, nullable=False)
+    last_used_at = Column(Float, nullable=False, index=True)
+
+
+class LLMReplayEntry(Base):
+    """Recorded LLM completions keyed by model, prompt, sampling settings and output schema"""
+    __tablename__ = 'llm_replay_cache'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)  # sha256 hex
+
+    # What was asked (for inspection; the key is what lookups use)
+    model = Column(String(256), nullable=False, index=True)
+    temperature = Column(Float, nullable=True)
+    max_tokens = Column(Integer, nullable=True)
+
+    # Raw completion text and its token usage
+    content = Column(Text, nullable=False)
+    usage = Column(get_json_type(), nullable=True)
+
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(Float, nullable=False)
+    last_used_at = Column(Float, nullable=False)
+
+
+class ModelCatalogSnapshot(Base):
+    """Last OpenRouter /models response, with the validators for conditional refreshes"""
+    __tablename__ = 'model_catalog'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(256), unique=True, nullable=False)  # catalogue URL
+
+    models = Column(get_json_type(), nullable=False)  # list of model objects as returned
+    etag = Column(String(256), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+
+    fetched_at = Column(Float, nullable=False)  # when the models last changed
+    checked_at = Column(Float, nullable=False)  # when the source was last asked
+
+
+class ReevaluationJob(Base):
+    """Background re-scoring of stored benchmark results, resumable by cursor"""
+    __tablename__ = 'reevaluation_jobs'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(64), unique=True, nullable=False, index=True)
+
+    # Target the stale results are re-graded against
+    evaluator_version = Column(String(32), nullable=False)
+    test_suite_hash = Column(String(64), nullable=False)
+
+    # Status tracking
+    status = Column(String(32), nullable=False, index=True)  # pending, running, completed, failed, cancelled
+    chunk_size = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+    # Highest benchmark_results.id committed so far; work resumes after it
+    last_result_id = Column(Integer, nullable=False, default=0)
+
+    error_message = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(Float, nullable=False, index=True)
+    updated_at = Column(Float, nullable=False)
+    completed_at = Column(Float, nullable=True)
+
+
+class Sweep(Base):
+    """A models x variants x batch sizes x repeats matrix of benchmark runs"""
+    __tablename__ = 'sweeps'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sweep_id = Column(String(64), unique=True, nullable=False, index=True)
+
+    # Matrix spec as submitted; finished runs are added to this collection
+    spec = Column(get_json_type(), nullable=False)
+    collection = Column(String(256), nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+
+    # Status tracking
+    status = Column(String(32), nullable=False, index=True)  # running, completed, failed, cancelled
+    total_runs = Column(Integer, nullable=False, default=0)
+    completed_runs = Column(Integer, nullable=False, default=0)
+    failed_runs = Column(Integer, nullable=False, default=0)
+    run_ids = Column(get_json_type(), nullable=True)
+    errors = Column(get_json_type(), nullable=True)
+
+    # Timestamps
+    created_at = Column(Float, nullable=False, index=True)
+    updated_at = Column(Float, nullable=False)
+    completed_at = Column(Float, nullable=True)
+
 # Database connection configuration
 def get_database_url() -> str:
     """Get database URL from environment"""
@@ -249,10 +389,69 @@ def get_db() -> Session:
         session.close()
 
 
+# Columns added to tables that already existed, and columns whose NOT NULL
+# constraint was dropped. create_all only creates missing tables, so
+# migrate_schema applies exactly these to existing databases.
+ADDED_COLUMNS = {
+    'benchmark_results': ('evaluator_version', 'test_suite_hash'),
+    'test_case_evaluations': (
+        'percentage', 'required_mask', 'required_total', 'forbidden_mask', 'forbidden_total', 'flags',
+        'penalty_required', 'penalty_forbidden', 'penalty_syntax', 'penalty_jac_check', 'penalty_functional',
+        'syntax_errors', 'lint_codes'
+    )
+}
+RELAXED_COLUMNS = {
+    'test_case_evaluations': ('code_response',)
+}
+
+
+def migrate_schema():
+    """
+    Apply ADDED_COLUMNS and RELAXED_COLUMNS to existing tables. SQLite cannot
+    alter columns, so a table needing a relaxed column is recreated if empty.
+    """
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            db_columns = {col['name']: col for col in inspector.get_columns(table.name)}
+
+            relaxed = [
+                name for name in RELAXED_COLUMNS.get(table.name, ())
+                if name in db_columns and not db_columns[name]['nullable']
+            ]
+            if relaxed and engine.dialect.name == 'sqlite':
+                if conn.execute(text(f'SELECT COUNT(*) FROM {table.name}')).scalar() == 0:
+                    table.drop(conn)
+                    table.create(conn)
+                    print(f"Recreated empty table {table.name} to relax NOT NULL on {', '.join(relaxed)}")
+                    continue
+                print(f"Warning: cannot relax NOT NULL on {table.name}.{', '.join(relaxed)} in SQLite")
+            else:
+                for name in relaxed:
+                    conn.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN {name} DROP NOT NULL'))
+                    print(f"Relaxed NOT NULL on {table.name}.{name}")
+
+            for name in ADDED_COLUMNS.get(table.name, ()):
+                if name in db_columns:
+                    continue
+                column = table.columns[name]
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {name} {col_type}'))
+                print(f"Added column {table.name}.{name}")
+                if column.index:
+                    conn.execute(text(
+                        f'CREATE INDEX IF NOT EXISTS ix_{table.name}_{name} ON {table.name} ({name})'
+                    ))
+
+
 def init_db():
     """Initialize database schema"""
     try:
         Base.metadata.create_all(bind=engine)
+        migrate_schema()
         print(f"Database initialized successfully ({get_database_url()})")
     except Exception as e:
         print(f"Error initializing database: {e}")
@@ -6,9 +6,12 @@ Replaces file-based storage with database storage
 
 
 import json
+import os
+import threading
 import time
 from typing import Optional, Dict, Any, List
-from sqlalchemy import desc, func
+from sqlalchemy import and_, desc, func, insert, or_
+from sqlalchemy.exc import IntegrityError
 
 from .models import (
     get_db,
@@ -16,7 +19,12 @@ from .models import (
     BenchmarkResult,
     BenchmarkRun,
     DocumentationVariant,
-    TestCaseEvaluation
+    TestCaseEvaluation,
+    EvaluationCacheEntry,
+    LLMReplayEntry,
+    ModelCatalogSnapshot,
+    ReevaluationJob,
+    Sweep
 )
 
 
@@ -58,6 +66,17 @@ class BenchmarkResultService:
             session.flush()
             return result.id
 
+    @staticmethod
+    def get_telemetry_since(since: float, models: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Model and run_metadata of results created at or after `since`"""
+        with get_db() as session:
+            query = session.query(BenchmarkResult.model, BenchmarkResult.run_metadata).filter(
+                BenchmarkResult.created_at >= since
+            )
+            if models:
+                query = query.filter(BenchmarkResult.model.in_(models))
+            return [{'model': model, 'run_metadata': metadata} for model, metadata in query.all()]
+
     @staticmethod
     def set_evaluation_status(run_id: str, status: str):
         """Set evaluation status (pending, evaluating, completed, failed)"""
@@ -66,24 +85,71 @@ class BenchmarkResultService:
             if result:
                 result.evaluation_status = status
 
+    @staticmethod
+    def fail_interrupted_evaluations() -> int:
+        """Mark evaluations left 'evaluating' by a server restart as failed, so re-evaluation picks them up"""
+        with get_db() as session:
+            return session.query(BenchmarkResult).filter_by(evaluation_status='evaluating').update(
+                {'evaluation_status': 'failed'}, synchronize_session=False
+            )
+
     @staticmethod
     def update_evaluation(
         run_id: str,
         evaluation_results: Dict[str, Any],
         total_score: float,
         max_score: float,
-        percentage: float
+        percentage: float,
+        evaluator_version: Optional[str] = None,
+        test_suite_hash: Optional[str] = None,
+        test_rows: Optional[List[Dict[str, Any]]] = None
     ):
-        """Update evaluation results for a benchmark"""
+        """Update evaluation results for a benchmark, replacing its per-test rows when given"""
         with get_db() as session:
             result = session.query(BenchmarkResult).filter_by(run_id=run_id).first()
             if result:
+                if test_rows is not None:
+                    TestCaseEvaluationService.replace_rows(session, result.id, test_rows)
                 result.evaluation_results = evaluation_results
                 result.total_score = total_score
                 result.max_score = max_score
                 result.percentage = percentage
                 result.evaluated_at = time.time()
                 result.evaluation_status = 'completed'
+                result.evaluator_version = evaluator_version
+                result.test_suite_hash = test_suite_hash
+
+    @staticmethod
+    def splice_evaluation(
+        run_id: str,
+        responses: Dict[str, str],
+        evaluation_results: Dict[str, Any],
+        total_score: float,
+        max_score: float,
+        percentage: float,
+        test_rows: List[Dict[str, Any]],
+        evaluator_version: Optional[str] = None,
+        test_suite_hash: Optional[str] = None
+    ):
+        """
+        Store updated responses together with an incrementally updated
+        evaluation: only the per-test rows in test_rows are replaced.
+        """
+        with get_db() as session:
+            result = session.query(BenchmarkResult).filter_by(run_id=run_id).first()
+            if result:
+                result.responses = responses
+                TestCaseEvaluationService.replace_rows(
+                    session, result.id, test_rows, test_ids=[row['test_id'] for row in test_rows]
+                )
+                result.evaluation_results = evaluation_results
+                result.total_score = total_score
+                result.max_score = max_score
+                result.percentage = percentage
+                result.evaluated_at = time.time()
+                result.evaluation_status = 'completed'
+                result.evaluator_version = evaluator_version
+                result.test_suite_hash = test_suite_hash
 
     @staticmethod
     def update_responses(run_id: str, responses: Dict[str, str]):
@@ -92,6 +158,9 @@ class BenchmarkResultService:
             result = session.query(BenchmarkResult).filter_by(run_id=run_id).first()
             if result:
                 result.responses = responses
+                session.query(TestCaseEvaluation).filter_by(
+                    benchmark_result_id=result.id
+                ).delete(synchronize_session=False)
                 result.evaluation_results = None
                 result.total_score = None
                 result.max_score = None
@@ -124,7 +193,9 @@ class BenchmarkResultService:
                     'created_at': result.created_at,
                     'evaluated_at': result.evaluated_at,
                     'status': result.status,
-                    'evaluation_status': result.evaluation_status
+                    'evaluation_status': result.evaluation_status,
+                    'evaluator_version': result.evaluator_version,
+                    'test_suite_hash': result.test_suite_hash
                 }
             return None
 
@@ -307,14 +378,16 @@ class BenchmarkRunService:
                 run.progress = progress
 
     @staticmethod
-    def complete(run_id: str, result_id: Optional[int] = None):
-        """Mark run as completed"""
+    def complete(run_id: str, result_id: Optional[int] = None, metadata: Optional[Dict] = None):
+        """Mark run as completed, merging metadata (e.g. telemetry) into its run_metadata"""
         with get_db() as session:
             run = session.query(BenchmarkRun).filter_by(run_id=run_id).first()
             if run:
                 run.status = 'completed'
                 run.completed_at = time.time()
                 run.result_id = result_id
+                if metadata:
+                    run.run_metadata = {**(run.run_metadata or {}), **metadata}
 
     @staticmethod
     def fail(run_id: str, error_message: str):
@@ -549,59 +622,605 @@ class CollectionService:
 class TestCaseEvaluationService:
     """Service for managing individual test case evaluations"""
 
+    # Compact columns written per test; see backend.services.evaluation_store
+    ROW_COLUMNS = (
+        'test_id', 'test_category', 'test_level', 'passed', 'score', 'max_score', 'percentage',
+        'required_mask', 'required_total', 'forbidden_mask', 'forbidden_total', 'flags',
+        'penalty_required', 'penalty_forbidden', 'penalty_syntax', 'penalty_jac_check', 'penalty_functional',
+        'syntax_errors', 'lint_codes', 'evaluation_details'
+    )
+
+    @staticmethod
+    def replace_rows(session, benchmark_result_id: int, rows: List[Dict[str, Any]],
+                     test_ids: Optional[List[str]] = None):
+        """
+        Replace a result's rows inside an open session with one bulk insert.
+        With test_ids, only the rows for those tests are deleted first.
+        """
+        query = session.query(TestCaseEvaluation).filter_by(benchmark_result_id=benchmark_result_id)
+        if test_ids is not None:
+            query = query.filter(TestCaseEvaluation.test_id.in_(test_ids))
+        query.delete(synchronize_session=False)
+        if rows:
+            now = time.time()
+            session.execute(insert(TestCaseEvaluation), [
+                {**row, 'benchmark_result_id': benchmark_result_id, 'evaluated_at': now}
+                for row in rows
+            ])
+
     @staticmethod
     def save_evaluations(
         benchmark_result_id: int,
         evaluations: List[Dict[str, Any]]
     ):
-        """Save multiple test case evaluations"""
-        with get_db() as session:
-            # Delete existing evaluations for this result
-            session.query(TestCaseEvaluation).filter_by(
-                benchmark_result_id=benchmark_result_id
-            ).delete()
-
-            # Add new evaluations
-            for eval_data in evaluations:
-                evaluation = TestCaseEvaluation(
-                    benchmark_result_id=benchmark_result_id,
-                    test_id=eval_data['test_id'],
-                    test_category=eval_data.get('test_category'),
-                    test_level=eval_data.get('test_level'),
-                    test_description=eval_data.get('test_description'),
-                    code_response=eval_data['code_response'],
-                    passed=eval_data['passed'],
-                    score=eval_data['score'],
-                    max_score=eval_data['max_score'],
-                    passed_checks=eval_data.get('passed_checks', []),
-                    failed_checks=eval_data.get('failed_checks', []),
-                    evaluation_details=eval_data.get('evaluation_details'),
-                    evaluated_at=time.time()
-                )
-                session.add(evaluation)
+        """Save multiple test case evaluations (compact rows), replacing existing ones"""
+        with get_db() as session:
+            TestCaseEvaluationService.replace_rows(session, benchmark_result_id, evaluations)
 
     @staticmethod
     def get_by_benchmark_result(benchmark_result_id: int) -> List[Dict[str, Any]]:
-        """Get all test case evaluations for a benchmark result"""
+        """Get all test case evaluations (compact rows) for a benchmark result"""
+        columns = [getattr(TestCaseEvaluation, name) for name in TestCaseEvaluationService.ROW_COLUMNS]
         with get_db() as session:
-            evaluations = session.query(TestCaseEvaluation).filter_by(
-                benchmark_result_id=benchmark_result_id
+            rows = session.query(*columns).filter(
+                TestCaseEvaluation.benchmark_result_id == benchmark_result_id
             ).all()
+            return [dict(zip(TestCaseEvaluationService.ROW_COLUMNS, row)) for row in rows]
+
+    # Raw per-test outcomes read by backend.services.scoring, in this column order
+    OUTCOME_COLUMNS = (
+        'benchmark_result_id', 'test_category', 'max_score', 'required_mask', 'required_total',
+        'forbidden_mask', 'forbidden_total', 'flags', 'syntax_errors'
+    )
 
+    @staticmethod
+    def get_outcome_runs(
+        collections: Optional[List[str]] = None,
+        run_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Evaluated results in scope (all when neither filter is given), with their stored scores"""
+        with get_db() as session:
+            query = session.query(
+                BenchmarkResult.id, BenchmarkResult.run_id, BenchmarkResult.model,
+                BenchmarkResult.variant, Collection.name, BenchmarkResult.percentage,
+                BenchmarkResult.evaluated_at
+            ).outerjoin(
+                Collection, BenchmarkResult.collection_id == Collection.id
+            ).filter(BenchmarkResult.evaluated_at.isnot(None))
+            if collections:
+                query = query.filter(Collection.name.in_(collections))
+            if run_ids:
+                query = query.filter(BenchmarkResult.run_id.in_(run_ids))
             return [
                 {
-                    'test_id': e.test_id,
-                    'test_category': e.test_category,
-                    'test_level': e.test_level,
-                    'test_description': e.test_description,
-                    'code_response': e.code_response,
-                    'passed': e.passed,
-                    'score': e.score,
-                    'max_score': e.max_score,
-                    'passed_checks': e.passed_checks,
-                    'failed_checks': e.failed_checks,
-                    'evaluation_details': e.evaluation_details,
-                    'evaluated_at': e.evaluated_at
+                    'id': r[0],
+                    'run_id': r[1],
+                    'model': r[2],
+                    'variant': r[3],
+                    'collection': r[4],
+                    'percentage': r[5],
+                    'evaluated_at': r[6]
                 }
-                for e in evaluations
+                for r in query.order_by(BenchmarkResult.id).all()
             ]
+
+    @staticmethod
+    def get_outcomes(benchmark_result_ids: List[int], chunk_size: int = 5000) -> List[tuple]:
+        """Raw outcome tuples (OUTCOME_COLUMNS order) for compact rows of the given results"""
+        columns = [getattr(TestCaseEvaluation, name) for name in TestCaseEvaluationService.OUTCOME_COLUMNS]
+        outcomes = []
+        with get_db() as session:
+            for i in range(0, len(benchmark_result_ids), chunk_size):
+                outcomes.extend(
+                    tuple(row) for row in session.query(*columns).filter(
+                        TestCaseEvaluation.benchmark_result_id.in_(benchmark_result_ids[i:i + chunk_size]),
+                        TestCaseEvaluation.flags.isnot(None)
+                    )
+                )
+        return outcomes
+
+
+class EvaluationCacheService:
+    """Service for the content-addressed evaluation cache"""
+
+    _stats_lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _inserts_since_evict = 0
+    # Hits per key not yet written to hit_count/last_used_at; flushed with eviction
+    _uses: Dict[str, int] = {}
+
+    @staticmethod
+    def max_entries() -> int:
+        return int(os.getenv('EVAL_CACHE_MAX_ENTRIES', '100000'))
+
+    @staticmethod
+    def evict_every() -> int:
+        return int(os.getenv('EVAL_CACHE_EVICT_EVERY', '1000'))
+
+    @classmethod
+    def _record(cls, hits: int, misses: int, used: List[str]) -> bool:
+        """Count a lookup and buffer its hits; returns True once the buffer is due a flush"""
+        with cls._stats_lock:
+            cls._hits += hits
+            cls._misses += misses
+            for key in used:
+                cls._uses[key] = cls._uses.get(key, 0) + 1
+            return len(cls._uses) >= cls.evict_every()
+
+    @classmethod
+    def get_many(cls, cache_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up cached results. Usage of hits is buffered in memory and
+        written with the next eviction pass (or once EVAL_CACHE_EVICT_EVERY
+        keys are buffered), so lookups stay read-only.
+        """
+        if not cache_keys:
+            return {}
+        with get_db() as session:
+            found = dict(session.query(EvaluationCacheEntry.cache_key, EvaluationCacheEntry.result).filter(
+                EvaluationCacheEntry.cache_key.in_(set(cache_keys))
+            ).all())
+
+        hits = sum(1 for k in cache_keys if k in found)
+        if cls._record(hits, len(cache_keys) - hits, list(found)):
+            cls.flush_usage()
+        return found
+
+    @classmethod
+    def flush_usage(cls) -> int:
+        """Write buffered hit counts and recency to the cache table; returns the keys written"""
+        with cls._stats_lock:
+            uses, cls._uses = cls._uses, {}
+        if not uses:
+            return 0
+        by_count: Dict[int, List[str]] = {}
+        for key, count in uses.items():
+            by_count.setdefault(count, []).append(key)
+        now = time.time()
+        with get_db() as session:
+            for count, keys in by_count.items():
+                session.query(EvaluationCacheEntry).filter(
+                    EvaluationCacheEntry.cache_key.in_(keys)
+                ).update({
+                    'hit_count': EvaluationCacheEntry.hit_count + count,
+                    'last_used_at': now
+                }, synchronize_session=False)
+        return len(uses)
+
+    @classmethod
+    def get(cls, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a single cached result"""
+        return cls.get_many([cache_key]).get(cache_key)
+
+    @classmethod
+    def put_many(cls, results: Dict[str, Dict[str, Any]], evaluator_version: str):
+        """
+        Store results for keys not already cached. The size cap is enforced
+        once every EVAL_CACHE_EVICT_EVERY inserts rather than on every put,
+        so the cache may briefly hold that many entries over the cap.
+        """
+        if not results:
+            return
+        now = time.time()
+        try:
+            with get_db() as session:
+                existing = {
+                    k for (k,) in session.query(EvaluationCacheEntry.cache_key).filter(
+                        EvaluationCacheEntry.cache_key.in_(list(results))
+                    ).all()
+                }
+                entries = [
+                    EvaluationCacheEntry(
+                        cache_key=key,
+                        result=result,
+                        evaluator_version=evaluator_version,
+                        hit_count=0,
+                        created_at=now,
+                        last_used_at=now
+                    )
+                    for key, result in results.items() if key not in existing
+                ]
+                session.add_all(entries)
+        except IntegrityError:
+            # A concurrent evaluation cached the same key first
+            return
+
+        with cls._stats_lock:
+            cls._inserts_since_evict += len(entries)
+            due = cls._inserts_since_evict >= cls.evict_every()
+            if due:
+                cls._inserts_since_evict = 0
+        if due:
+            cls.evict()
+
+    @classmethod
+    def put(cls, cache_key: str, result: Dict[str, Any], evaluator_version: str):
+        cls.put_many({cache_key: result}, evaluator_version)
+
+    @classmethod
+    def evict(cls, max_entries: Optional[int] = None) -> int:
+        """Drop least-recently-used entries beyond the size cap"""
+        if max_entries is None:
+            max_entries = cls.max_entries()
+        # Recency must be current before choosing what to drop
+        cls.flush_usage()
+        with get_db() as session:
+            overflow = session.query(EvaluationCacheEntry).count() - max_entries
+            if overflow <= 0:
+                return 0
+            stale_ids = session.query(EvaluationCacheEntry.id).order_by(
+                EvaluationCacheEntry.last_used_at.asc()
+            ).limit(overflow).subquery()
+            return session.query(EvaluationCacheEntry).filter(
+                EvaluationCacheEntry.id.in_(stale_ids.select())
+            ).delete(synchronize_session=False)
+
+    @classmethod
+    def clear(cls) -> int:
+        """Delete every cache entry and reset counters"""
+        with cls._stats_lock:
+            cls._hits = 0
+            cls._misses = 0
+            cls._inserts_since_evict = 0
+            cls._uses = {}
+        with get_db() as session:
+            return session.query(EvaluationCacheEntry).delete()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Get hit/miss counters for this process and the table size"""
+        with get_db() as session:
+            entries = session.query(EvaluationCacheEntry).count()
+        with cls._stats_lock:
+            hits, misses = cls._hits, cls._misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups * 100, 2) if lookups else 0,
+            'entries': entries,
+            'max_entries': cls.max_entries()
+        }
+
+
+class LLMReplayService:
+    """Service for recorded LLM completions (record/replay of benchmark batches)"""
+
+    @staticmethod
+    def get(cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a recorded completion, bumping its usage"""
+        with get_db() as session:
+            entry = session.query(LLMReplayEntry).filter_by(cache_key=cache_key).first()
+            if entry is None:
+                return None
+            entry.hit_count += 1
+            entry.last_used_at = time.time()
+            return {'content': entry.content, 'usage': entry.usage}
+
+    @staticmethod
+    def put(cache_key: str, model: str, temperature: Optional[float], max_tokens: Optional[int],
+            content: str, usage: Optional[Dict[str, Any]] = None):
+        """Record a completion, replacing any earlier recording for the key"""
+        now = time.time()
+        try:
+            with get_db() as session:
+                entry = session.query(LLMReplayEntry).filter_by(cache_key=cache_key).first()
+                if entry is None:
+                    entry = LLMReplayEntry(cache_key=cache_key, hit_count=0, created_at=now)
+                    session.add(entry)
+                entry.model = model
+                entry.temperature = temperature
+                entry.max_tokens = max_tokens
+                entry.content = content
+                entry.usage = usage
+                entry.last_used_at = now
+        except IntegrityError:
+            # A concurrent batch recorded the same key first
+            pass
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Number of recordings and replays, per model"""
+        with get_db() as session:
+            rows = session.query(
+                LLMReplayEntry.model, func.count(LLMReplayEntry.id), func.sum(LLMReplayEntry.hit_count)
+            ).group_by(LLMReplayEntry.model).all()
+        return {
+            'entries': sum(count for _, count, _ in rows),
+            'models': {model: {'entries': count, 'replays': int(hits or 0)} for model, count, hits in rows}
+        }
+
+    @staticmethod
+    def clear(model: Optional[str] = None) -> int:
+        """Delete recordings (for one model, or all)"""
+        with get_db() as session:
+            query = session.query(LLMReplayEntry)
+            if model:
+                query = query.filter_by(model=model)
+            return query.delete()
+
+
+class ModelCatalogService:
+    """Service for the persisted model catalogue"""
+
+    @staticmethod
+    def _to_dict(snapshot: ModelCatalogSnapshot) -> Dict[str, Any]:
+        return {
+            'source': snapshot.source,
+            'models': snapshot.models or [],
+            'etag': snapshot.etag,
+            'last_modified': snapshot.last_modified,
+            'fetched_at': snapshot.fetched_at,
+            'checked_at': snapshot.checked_at
+        }
+
+    @staticmethod
+    def get(source: str) -> Optional[Dict[str, Any]]:
+        with get_db() as session:
+            snapshot = session.query(ModelCatalogSnapshot).filter_by(source=source).first()
+            return ModelCatalogService._to_dict(snapshot) if snapshot else None
+
+    @staticmethod
+    def save(source: str, models: List[Dict[str, Any]], etag: Optional[str], last_modified: Optional[str]):
+        """Store a freshly fetched catalogue"""
+        now = time.time()
+        with get_db() as session:
+            snapshot = session.query(ModelCatalogSnapshot).filter_by(source=source).first()
+            if snapshot is None:
+                snapshot = ModelCatalogSnapshot(source=source)
+                session.add(snapshot)
+            snapshot.models = models
+            snapshot.etag = etag
+            snapshot.last_modified = last_modified
+            snapshot.fetched_at = now
+            snapshot.checked_at = now
+
+    @staticmethod
+    def touch(source: str):
+        """Record that the source confirmed the stored catalogue is current (304)"""
+        with get_db() as session:
+            session.query(ModelCatalogSnapshot).filter_by(source=source).update(
+                {'checked_at': time.time()}, synchronize_session=False
+            )
+
+
+class ReevaluationJobService:
+    """Service for resumable bulk re-evaluation jobs"""
+
+    @staticmethod
+    def _to_dict(job: ReevaluationJob) -> Dict[str, Any]:
+        return {
+            'job_id': job.job_id,
+            'status': job.status,
+            'evaluator_version': job.evaluator_version,
+            'test_suite_hash': job.test_suite_hash,
+            'chunk_size': job.chunk_size,
+            'total': job.total,
+            'processed': job.processed,
+            'failed': job.failed,
+            'last_result_id': job.last_result_id,
+            'error_message': job.error_message,
+            'created_at': job.created_at,
+            'updated_at': job.updated_at,
+            'completed_at': job.completed_at
+        }
+
+    @staticmethod
+    def _stale_filter(evaluator_version: str, test_suite_hash: str):
+        """Results graded with another (or unknown) version/suite that are not being graded right now"""
+        return and_(
+            or_(
+                BenchmarkResult.evaluator_version.is_(None),
+                BenchmarkResult.test_suite_hash.is_(None),
+                BenchmarkResult.evaluator_version != evaluator_version,
+                BenchmarkResult.test_suite_hash != test_suite_hash
+            ),
+            or_(
+                BenchmarkResult.evaluation_status.is_(None),
+                BenchmarkResult.evaluation_status != 'evaluating'
+            )
+        )
+
+    @staticmethod
+    def count_stale(evaluator_version: str, test_suite_hash: str) -> int:
+        """Count results not graded with the given evaluator version and test suite"""
+        with get_db() as session:
+            return session.query(BenchmarkResult).filter(
+                ReevaluationJobService._stale_filter(evaluator_version, test_suite_hash)
+            ).count()
+
+    @staticmethod
+    def create(job_id: str, evaluator_version: str, test_suite_hash: str, chunk_size: int) -> Dict[str, Any]:
+        """Create a pending job covering every currently stale result"""
+        now = time.time()
+        total = ReevaluationJobService.count_stale(evaluator_version, test_suite_hash)
+        with get_db() as session:
+            job = ReevaluationJob(
+                job_id=job_id,
+                evaluator_version=evaluator_version,
+                test_suite_hash=test_suite_hash,
+                status='pending',
+                chunk_size=chunk_size,
+                total=total,
+                processed=0,
+                failed=0,
+                last_result_id=0,
+                created_at=now,
+                updated_at=now
+            )
+            session.add(job)
+            session.flush()
+            return ReevaluationJobService._to_dict(job)
+
+    @staticmethod
+    def get(job_id: str) -> Optional[Dict[str, Any]]:
+        with get_db() as session:
+            job = session.query(ReevaluationJob).filter_by(job_id=job_id).first()
+            return ReevaluationJobService._to_dict(job) if job else None
+
+    @staticmethod
+    def get_unfinished() -> List[Dict[str, Any]]:
+        """Jobs that were pending or running, e.g. when the server stopped"""
+        with get_db() as session:
+            jobs = session.query(ReevaluationJob).filter(
+                ReevaluationJob.status.in_(['pending', 'running'])
+            ).order_by(ReevaluationJob.created_at).all()
+            return [ReevaluationJobService._to_dict(j) for j in jobs]
+
+    @staticmethod
+    def get_recent(limit: int = 20) -> List[Dict[str, Any]]:
+        with get_db() as session:
+            jobs = session.query(ReevaluationJob).order_by(
+                desc(ReevaluationJob.created_at)
+            ).limit(limit).all()
+            return [ReevaluationJobService._to_dict(j) for j in jobs]
+
+    @staticmethod
+    def set_status(job_id: str, status: str, error_message: Optional[str] = None):
+        with get_db() as session:
+            job = session.query(ReevaluationJob).filter_by(job_id=job_id).first()
+            if job:
+                job.status = status
+                job.updated_at = time.time()
+                if error_message is not None:
+                    job.error_message = error_message
+                if status in ('completed', 'failed', 'cancelled'):
+                    job.completed_at = job.updated_at
+
+    @staticmethod
+    def next_chunk(job_id: str) -> List[Dict[str, Any]]:
+        """Next stale results after the job's cursor, in id order"""
+        with get_db() as session:
+            job = session.query(ReevaluationJob).filter_by(job_id=job_id).first()
+            if not job:
+                return []
+            results = session.query(
+                BenchmarkResult.id, BenchmarkResult.run_id, BenchmarkResult.responses
+            ).filter(
+                BenchmarkResult.id > job.last_result_id,
+                ReevaluationJobService._stale_filter(job.evaluator_version, job.test_suite_hash)
+            ).order_by(BenchmarkResult.id).limit(job.chunk_size).all()
+            return [{'id': r.id, 'run_id': r.run_id, 'responses': r.responses} for r in results]
+
+    @staticmethod
+    def commit_chunk(job_id: str, graded: Dict[int, Dict[str, Any]], last_result_id: int, failed: int) -> Dict[str, Any]:
+        """
+        Store a chunk of evaluations and advance the job cursor in one
+        transaction, so a restart resumes exactly after the last commit.
+        graded maps benchmark_results.id to an evaluation record (the
+        update_evaluation fields: evaluation_results, scores and test_rows,
+        plus the evaluator_version it was graded with when that differs).
+        """
+        now = time.time()
+        with get_db() as session:
+            job = session.query(ReevaluationJob).filter_by(job_id=job_id).first()
+            results = session.query(BenchmarkResult).filter(
+                BenchmarkResult.id.in_(list(graded))
+            ).all() if graded else []
+            for result in results:
+                record = graded[result.id]
+                TestCaseEvaluationService.replace_rows(session, result.id, record['test_rows'])
+                result.evaluation_results = record['evaluation_results']
+                result.total_score = record['total_score']
+                result.max_score = record['max_score']
+                result.percentage = record['percentage']
+                result.evaluated_at = now
+                result.evaluation_status = 'completed'
+                result.evaluator_version = record.get('evaluator_version', job.evaluator_version)
+                result.test_suite_hash = job.test_suite_hash
+            job.processed += len(graded) + failed
+            job.failed += failed
+            job.last_result_id = max(job.last_result_id, last_result_id)
+            job.updated_at = now
+            return ReevaluationJobService._to_dict(job)
+
+
+class SweepService:
+    """Service for benchmark sweeps"""
+
+    @staticmethod
+    def _to_dict(sweep: Sweep) -> Dict[str, Any]:
+        return {
+            'sweep_id': sweep.sweep_id,
+            'spec': sweep.spec,
+            'collection': sweep.collection,
+            'priority': sweep.priority,
+            'status': sweep.status,
+            'total_runs': sweep.total_runs,
+            'completed_runs': sweep.completed_runs,
+            'failed_runs': sweep.failed_runs,
+            'run_ids': sweep.run_ids or [],
+            'errors': sweep.errors or [],
+            'created_at': sweep.created_at,
+            'updated_at': sweep.updated_at,
+            'completed_at': sweep.completed_at
+        }
+
+    @staticmethod
+    def create(sweep_id: str, spec: Dict[str, Any], collection: str, priority: int, total_runs: int) -> Dict[str, Any]:
+        now = time.time()
+        with get_db() as session:
+            sweep = Sweep(
+                sweep_id=sweep_id,
+                spec=spec,
+                collection=collection,
+                priority=priority,
+                status='running',
+                total_runs=total_runs,
+                completed_runs=0,
+                failed_runs=0,
+                run_ids=[],
+                errors=[],
+                created_at=now,
+                updated_at=now
+            )
+            session.add(sweep)
+            session.flush()
+            return SweepService._to_dict(sweep)
+
+    @staticmethod
+    def get(sweep_id: str) -> Optional[Dict[str, Any]]:
+        with get_db() as session:
+            sweep = session.query(Sweep).filter_by(sweep_id=sweep_id).first()
+            return SweepService._to_dict(sweep) if sweep else None
+
+    @staticmethod
+    def get_recent(limit: int = 20) -> List[Dict[str, Any]]:
+        with get_db() as session:
+            sweeps = session.query(Sweep).order_by(desc(Sweep.created_at)).limit(limit).all()
+            return [SweepService._to_dict(s) for s in sweeps]
+
+    @staticmethod
+    def record_run(sweep_id: str, run_id: Optional[str] = None, error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Count one finished cell of the matrix: a stored run, or an error"""
+        with get_db() as session:
+            sweep = session.query(Sweep).filter_by(sweep_id=sweep_id).with_for_update().first()
+            if not sweep:
+                return None
+            if error is None:
+                sweep.completed_runs += 1
+                sweep.run_ids = (sweep.run_ids or []) + [run_id]
+            else:
+                sweep.failed_runs += 1
+                sweep.errors = (sweep.errors or []) + [error]
+            sweep.updated_at = time.time()
+            return SweepService._to_dict(sweep)
+
+    @staticmethod
+    def set_status(sweep_id: str, status: str):
+        with get_db() as session:
+            sweep = session.query(Sweep).filter_by(sweep_id=sweep_id).first()
+            if sweep:
+                sweep.status = status
+                sweep.updated_at = time.time()
+                if status in ('completed', 'failed', 'cancelled'):
+                    sweep.completed_at = sweep.updated_at
+
+    @staticmethod
+    def interrupt_unfinished():
+        """Mark sweeps left running by a server restart; their remaining runs are lost"""
+        with get_db() as session:
+            session.query(Sweep).filter_by(status='running').update(
+                {'status': 'failed', 'completed_at': time.time()}, synchronize_session=False
+            )
@@ -0,0 +1,61 @@
+"""Test setup: run from the docbench root against a throwaway SQLite database"""
+
+import os
+import sys
+import tempfile
+import textwrap
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must be set before `database` is first imported, which creates the schema
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='docbench-tests-'), 'test.db')
+os.environ.setdefault('JAC_CHECK_POOL', 'false')
+
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# Stand-in `jac` CLI: `check` accepts one file and fails on BROKEN; `test`
+# passes on PASS, fails on FAIL and otherwise records its pid and hangs
+FAKE_JAC = '''
+import os, sys, time
+command, path = sys.argv[1], sys.argv[2]
+source = open(path).read()
+if command == "check":
+    if len(sys.argv) != 3:
+        print("jac: error: unrecognized arguments: " + " ".join(sys.argv[3:]))
+        sys.exit(2)
+    if "BROKEN" in source:
+        print(f"Error: {path}:1:1 - Unexpected token")
+        print("Errors: 1, Warnings: 0")
+        sys.exit(1)
+    print("Errors: 0, Warnings: 0")
+    sys.exit(0)
+if "PASS" in source:
+    sys.exit(0)
+if "FAIL" in source:
+    print("1 test failed")
+    sys.exit(1)
+with open(os.path.join(os.environ["FAKE_JAC_PIDS"], str(os.getpid())), "w"):
+    pass
+time.sleep(60)
+'''
+
+
+@pytest.fixture
+def fake_jac(tmp_path, monkeypatch):
+    """Put the stand-in `jac` first on PATH; returns the directory hanging runs record their pids in"""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    jac = bin_dir / 'jac'
+    jac.write_text(f"#!{sys.executable}\n" + textwrap.dedent(FAKE_JAC))
+    jac.chmod(0o755)
+    pids = tmp_path / 'pids'
+    pids.mkdir()
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv('FAKE_JAC_PIDS', str(pids))
+    monkeypatch.setenv('FUNCTIONAL_TEST_ISOLATE_NETWORK', 'false')
+    from backend.utils import functional_runner
+    monkeypatch.setattr(functional_runner, '_runner', None)
+    return pids
@@ -0,0 +1,173 @@
+"""AST element matching agrees with the strict regex matchers on real code"""
+
+import json
+
+import pytest
+
+from backend.utils.ast_matcher import AstMatcherPlan, ElementIndex, compile_ast_rule
+from backend.utils.jac_lexer import NAME, STRING, tokenize
+from backend.utils.jac_worker import _token_kind
+from backend.utils.syntax import compile_element_matcher
+
+# Words jaclang lexes as keywords or builtin types rather than NAME tokens
+JAC_KEYWORDS = frozenset([
+    'as', 'async', 'by', 'can', 'def', 'dict', 'disengage', 'edge', 'elif', 'else', 'entry', 'enum', 'exit',
+    'float', 'for', 'from', 'glob', 'has', 'here', 'if', 'import', 'in', 'include', 'int', 'list', 'node',
+    'obj', 'report', 'return', 'root', 'self', 'spawn', 'static', 'str', 'visit', 'walker', 'while', 'with'
+])
+
+
+def index_for(code: str) -> ElementIndex:
+    """Index code the way the checker worker's tokens would; strings are literals, keywords are not names"""
+    return ElementIndex([
+        ('string' if kind == STRING else 'name' if kind == NAME and value not in JAC_KEYWORDS else 'token', value)
+        for kind, value, _, _ in tokenize(code)
+    ])
+
+
+GRAPH = '''
+import os;
+import from datetime { datetime }
+glob counter: int = 0;
+
+enum Status { PENDING, ACTIVE, COMPLETED }
+
+obj Person {
+    has name: str;
+    has age: int = 0;
+    def greet() -> str { return f"Hello {self.name}"; }
+}
+
+node City {
+    has name: str;
+    has population: int = 0;
+}
+
+edge Road {
+    has distance: float = 1.0;
+}
+
+walker Explorer {
+    has visited: list = [];
+    can execute with City entry {
+        self.visited.append(here.name);
+        visit [-->];
+    }
+}
+
+with entry {
+    a = City(name="A");
+    b = City(name="B");
+    root ++> a;
+    a +>:Road(distance=2.0):+> b;
+    root spawn Explorer();
+    for c in [root-->] { print(c.name); }
+}
+'''
+
+COUNTER = '''
+import json;
+
+node User {
+    has name: str;
+    has visited_count: int = 0;
+}
+
+walker Counter {
+    has count: int = 0;
+    can register with `root entry {
+        visit [-->];
+    }
+    can execute with User entry {
+        self.count += 1;
+        report here.name;
+    }
+}
+
+def load(path: str) -> dict {
+    with open(path) as f {
+        return json.loads(f.read());
+    }
+}
+
+with entry {
+    for i in range(3) {
+        root ++> User(name=str(i));
+    }
+    result = root spawn Counter();
+    print(result.count);
+}
+'''
+
+MENTIONS = '''
+"""String and comment mentions: walker W { visit spawn W(); import os; }"""
+# node Hidden { has name: str; }
+with entry {
+    msg = "walker Explorer { can execute with entry }";
+    note = f"has name: str and def load(x) and socket.notify(x)";
+    print(msg, note);
+}
+'''
+
+
+def suite_elements():
+    with open("tests.json") as f:
+        tests = json.load(f)
+    return sorted({e for t in tests for e in t["required_elements"] + t.get("forbidden_elements", [])})
+
+
+@pytest.mark.parametrize("code", [GRAPH, COUNTER], ids=["graph", "counter"])
+def test_ast_rules_agree_with_strict_matchers(code):
+    index = index_for(code)
+    disagreements = []
+    for element in suite_elements():
+        rule = compile_ast_rule(element)
+        if rule is None:
+            continue
+        # The strict matcher finds 'has visited' as a prefix of 'has visited_count'
+        if code is COUNTER and element == 'has visited':
+            continue
+        ast, strict = rule(index), compile_element_matcher(element)(code)
+        if ast != strict:
+            disagreements.append((element, ast, strict))
+    assert disagreements == []
+
+
+def test_strings_and_comments_never_match():
+    index = index_for(MENTIONS)
+    for element in ['walker', 'walker Explorer', 'node', 'visit', 'spawn', 'import', 'import os',
+                    'can', 'can execute', 'has name: str', 'str', 'load', 'socket.notify']:
+        assert compile_element_matcher(element)(MENTIONS)
+        assert not compile_ast_rule(element)(index), element
+
+
+def test_str_type_is_code_not_a_string_literal():
+    assert _token_kind('TYP_STRING') == 'token'
+    assert _token_kind('STRING') == 'string'
+    for piece in ['F_DQ_START', 'F_TEXT_DQ', 'RF_TEXT_TSQ', 'F_DQ_END', 'D_LBRACE', 'F_FORMAT_TEXT']:
+        assert _token_kind(piece) == 'string'
+    assert _token_kind('NAME') == 'name'
+
+    # Tokens as the worker sends them for `has name: str;`
+    index = ElementIndex([
+        [_token_kind(kind), value]
+        for kind, value in [('KW_HAS', 'has'), ('NAME', 'name'), ('COLON', ':'), ('TYP_STRING', 'str'), ('SEMI', ';')]
+    ])
+    plan = AstMatcherPlan(('str', ': str', 'has name: str', 'has'), ())
+    assert plan.match('has name: str;', index) == ([True, True, True, True], [])
+
+
+def test_index_structure():
+    index = index_for(GRAPH + COUNTER + '''
+    node :pub Secure { has :priv token: str, expires: int = 0, tags: list[str] = []; }
+    def :pub check(x: int) -> bool { return x > 0; }
+    ''')
+    assert index.declarations['node'] == {'City', 'User', 'Secure'}
+    assert index.declarations['walker'] == {'Explorer', 'Counter'}
+    assert index.declarations['enum'] == {'Status'}
+    assert index.abilities == {'can': {'execute', 'register'}, 'def': {'greet', 'load', 'check'}}
+    assert {('token', 'str'), ('expires', 'int'), ('tags', 'list'), ('visited_count', 'int')} <= index.fields
+    assert index.imports == {'os', 'datetime', 'json'}
+    assert index.spawns == {'Explorer', 'Counter'}
+    assert index.visits == 2
+    assert index.edge_ops == {'-->', '++>'}
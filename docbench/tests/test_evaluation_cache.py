@@ -0,0 +1,75 @@
+"""Content-addressed evaluation cache"""
+
+import pytest
+
+from backend.services.evaluator import EvaluatorService
+from backend.utils.jac_checker import CHECK_TIMEOUT_MESSAGE
+from database import EvaluationCacheService
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    EvaluationCacheService.clear()
+    yield
+    EvaluationCacheService.clear()
+
+
+def entries() -> int:
+    return EvaluationCacheService.get_stats()['entries']
+
+
+def test_size_cap_is_enforced_every_n_inserts(monkeypatch):
+    monkeypatch.setenv('EVAL_CACHE_MAX_ENTRIES', '4')
+    monkeypatch.setenv('EVAL_CACHE_EVICT_EVERY', '3')
+    for i in range(5):
+        EvaluationCacheService.put(f'key-{i}', {'score': i}, 'test')
+    # The cap was checked at the third insert; the next two go over it unchecked
+    assert entries() == 5
+    EvaluationCacheService.put('key-5', {'score': 5}, 'test')
+    assert entries() == 4
+    assert EvaluationCacheService.get('key-5') == {'score': 5}
+    assert EvaluationCacheService.get('key-0') is None
+
+
+def test_hits_are_written_with_the_eviction_pass(monkeypatch):
+    monkeypatch.setenv('EVAL_CACHE_MAX_ENTRIES', '2')
+    monkeypatch.setenv('EVAL_CACHE_EVICT_EVERY', '3')
+    EvaluationCacheService.put('old', {'score': 0}, 'test')
+    EvaluationCacheService.put('new', {'score': 1}, 'test')
+    assert EvaluationCacheService.get('old') == {'score': 0}
+    assert EvaluationCacheService.flush_usage() == 1
+    assert EvaluationCacheService.flush_usage() == 0
+
+    # The buffered hit makes 'old' the most recently used when the cap is enforced
+    assert EvaluationCacheService.get('old') == {'score': 0}
+    EvaluationCacheService.put('newest', {'score': 2}, 'test')
+    assert EvaluationCacheService.get('new') is None
+    assert EvaluationCacheService.get('old') == {'score': 0}
+
+
+def test_timed_out_results_are_not_cached(monkeypatch):
+    evaluator = EvaluatorService()
+    test_case = evaluator.tests[0]
+    code = 'with entry { print("Hello, Jac!"); }'
+
+    monkeypatch.setattr(evaluator, 'jac_check', lambda code, deadline=None: (False, [CHECK_TIMEOUT_MESSAGE], []))
+    assert not evaluator.evaluate_code(code, test_case)['jac_valid']
+    assert entries() == 0
+
+    monkeypatch.setattr(evaluator, 'jac_check', lambda code, deadline=None: (True, [], []))
+    assert evaluator.evaluate_code(code, test_case)['jac_valid']
+    assert entries() == 1
+
+
+def test_ast_mode_without_workers_is_neither_cached_nor_stamped_ast(monkeypatch, fake_jac):
+    # conftest disables the checker pool, so the AST matcher has nothing to parse with
+    monkeypatch.setenv('ELEMENT_MATCHER', 'ast')
+    evaluator = EvaluatorService()
+    responses = {test['id']: 'walker W {}' for test in evaluator.tests[:3]}
+
+    eval_result = evaluator.evaluate_responses(responses, max_workers=2)
+    tests = [test for scores in eval_result['evaluation_results'].values() for test in scores['tests']]
+    assert all(test['element_matcher'] == 'regex' for test in tests)
+    assert entries() == 0
+    assert evaluator.evaluation_stamp(eval_result)['evaluator_version'] != evaluator.version
+    assert evaluator.evaluation_stamp()['evaluator_version'] == evaluator.version
@@ -0,0 +1,79 @@
+"""Compact TestCaseEvaluation rows reproduce what the evaluator graded"""
+
+import json
+
+import pytest
+
+from backend.services.evaluation_store import (
+    aggregate_view, category_breakdown_with_tests, decode_row, encode_result, evaluation_record
+)
+from backend.services.evaluator import EvaluatorService
+
+
+def sample_responses(suite):
+    """Every other required element, one forbidden element, and some responses jac check rejects"""
+    responses = {}
+    for i, test in enumerate(suite.tests):
+        parts = test["required_elements"][i % 2::2] + test.get("forbidden_elements", [])[:1]
+        if i % 5 == 0:
+            parts.append("BROKEN")
+        responses[test["id"]] = "\n".join(parts)
+    return responses
+
+
+@pytest.fixture
+def graded(tmp_path, fake_jac):
+    # A slice of the real suite; it has no forbidden elements, so give some tests a few
+    with open("tests.json") as f:
+        tests = json.load(f)[:40]
+    for test in tests[::3]:
+        test["forbidden_elements"] = ["import", "global", "spawn"]
+    path = tmp_path / "tests.json"
+    path.write_text(json.dumps(tests))
+    evaluator = EvaluatorService(str(path))
+    evaluator.use_cache = False
+    responses = sample_responses(evaluator.suite)
+    return evaluator, responses, evaluator.evaluate_responses(responses, max_workers=4)
+
+
+def all_results(evaluation):
+    return [test for scores in evaluation["evaluation_results"].values() for test in scores["tests"]]
+
+
+def test_rows_decode_to_the_graded_results(graded):
+    evaluator, _, evaluation = graded
+    results = all_results(evaluation)
+    assert {r["jac_valid"] for r in results} == {True, False}
+    assert any(r["forbidden_found"] for r in results)
+
+    for result in results:
+        test_case = evaluator.suite.get(result["test_id"])
+        row = encode_result(result, test_case)
+        assert decode_row(row, test_case, result["code"]) == result
+
+
+def test_timed_out_result_round_trips(fake_jac):
+    evaluator = EvaluatorService("tests.json")
+    test_case = evaluator.suite.tests[0]
+    result = evaluator._timeout_result("walker W {}", test_case, 2.5)
+    assert decode_row(encode_result(result, test_case), test_case, result["code"]) == result
+
+
+def test_stored_evaluation_serves_the_original_breakdown(graded):
+    evaluator, responses, evaluation = graded
+    record = evaluation_record(evaluation, evaluator.suite)
+    assert len(record["test_rows"]) == len(evaluator.suite.tests)
+    assert any(row["forbidden_mask"] for row in record["test_rows"])
+
+    served = category_breakdown_with_tests(
+        record["evaluation_results"], record["test_rows"], responses, evaluator.suite
+    )
+    assert served == evaluation["evaluation_results"]
+
+    # Aggregates rebuilt from the row columns alone match the graded totals
+    summary = evaluator._aggregate([aggregate_view(row, evaluator.suite) for row in record["test_rows"]])
+    assert summary["total_score"] == evaluation["total_score"]
+    assert summary["category_breakdown"] == {
+        category: {k: v for k, v in scores.items() if k != "tests"}
+        for category, scores in evaluation["evaluation_results"].items()
+    }
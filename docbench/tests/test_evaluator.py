@@ -0,0 +1,70 @@
+"""EvaluatorService grading, deadlines and caching"""
+
+import json
+import os
+import time
+
+from backend.services.evaluator import EvaluatorService
+
+
+def functional_suite(tmp_path, count):
+    tests = [
+        {
+            "id": f"F{i}", "level": 1, "category": "Functional", "task": "t", "points": 10,
+            "type": "functional", "required_elements": ["walker"], "test_harness": "test t {}"
+        }
+        for i in range(count)
+    ]
+    path = tmp_path / 'tests.json'
+    path.write_text(json.dumps(tests))
+    evaluator = EvaluatorService(str(path))
+    evaluator.use_cache = False
+    return evaluator
+
+
+def process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_timeouts_share_one_deadline_and_kill_checks(tmp_path, fake_jac):
+    evaluator = functional_suite(tmp_path, 4)
+    responses = {f"F{i}": "walker W {}" for i in range(4)}
+
+    start = time.monotonic()
+    results = evaluator._evaluate_tests(responses, max_workers=2, test_timeout=1.0)
+    elapsed = time.monotonic() - start
+
+    # Two waves of one second each, not a fresh timeout per test
+    assert elapsed < 3.5
+    assert [r["score"] for r in results] == [0, 0, 0, 0]
+    time.sleep(0.2)
+    pids = [int(name) for name in os.listdir(fake_jac)]
+    assert pids
+    assert not any(process_alive(pid) for pid in pids)
+
+
+def test_batch_checked_responses_are_graded_individually(tmp_path, fake_jac):
+    evaluator = functional_suite(tmp_path, 4)
+    responses = {"F0": "walker W {} # PASS", "F1": "BROKEN", "F2": "walker W {} # PASS", "F3": "BROKEN"}
+    results = evaluator._evaluate_tests(responses, max_workers=2, test_timeout=5.0)
+    assert [r["jac_valid"] for r in results] == [True, False, True, False]
+    assert [r["score"] for r in results] == [10, 0, 10, 0]
+
+
+def test_merge_keeps_only_grades_of_the_final_answers(tmp_path, fake_jac):
+    evaluator = functional_suite(tmp_path, 3)
+    # F0 streamed from an attempt that later failed; F2's answer was never graded
+    batches = [
+        evaluator.evaluate_batch({"F0": "walker W {} # FAIL", "F1": "walker W {} # PASS"}),
+        evaluator.evaluate_batch({"F0": "BROKEN"})
+    ]
+    final = {"F0": "walker W {} # PASS", "F1": "walker W {} # PASS", "F2": "walker W {} # PASS"}
+    merged = evaluator.merge_batches(batches, final)
+    tests = merged["evaluation_results"]["Functional"]["tests"]
+    assert [t["test_id"] for t in tests] == ["F0", "F1", "F2"]
+    assert [t["score"] for t in tests] == [10, 10, 10]
+    assert merged["tests_completed"] == 3
@@ -0,0 +1,109 @@
+"""jac check through the persistent worker pool and the batched CLI fallback"""
+
+import os
+import sys
+import textwrap
+import time
+
+import pytest
+
+from backend.utils.jac_checker import CHECK_TIMEOUT_MESSAGE, JacCheckerPool, classify_output, jac_check_batch
+
+FAKE_PROGRAM = '''
+class JacProgram:
+    def __init__(self):
+        self.errors_had = []
+        self.warnings_had = []
+
+    def compile(self, file_path, use_str=None, type_check=False):
+        code = use_str if use_str is not None else open(file_path).read()
+        print("jaclang noise on stdout")
+        if "syntax_error" in code:
+            self.errors_had.append("Syntax error at line 1\\n  detail")
+        if type_check and "type_error" in code:
+            self.errors_had.append("Type error at line 1")
+        return None
+'''
+
+
+def install_fake_jaclang(root, program=FAKE_PROGRAM):
+    package = root / 'jaclang' / 'compiler'
+    package.mkdir(parents=True, exist_ok=True)
+    (root / 'jaclang' / '__init__.py').write_text('')
+    (package / '__init__.py').write_text('')
+    (package / 'program.py').write_text(textwrap.dedent(program))
+
+
+@pytest.fixture
+def fake_jaclang(tmp_path, monkeypatch):
+    """Make a stand-in jaclang importable by worker processes"""
+    monkeypatch.setenv('PYTHONPATH', os.pathsep.join(filter(None, [str(tmp_path), os.getenv('PYTHONPATH')])))
+    return tmp_path
+
+
+@pytest.fixture
+def pool():
+    pool = JacCheckerPool(size=2, retry_backoff=0.2)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_checks_in_process(fake_jaclang, pool):
+    install_fake_jaclang(fake_jaclang)
+    assert pool.check('walker W {}') == (True, [], [])
+    valid, errors, _ = pool.check('syntax_error')
+    assert not valid
+    assert errors == ["Error: Syntax error at line 1"]
+
+
+def test_pool_matches_jac_check_on_type_errors(fake_jaclang, pool):
+    # `jac check` does not type check, so neither may the pool
+    install_fake_jaclang(fake_jaclang)
+    assert pool.check('type_error') == (True, [], [])
+
+
+def test_failed_start_backs_off_then_retries(fake_jaclang, pool):
+    # A jaclang that fails to import: the worker reports it cannot start
+    install_fake_jaclang(fake_jaclang, 'raise ImportError("broken install")')
+    assert pool.check('walker W {}') is None
+    assert not pool.available
+    assert pool.check('walker W {}') is None
+
+    install_fake_jaclang(fake_jaclang)
+    time.sleep(0.25)
+    assert pool.available
+    assert pool.check('walker W {}') == (True, [], [])
+    assert pool._failures == 0
+
+
+def test_batch_mixes_valid_and_invalid_files(fake_jac):
+    codes = ['walker A {}', 'BROKEN one', 'walker B {}', 'walker C {}', 'BROKEN two']
+    results = jac_check_batch(codes, workers=3)
+    assert [valid for valid, _, _ in results] == [True, False, True, True, False]
+    for (valid, errors, _), code in zip(results, codes):
+        if valid:
+            assert errors == []
+        else:
+            # Only the file's own diagnostic; the summary line is not an error
+            assert len(errors) == 1 and 'Unexpected token' in errors[0]
+
+
+def test_batch_times_out_per_file(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    jac = bin_dir / 'jac'
+    jac.write_text(f"#!{sys.executable}\nimport sys, time\nif 'SLOW' in open(sys.argv[2]).read(): time.sleep(30)\n")
+    jac.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    results = jac_check_batch(['walker A {}', 'SLOW'], per_file_timeout=0.5)
+    assert results == [(True, [], []), (False, [CHECK_TIMEOUT_MESSAGE], [])]
+
+
+def test_batch_without_jac_skips_validation(tmp_path, monkeypatch):
+    monkeypatch.setenv('PATH', str(tmp_path))
+    assert jac_check_batch(['BROKEN', 'walker A {}']) == [(True, [], []), (True, [], [])]
+
+
+def test_summary_line_is_not_a_diagnostic():
+    output = "Error: a.jac:1:1 - Unexpected token\nWarning: a.jac:2:1 - Unused\nErrors: 1, Warnings: 1\n"
+    assert classify_output(output) == (["Error: a.jac:1:1 - Unexpected token"], ["Warning: a.jac:2:1 - Unused"])
@@ -0,0 +1,52 @@
+"""Concurrency slots and per-model rate limits in the shared LLM engine"""
+
+import asyncio
+
+from backend.services.llm_engine import FairScheduler, TokenBucket, is_rate_limited
+
+
+def test_queued_requests_spend_no_tokens_and_keep_priority():
+    async def scenario():
+        scheduler = FairScheduler(1)
+        bucket = TokenBucket(rate_per_minute=60, burst=2)
+        await scheduler.acquire('a', bucket=bucket)
+        low = asyncio.ensure_future(scheduler.acquire('a', 0, bucket))
+        await asyncio.sleep(0)
+        high = asyncio.ensure_future(scheduler.acquire('a', 5, bucket))
+        await asyncio.sleep(0)
+        assert round(bucket.tokens) == 1
+
+        scheduler.release()
+        await asyncio.sleep(0)
+        assert high.done() and not low.done()
+        assert bucket.tokens < 1
+        scheduler.release()
+        low.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_a_model_out_of_tokens_does_not_hold_up_others():
+    async def scenario():
+        scheduler = FairScheduler(2)
+        paused, free = TokenBucket(60, 1), TokenBucket(60, 1)
+        paused.pause(0.2)
+        held = asyncio.ensure_future(scheduler.acquire('paused', 5, paused))
+        other = asyncio.ensure_future(scheduler.acquire('free', 0, free))
+        await asyncio.sleep(0)
+        assert other.done() and not held.done()
+        await asyncio.wait_for(held, 1.0)
+        assert scheduler.in_use == 2
+
+    asyncio.run(scenario())
+
+
+def test_only_429_responses_are_rate_limits():
+    class StatusError(Exception):
+        def __init__(self, message, status_code):
+            super().__init__(message)
+            self.status_code = status_code
+
+    assert is_rate_limited(StatusError("Too many requests", 429))
+    assert not is_rate_limited(StatusError("upstream said 429 for request 4290", 502))
+    assert not is_rate_limited(ValueError("request id 1429"))
@@ -0,0 +1,29 @@
+"""Model catalogue refresh gating"""
+
+from backend.services import model_catalog
+from backend.services.model_catalog import ModelCatalog
+
+
+class FailingSession:
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, headers=None):
+        self.requests += 1
+        raise ConnectionError("OpenRouter unreachable")
+
+
+def test_failed_fetch_of_empty_catalogue_waits_for_ttl(monkeypatch):
+    session = FailingSession()
+    monkeypatch.setattr(model_catalog, 'get_http_session', lambda base_url: session)
+    monkeypatch.setenv('OPENROUTER_API_KEY', 'test-key')
+    catalog = ModelCatalog(source='https://example.invalid/models', ttl=3600)
+
+    assert catalog.get('a') is None
+    assert catalog.get_summaries() == []
+    assert catalog.get('b') is None
+    assert session.requests == 1
+
+    catalog.checked_at -= 3601
+    catalog.get('a')
+    assert session.requests == 2
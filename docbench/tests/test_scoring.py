@@ -0,0 +1,114 @@
+"""Vectorized rescoring agrees with the evaluator it replays"""
+
+import json
+import uuid
+
+import pytest
+
+from backend.services import evaluator as evaluator_module
+from backend.services.evaluation_store import encode_result, evaluation_record
+from backend.services.evaluator import EvaluatorService
+from backend.services.scoring import DEFAULT_WEIGHTS, OutcomeMatrix, ScoringWeights, rescore
+from database import BenchmarkResultService
+
+PROFILES = [
+    DEFAULT_WEIGHTS,
+    ScoringWeights(forbidden=0.5, jac_check=0.4, syntax_per_warning=0.05, syntax_cap=0.2)
+]
+
+
+@pytest.fixture
+def evaluator(tmp_path, fake_jac):
+    # A slice of the real suite with forbidden elements and functional tests mixed in
+    with open("tests.json") as f:
+        tests = json.load(f)[:30]
+    for test in tests[::3]:
+        test["forbidden_elements"] = ["import", "global", "spawn"]
+    for test in tests[1::4]:
+        test["type"] = "functional"
+        test["test_harness"] = "test t {}"
+    path = tmp_path / "tests.json"
+    path.write_text(json.dumps(tests))
+    evaluator = EvaluatorService(str(path))
+    evaluator.use_cache = False
+    return evaluator
+
+
+def sample_responses(suite):
+    """Partial required elements, some forbidden ones, failing jac checks and functional tests"""
+    responses = {}
+    for i, test in enumerate(suite.tests):
+        # Functional tests get every element, so a failing run has score left to lose
+        required = test["required_elements"] if test.get("type") == "functional" else test["required_elements"][i % 2::2]
+        parts = required + test.get("forbidden_elements", [])[:1 + i % 2]
+        if i % 5 == 0:
+            parts.append("BROKEN")
+        parts.append("# PASS" if i % 3 else "# FAIL")
+        responses[test["id"]] = "\n".join(parts)
+    return responses
+
+
+def grade(evaluator, responses, use_jac_check):
+    if use_jac_check:
+        return evaluator._evaluate_tests(responses, max_workers=1)
+    return [
+        evaluator.evaluate_code(code, evaluator.suite.get(test_id), use_jac_check=False, use_cache=False)
+        for test_id, code in responses.items()
+    ]
+
+
+def matrix_for(evaluator, results):
+    rows = [encode_result(r, evaluator.suite.get(r["test_id"])) for r in results]
+    runs = [{'id': 1, 'run_id': 'run', 'model': 'm', 'variant': 'v', 'collection': None, 'percentage': None}]
+    outcomes = [
+        (1, row['test_category'], row['max_score'], row['required_mask'], row['required_total'],
+         row['forbidden_mask'], row['forbidden_total'], row['flags'], row['syntax_errors'])
+        for row in rows
+    ]
+    return OutcomeMatrix(runs, outcomes)
+
+
+@pytest.mark.parametrize("weights", PROFILES)
+@pytest.mark.parametrize("use_jac_check", [True, False])
+def test_rescoring_matches_the_evaluator(evaluator, monkeypatch, weights, use_jac_check):
+    # Grade with the evaluator under the same weights the matrix is rescored with
+    monkeypatch.setattr(evaluator_module, "DEFAULT_WEIGHTS", weights)
+    results = grade(evaluator, sample_responses(evaluator.suite), use_jac_check)
+    if use_jac_check:
+        assert {r["jac_valid"] for r in results} == {True, False}
+    else:
+        assert any(r["syntax_errors"] for r in results)
+    assert any(r["forbidden_found"] for r in results)
+    assert any(r["score_breakdown"]["functional"] for r in results)
+
+    matrix = matrix_for(evaluator, results)
+    assert matrix.test_scores(weights).tolist() == [r["score"] for r in results]
+
+    summary = evaluator._aggregate(results)
+    run = matrix.rescore(weights)['runs'][0]
+    assert run['total_score'] == summary["total_score"]
+    assert run['percentage'] == summary["overall_percentage"]
+    assert run['category_breakdown'] == {
+        category: scores["percentage"] for category, scores in summary["category_breakdown"].items()
+    }
+
+
+def test_timed_out_tests_score_zero(evaluator):
+    test_case = evaluator.suite.tests[0]
+    result = evaluator._timeout_result("with entry { print('hi'); }", test_case, 1.0)
+    assert matrix_for(evaluator, [result]).test_scores(DEFAULT_WEIGHTS).tolist() == [0.0]
+
+
+def test_stored_runs_rescore_to_their_stored_scores(evaluator):
+    responses = sample_responses(evaluator.suite)
+    evaluation = evaluator.evaluate_responses(responses, max_workers=2)
+    run_id = str(uuid.uuid4())
+    BenchmarkResultService.create(run_id, 'model', 'model', 'variant', 0.1, 1000, len(responses), responses)
+    BenchmarkResultService.update_evaluation(run_id, **evaluation_record(evaluation, evaluator.suite))
+
+    run, = rescore(run_ids=[run_id])['runs']
+    assert run['total_score'] == evaluation["total_score"]
+    assert run['delta'] == 0
+    assert run['category_breakdown'] == {
+        category: scores["percentage"] for category, scores in evaluation["evaluation_results"].items()
+    }
@@ -1,6 +1,8 @@
 import os
 import time
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from typing import Dict
 from dotenv import load_dotenv
@@ -9,6 +11,20 @@ from dotenv import load_dotenv
 docgen_dir = Path(__file__).parents[1]
 if (docgen_dir / ".env").exists(): load_dotenv(docgen_dir / ".env")
 
+BASE_URL = "https://openrouter.ai/api/v1"
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+def get_session(base_url: str, pool_size: int = 16) -> requests.Session:
+    """One keep-alive session per base URL, shared by every stage and worker thread"""
+    with _sessions_lock:
+        if base_url not in _sessions:
+            session = requests.Session()
+            session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            _sessions[base_url] = session
+        return _sessions[base_url]
+
 class LLM:
     def __init__(self, config: Dict, stage_cfg: Dict = None):
         self.cfg = config['llm'].copy()
@@ -17,7 +33,9 @@ class LLM:
         
         self.key = os.environ.get(self.cfg.get('api_key_env', 'OPENROUTER_API_KEY'))
         if not self.key: raise ValueError("Missing API Key")
-        self.url = "https://openrouter.ai/api/v1/chat/completions"
+        self.url = f"{BASE_URL}/chat/completions"
+        self.session = get_session(BASE_URL, config.get('processing', {}).get('max_workers', 16))
+        self.timeout = (self.cfg.get('connect_timeout', 10), self.cfg.get('timeout', 120))
 
     def query(self, text: str, prompt_tpl: str = None) -> str:
         prompt = prompt_tpl.replace('{content}', text) if prompt_tpl else text
@@ -31,7 +49,7 @@ class LLM:
 
         for i in range(self.cfg.get('max_retries', 3)):
             try:
-                res = requests.post(self.url, headers=headers, json=data, timeout=120)
+                res = self.session.post(self.url, headers=headers, json=data, timeout=self.timeout)
                 if res.ok: return res.json()['choices'][0]['message']['content']
                 if res.status_code in [500, 502, 503, 504, 429]:
                     time.sleep(2 ** i)